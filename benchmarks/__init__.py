@@ -0,0 +1,3 @@
+"""
+Offline benchmarks of the job helpers, see benchmarks/run.py.
+"""
@@ -0,0 +1,530 @@
+"""
+An in-process fake Solr, enough of it to run the job helpers end to end:
+
+- `/select` with q, fq (several), start, rows, fl, sort, cursorMark, the
+  `{!collapse field=...}` filter and `{!join fromIndex=... from=... to=...}`;
+- `/update` with JSON documents and atomic updates (set, add, add-distinct,
+  remove, inc) and optimistic concurrency on `_version_` (409 on conflict).
+
+The query syntax covers what this repository sends: `*:*`, `field:value`,
+`field:"phrase"`, `field:*`, `field:[a TO b]`, `field:(a OR b)`, AND, OR,
+NOT / `-`, parentheses and backslash escapes. There is no scoring: every
+document scores 1.0, so `score desc,id asc` sorts by id.
+"""
+
+import base64
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+Doc = dict[str, Any]
+
+
+class QueryError(ValueError):
+    """A query the fake Solr cannot parse (HTTP 400)."""
+
+
+class VersionConflict(Exception):
+    """An update with a stale `_version_` (HTTP 409)."""
+
+
+_TOKEN = re.compile(
+    r'\s*(?:(?P<lparen>\()|(?P<rparen>\))|(?P<phrase>"(?:\\.|[^"\\])*")'
+    r"|(?P<range>\[[^\]]*\])|(?P<term>(?:\\.|[^\s()\"\[])+))"
+)
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def _tokenize(q: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    position = 0
+    q = q.strip()
+    while position < len(q):
+        match = _TOKEN.match(q, position)
+        if not match:
+            raise QueryError(f"cannot parse {q[position:]!r}")
+        kind = match.lastgroup
+        assert kind is not None
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+def _values(doc: Doc, field: str) -> list[Any]:
+    value = doc.get(field)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class _Parser:
+    """
+    Recursive descent over the tokens, returning a predicate on documents.
+    Adjacent clauses are OR-ed, as with Solr's default q.op.
+    """
+
+    def __init__(self, q: str) -> None:
+        self.tokens = _tokenize(q)
+        self.position = 0
+
+    def parse(self) -> Callable[[Doc], bool]:
+        predicate = self._or()
+        if self.position < len(self.tokens):
+            raise QueryError(f"unexpected {self.tokens[self.position][1]!r}")
+        return predicate
+
+    def _peek(self) -> Optional[tuple[str, str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise QueryError("unexpected end of query")
+        self.position += 1
+        return token
+
+    def _or(self, field: Optional[str] = None) -> Callable[[Doc], bool]:
+        clauses = [self._and(field)]
+        while (token := self._peek()) and token != ("rparen", ")"):
+            if token == ("term", "OR"):
+                self.position += 1
+            clauses.append(self._and(field))
+        if len(clauses) == 1:
+            return clauses[0]
+        return lambda doc: any(clause(doc) for clause in clauses)
+
+    def _and(self, field: Optional[str]) -> Callable[[Doc], bool]:
+        clauses = [self._unary(field)]
+        while self._peek() == ("term", "AND"):
+            self.position += 1
+            clauses.append(self._unary(field))
+        if len(clauses) == 1:
+            return clauses[0]
+        return lambda doc: all(clause(doc) for clause in clauses)
+
+    def _unary(self, field: Optional[str]) -> Callable[[Doc], bool]:
+        kind, value = self._peek() or ("", "")
+        if (kind, value) == ("term", "NOT"):
+            self.position += 1
+            clause = self._unary(field)
+            return lambda doc: not clause(doc)
+        if kind == "term" and value.startswith(("-", "+")) and len(value) > 1:
+            # split the operator from its clause
+            self.tokens[self.position] = ("term", value[1:])
+            clause = self._unary(field)
+            return (lambda doc: not clause(doc)) if value[0] == "-" else clause
+        if kind == "term" and value in ("-", "+"):
+            self.position += 1
+            clause = self._unary(field)
+            return (lambda doc: not clause(doc)) if value == "-" else clause
+        return self._primary(field)
+
+    def _primary(self, field: Optional[str]) -> Callable[[Doc], bool]:
+        kind, value = self._next()
+        if kind == "lparen":
+            clause = self._or(field)
+            if self._next() != ("rparen", ")"):
+                raise QueryError("missing )")
+            return clause
+        if kind == "term" and value == "*:*":
+            return lambda doc: True
+        if kind == "term" and field is None:
+            name, sep, rest = value.partition(":")
+            if not sep:
+                raise QueryError(f"no default field for {value!r}")
+            if rest:
+                return self._match(name, "term", rest)
+            # field:"phrase", field:[a TO b] or field:(a OR b)
+            if self._peek() == ("lparen", "("):
+                self.position += 1
+                clause = self._or(name)
+                if self._next() != ("rparen", ")"):
+                    raise QueryError("missing )")
+                return clause
+            kind, value = self._next()
+            return self._match(name, kind, value)
+        if field is None:
+            raise QueryError(f"no default field for {value!r}")
+        return self._match(field, kind, value)
+
+    def _match(self, field: str, kind: str, value: str) -> Callable[[Doc], bool]:
+        if kind == "phrase":
+            expected = _unescape(value[1:-1])
+            return lambda doc: any(str(v) == expected for v in _values(doc, field))
+        if kind == "range":
+            low, _, high = value[1:-1].partition(" TO ")
+            low, high = low.strip(), high.strip()
+
+            def in_range(v: Any) -> bool:
+                for bound, ok in ((low, lambda b: v >= b), (high, lambda b: v <= b)):
+                    if bound == "*":
+                        continue
+                    b = type(v)(bound) if isinstance(v, (int, float)) else bound
+                    if not ok(b):
+                        return False
+                return True
+
+            return lambda doc: any(in_range(v) for v in _values(doc, field))
+        if value == "*":
+            return lambda doc: bool(_values(doc, field))
+        expected = _unescape(value)
+        if expected.endswith("*"):
+            prefix = expected[:-1]
+            return lambda doc: any(str(v).startswith(prefix) for v in _values(doc, field))
+        return lambda doc: any(str(v) == expected for v in _values(doc, field))
+
+
+_LOCAL_PARAMS = re.compile(r"^\{!(?P<parser>\w+)(?P<params>[^}]*)\}(?P<q>.*)$", re.S)
+
+
+class FakeSolr:
+    """
+    The cores of the fake Solr, their documents and request counters.
+    Thread-safe: the HTTP server handles requests in threads.
+
+    Args:
+        latency (float): Seconds to wait before each response. Defaults to 0.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.cores: dict[str, dict[str, Doc]] = {}
+        self.counters: Counter = Counter()
+        self.lock = threading.RLock()
+        # _version_ 1 has a meaning in updates ("must exist")
+        self._version = 1
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def add_core(self, name: str, docs: Iterable[Doc] = ()) -> None:
+        with self.lock:
+            self.cores[name] = {}
+            for doc in docs:
+                self.cores[name][doc["id"]] = {**doc, "_version_": self._next_version()}
+
+    def _filter(self, core: str, q: str) -> Callable[[Doc], bool]:
+        match = _LOCAL_PARAMS.match(q.strip())
+        if not match:
+            return _Parser(q).parse()
+        params = dict(re.findall(r"(\w+)=(\S+)", match.group("params")))
+        if match.group("parser") == "join":
+            inner = self._filter(params["fromIndex"], match.group("q"))
+            joined = {
+                str(v)
+                for doc in self.cores[params["fromIndex"]].values()
+                if inner(doc)
+                for v in _values(doc, params["from"])
+            }
+            return lambda doc: any(str(v) in joined for v in _values(doc, params["to"]))
+        raise QueryError(f"unsupported query parser {match.group('parser')}")
+
+    @staticmethod
+    def _sort_key(sort: str) -> Callable[[Doc], tuple]:
+        fields = []
+        for clause in filter(None, (c.strip() for c in sort.split(","))):
+            name, _, direction = clause.partition(" ")
+            if name != "score":
+                fields.append((name, direction.strip().lower() == "desc"))
+
+        def key(doc: Doc) -> tuple:
+            # descending string sort: inverted code points, the end marker
+            # sorts a string after the longer strings it is a prefix of
+            return tuple(
+                (
+                    tuple(-ord(c) for c in str(doc.get(name, ""))) + (1,)
+                    if desc
+                    else str(doc.get(name, ""))
+                )
+                for name, desc in fields
+            )
+
+        return key
+
+    def select(self, core: str, params: dict[str, list[str]]) -> dict[str, Any]:
+        start_time = time.perf_counter()
+        q = params.get("q", ["*:*"])[0] or "*:*"
+        fqs = [fq for fq in params.get("fq", []) if fq]
+        collapse = [fq for fq in fqs if fq.startswith("{!collapse")]
+        filters = [self._filter(core, q)] + [
+            self._filter(core, fq) for fq in fqs if fq not in collapse
+        ]
+        sort = params.get("sort", ["id asc"])[0]
+        key = self._sort_key(sort)
+        with self.lock:
+            docs = sorted(
+                (d for d in self.cores[core].values() if all(f(d) for f in filters)),
+                key=key,
+            )
+        for fq in collapse:
+            match = re.search(r"field=([^\s}]+)", fq)
+            if not match:
+                raise QueryError(f"cannot parse {fq!r}")
+            field = match.group(1)
+            seen = set()
+            collapsed = []
+            for d in docs:
+                if d.get(field) not in seen:
+                    seen.add(d.get(field))
+                    collapsed.append(d)
+            docs = collapsed
+        total = len(docs)
+        rows = int(params.get("rows", ["10"])[0])
+        cursor_mark = params.get("cursorMark", [None])[0]
+        response: dict[str, Any] = {}
+        if cursor_mark is not None:
+            if cursor_mark != "*":
+                last = tuple(json.loads(base64.urlsafe_b64decode(cursor_mark)))
+                last = tuple(tuple(v) if isinstance(v, list) else v for v in last)
+                docs = [d for d in docs if key(d) > last]
+            page = docs[:rows]
+            response["nextCursorMark"] = (
+                base64.urlsafe_b64encode(json.dumps(key(page[-1])).encode()).decode()
+                if page
+                else cursor_mark
+            )
+        else:
+            start = int(params.get("start", ["0"])[0])
+            page = docs[start : start + rows]
+        fl = [f.strip() for f in params.get("fl", ["*"])[0].split(",") if f.strip()]
+        page = [
+            (
+                {**d, "score": 1.0}
+                if "*" in fl
+                else {f: (1.0 if f == "score" else d[f]) for f in fl if f == "score" or f in d}
+            )
+            for d in page
+        ]
+        self.counters[f"{core}.select"] += 1
+        self.counters[f"{core}.docs_returned"] += len(page)
+        return {
+            "responseHeader": {
+                "status": 0,
+                "QTime": int((time.perf_counter() - start_time) * 1000),
+            },
+            "response": {"numFound": total, "start": 0, "docs": page},
+            **response,
+        }
+
+    def update(self, core: str, todos: list[Doc]) -> dict[str, Any]:
+        start_time = time.perf_counter()
+        with self.lock:
+            documents = self.cores[core]
+            # Solr rejects the whole request on a version conflict
+            for todo in todos:
+                version = todo.get("_version_")
+                current = documents.get(todo["id"], {}).get("_version_")
+                if version is None or version == 0:
+                    continue
+                if (version < 0 and current is not None) or (
+                    version == 1 and current is None
+                ) or (version > 1 and version != current):
+                    self.counters[f"{core}.conflicts"] += 1
+                    raise VersionConflict(
+                        f"version conflict for {todo['id']} "
+                        f"expected={version} actual={current}"
+                    )
+            adds = []
+            for todo in todos:
+                atomic = any(isinstance(v, dict) for v in todo.values())
+                doc = dict(documents.get(todo["id"], {"id": todo["id"]})) if atomic else {}
+                for name, value in todo.items():
+                    if name == "_version_":
+                        continue
+                    if not isinstance(value, dict):
+                        doc[name] = value
+                        continue
+                    ((op, arg),) = value.items()
+                    current = _values(doc, name)
+                    args = arg if isinstance(arg, list) else [arg]
+                    if op == "set":
+                        doc[name] = arg
+                    elif op == "add":
+                        doc[name] = current + args
+                    elif op == "add-distinct":
+                        doc[name] = current + [a for a in args if a not in current]
+                    elif op == "remove":
+                        doc[name] = [v for v in current if v not in args]
+                    elif op == "inc":
+                        doc[name] = (doc.get(name) or 0) + arg
+                    else:
+                        raise QueryError(f"unsupported atomic update {op}")
+                doc["_version_"] = self._next_version()
+                documents[todo["id"]] = doc
+                adds.extend([todo["id"], doc["_version_"]])
+            self.counters[f"{core}.update"] += 1
+            self.counters[f"{core}.docs_updated"] += len(todos)
+        return {
+            "responseHeader": {
+                "status": 0,
+                "QTime": int((time.perf_counter() - start_time) * 1000),
+            },
+            "adds": adds,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeSolrServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format, *args)
+
+    def _reply(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.server.fake.counters["bytes_sent"] += len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        fake = self.server.fake
+        fake.counters["requests"] += 1
+        fake.counters["bytes_received"] += len(body)
+        core_path, _, handler = url.path.rstrip("/").rpartition("/")
+        core = self.server.paths.get(core_path)
+        if fake.latency:
+            time.sleep(fake.latency)
+        if core is None:
+            return self._reply(404, {"error": {"msg": f"no core at {core_path}"}})
+        try:
+            if handler == "select":
+                if self.headers.get("Content-Type", "").startswith(
+                    "application/x-www-form-urlencoded"
+                ):
+                    for name, values in parse_qs(body.decode(), keep_blank_values=True).items():
+                        params.setdefault(name, []).extend(values)
+                return self._reply(200, fake.select(core, params))
+            if handler == "update":
+                return self._reply(200, fake.update(core, json.loads(body or b"[]")))
+        except VersionConflict as e:
+            return self._reply(409, {"error": {"msg": str(e), "code": 409}})
+        except (QueryError, KeyError) as e:
+            return self._reply(400, {"error": {"msg": repr(e), "code": 400}})
+        self._reply(404, {"error": {"msg": f"no handler {handler}"}})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class FakeSolrServer(ThreadingHTTPServer):
+    """
+    Serve a FakeSolr over HTTP, in a background thread.
+
+    Args:
+        fake (FakeSolr): The fake Solr.
+        paths (dict[str, str]): The core of each URL path, e.g.
+            {"/solr/impresso": "impresso"}.
+        host (str): Defaults to "127.0.0.1".
+        port (int): Defaults to 0, any free port.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fake: FakeSolr,
+        paths: dict[str, str],
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        super().__init__((host, port), _Handler)
+        self.fake = fake
+        self.paths = {path.rstrip("/"): core for path, core in paths.items()}
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeSolrServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def make_corpus(
+    articles: int = 1000,
+    passages_per_article: float = 0.5,
+    content_size: int = 1000,
+    seed: int = 42,
+) -> tuple[list[Doc], list[Doc]]:
+    """
+    A synthetic corpus of articles (the fields exported to CSV, a content of
+    `content_size` characters) and of text reuse passages, on average
+    `passages_per_article` per article.
+
+    Returns:
+        tuple[list[Doc], list[Doc]]: The articles and the passages.
+    """
+    rng = random.Random(seed)
+    words = ["impresso", "journal", "Zeitung", "gazette", "Bern", "Lausanne", "1914"]
+    content = " ".join(rng.choice(words) for _ in range(content_size // 6 + 1))
+    content = content[:content_size]
+    docs, passages = [], []
+    for i in range(articles):
+        journal = ("GDL", "JDG", "IMP", "LCE")[i % 4]
+        year = 1840 + i % 150
+        issue = f"{journal}-{year}-{1 + i % 12:02d}-{1 + i % 28:02d}-a"
+        ci_id = f"{issue}-i{i:06d}"
+        docs.append(
+            {
+                "id": ci_id,
+                "item_type_s": "ar",
+                "lg_s": ("fr", "de", "en")[i % 3],
+                "title_txt_fr": f"Article {i}",
+                "content_txt_fr": content,
+                "content_length_i": len(content),
+                "meta_country_code_s": ("CH", "LU")[i % 2],
+                "meta_province_code_s": "na",
+                "meta_periodicity_s": "daily",
+                "meta_year_i": year,
+                "meta_journal_s": journal,
+                "meta_issue_id_s": issue,
+                "meta_partnerid_s": "SNL",
+                "meta_topics_s": "General",
+                "meta_polorient_s": "na",
+                "meta_date_dt": f"{year}-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00Z",
+                "nb_pages_i": 1,
+                "front_b": i % 10 == 0,
+                "page_id_ss": [f"{issue}-p0001"],
+                "rights_copyright_s": "pd",
+                "rights_bm_get_tr_l": 1,
+            }
+        )
+        count = int(passages_per_article) + (
+            rng.random() < passages_per_article - int(passages_per_article)
+        )
+        for j in range(count):
+            passages.append(
+                {
+                    "id": f"c{rng.randrange(articles)}:{ci_id}/{j}",
+                    "ci_id_s": ci_id,
+                    "content_txt_fr": content[:200],
+                }
+            )
+    return docs, passages
@@ -0,0 +1,270 @@
+"""
+Run the job helpers end to end against an in-process fake Solr and an
+in-memory sqlite database standing in for MySQL, and report documents per
+second, Solr requests and memory per scenario.
+
+The fake Solr listens where the settings point (IMPRESSO_SOLR_URL and
+IMPRESSO_SOLR_PASSAGES_URL), which must be local addresses: use an env file
+with e.g. IMPRESSO_SOLR_URL=http://127.0.0.1:18983/solr/impresso.
+
+Usage:
+ENV=benchmark pipenv run python -m benchmarks.run
+ENV=benchmark pipenv run python -m benchmarks.run --articles 20000 --latency-ms 5
+ENV=benchmark pipenv run python -m benchmarks.run --save-baseline main
+ENV=benchmark pipenv run python -m benchmarks.run --compare main --max-regression 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument(
+        "--passages-per-article",
+        type=float,
+        default=0.5,
+        help="Average number of TR passages per article (default: 0.5)",
+    )
+    parser.add_argument(
+        "--content-size",
+        type=int,
+        default=1000,
+        help="Characters of content per article, the payload size (default: 1000)",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="Latency added to every Solr response, in ms (default: 0)",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=100, help="Documents per job page (default: 100)"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        dest="scenarios",
+        help="Run only this scenario (repeatable)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Measure the peak Python memory of each scenario (slower)",
+    )
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Accepted drop of docs/s against the baseline (default: 0.2)",
+    )
+    return parser
+
+
+def setup_django() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "impresso.settings")
+    from django.conf import settings
+
+    # the MySQL stand-in: nothing leaves the process
+    settings.DATABASES["default"].update(
+        {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:", "OPTIONS": {}}
+    )
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def get_solr_cores() -> dict[str, tuple[str, str, int, str]]:
+    """
+    Return the (core name, host, port, core path) of the articles and TR
+    passages cores, from the settings.
+    """
+    from django.conf import settings
+
+    from impresso.solr import get_core_from_url
+
+    cores = {}
+    for key, url in (
+        ("articles", settings.IMPRESSO_SOLR_URL_SELECT),
+        ("passages", settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT),
+    ):
+        parsed = urlparse(url)
+        if parsed.hostname not in LOCAL_HOSTS:
+            raise SystemExit(
+                f"{key} Solr URL {url} is not local: the benchmark would write "
+                "to it. Point IMPRESSO_SOLR_URL and IMPRESSO_SOLR_PASSAGES_URL "
+                "to a free local port."
+            )
+        name, _ = get_core_from_url(url)
+        path = parsed.path.rstrip("/").rpartition("/")[0]
+        cores[key] = (name, parsed.hostname, parsed.port or 80, path)
+    return cores
+
+
+def peak_rss_mb() -> float:
+    # kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run(options: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    from benchmarks.fake_solr import FakeSolr, FakeSolrServer, make_corpus
+    from benchmarks.scenarios import SCENARIOS
+
+    cores = get_solr_cores()
+    articles, passages = cores["articles"][0], cores["passages"][0]
+    corpus = make_corpus(
+        articles=options.articles,
+        passages_per_article=options.passages_per_article,
+        content_size=options.content_size,
+    )
+    fake = FakeSolr(latency=options.latency_ms / 1000)
+    servers: dict[tuple[str, int], dict[str, str]] = {}
+    for name, host, port, path in cores.values():
+        servers.setdefault((host, port), {})[path] = name
+
+    results: dict[str, dict[str, Any]] = {}
+    with contextlib.ExitStack() as stack:
+        for (host, port), paths in servers.items():
+            stack.enter_context(FakeSolrServer(fake, paths, host=host, port=port))
+        for scenario in options.scenarios or SCENARIOS:
+            fake.add_core(articles, corpus[0])
+            fake.add_core(passages, corpus[1])
+            fake.counters.clear()
+            if options.trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            # helpers print progress to stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                docs = SCENARIOS[scenario](fake, articles, passages, options.limit)
+            elapsed = time.perf_counter() - start
+            result = {
+                "docs": docs,
+                "seconds": round(elapsed, 3),
+                "docs_per_s": round(docs / elapsed, 1) if elapsed else 0.0,
+                "requests": fake.counters["requests"],
+                "selects": sum(
+                    v for k, v in fake.counters.items() if k.endswith(".select")
+                ),
+                "updates": sum(
+                    v for k, v in fake.counters.items() if k.endswith(".update")
+                ),
+                "conflicts": sum(
+                    v for k, v in fake.counters.items() if k.endswith(".conflicts")
+                ),
+                "mb_sent": round(fake.counters["bytes_sent"] / 1024**2, 2),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            }
+            if options.trace_memory:
+                result["peak_traced_mb"] = round(
+                    tracemalloc.get_traced_memory()[1] / 1024**2, 1
+                )
+                tracemalloc.stop()
+            results[scenario] = result
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]], baseline: dict[str, Any], max_regression: float
+) -> list[str]:
+    """
+    Return the regressions against a baseline: docs/s dropping by more than
+    `max_regression`, or more Solr requests (deterministic for a given corpus).
+    """
+    regressions = []
+    for scenario, result in results.items():
+        before = baseline["results"].get(scenario)
+        if before is None:
+            continue
+        if result["docs_per_s"] < before["docs_per_s"] * (1 - max_regression):
+            regressions.append(
+                f"{scenario}: {result['docs_per_s']} docs/s, "
+                f"baseline {before['docs_per_s']}"
+            )
+        if result["requests"] > before["requests"]:
+            regressions.append(
+                f"{scenario}: {result['requests']} requests, "
+                f"baseline {before['requests']}"
+            )
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    options = get_parser().parse_args(argv)
+    setup_django()
+    logging.disable(logging.INFO)
+    from django.test import override_settings
+
+    from benchmarks.scenarios import SCENARIOS
+
+    unknown = set(options.scenarios or []) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as media_root, override_settings(
+        MEDIA_ROOT=media_root
+    ):
+        results = run(options)
+
+    print(
+        f"{'scenario':<24}{'docs':>8}{'s':>9}{'docs/s':>10}{'requests':>10}"
+        f"{'MB sent':>9}{'RSS MB':>8}"
+    )
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<24}{r['docs']:>8}{r['seconds']:>9}{r['docs_per_s']:>10}"
+            f"{r['requests']:>10}{r['mb_sent']:>9}{r['peak_rss_mb']:>8}"
+        )
+    params = {
+        k: getattr(options, k)
+        for k in (
+            "articles",
+            "passages_per_article",
+            "content_size",
+            "latency_ms",
+            "limit",
+        )
+    }
+    if options.save_baseline:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{options.save_baseline}.json"
+        path.write_text(json.dumps({"params": params, "results": results}, indent=2))
+        print(f"Baseline saved: {path}")
+    if options.compare:
+        baseline = json.loads(
+            (BASELINES_DIR / f"{options.compare}.json").read_text()
+        )
+        if baseline["params"] != params:
+            print(f"Warning: baseline parameters differ: {baseline['params']}")
+        regressions = compare(results, baseline, options.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regression against {options.compare}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
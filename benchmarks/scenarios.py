@@ -0,0 +1,140 @@
+"""
+The jobs measured by the benchmark suite. Each scenario prepares the fake
+Solr and the database, runs a job helper page by page as the celery tasks
+do, and returns the number of documents the job went through.
+"""
+
+from typing import Callable
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from impresso.models import Attachment, CollectableItem, Collection, Job, Profile
+from impresso.utils.tasks.collection import (
+    helper_remove_collection_progress,
+    helper_store_collection_progress,
+)
+from impresso.utils.tasks.export import helper_export_query_as_csv_progress
+from impresso.utils.tasks.textreuse import add_tr_passages_query_results_to_collection
+
+from .fake_solr import FakeSolr
+
+COLLECTION_ID = "local-benchmark-collection"
+
+
+def create_user() -> User:
+    user, created = User.objects.get_or_create(username="benchmark")
+    if created:
+        Profile.objects.create(
+            user=user, uid="local-benchmark", max_loops_allowed=1_000_000
+        )
+    return user
+
+
+def create_job(user: User, type: str) -> Job:
+    return Job.objects.create(type=type, creator=user, status=Job.RUN)
+
+
+def create_collection(user: User) -> Collection:
+    Collection.objects.filter(pk=COLLECTION_ID).delete()
+    return Collection.objects.create(id=COLLECTION_ID, name="Benchmark", creator=user)
+
+
+def export_query_as_csv(
+    fake: FakeSolr, articles: str, passages: str, limit: int
+) -> int:
+    user = create_user()
+    job = create_job(user, Job.EXPORT_QUERY_AS_CSV)
+    Attachment.create_from_job(job, extension="csv")
+    page, loops = 0, 1
+    while page < loops:
+        page, loops, _ = helper_export_query_as_csv_progress(
+            job=job,
+            query="*:*",
+            query_hash="benchmark",
+            user_bitmap_key=0b11111111,
+            skip=page * limit,
+            limit=limit,
+        )
+    return len(fake.cores[articles])
+
+
+def store_collection(fake: FakeSolr, articles: str, passages: str, limit: int) -> int:
+    user = create_user()
+    create_collection(user)
+    job = create_job(user, Job.BULK_COLLECTION_FROM_QUERY)
+    page, loops = 0, 1
+    while page < loops:
+        page, loops, _ = helper_store_collection_progress(
+            job=job,
+            query="*:*",
+            collection_id=COLLECTION_ID,
+            content_type=CollectableItem.ARTICLE,
+            skip=page * limit,
+            limit=limit,
+        )
+    return len(fake.cores[articles])
+
+
+def remove_collection(fake: FakeSolr, articles: str, passages: str, limit: int) -> int:
+    user = create_user()
+    create_collection(user)
+    # a collection holding every article, in Solr and in the db
+    for doc in fake.cores[articles].values():
+        doc["ucoll_ss"] = [COLLECTION_ID]
+    CollectableItem.objects.bulk_create(
+        CollectableItem(
+            item_id=item_id,
+            content_type=CollectableItem.ARTICLE,
+            collection_id=COLLECTION_ID,
+        )
+        for item_id in fake.cores[articles]
+    )
+    Collection.objects.filter(pk=COLLECTION_ID).update(
+        count_items=len(fake.cores[articles])
+    )
+    job = create_job(user, Job.DELETE_COLLECTION)
+    loops = 2
+    # every run removes the first page of what is left
+    while loops > 1:
+        _, loops, _ = helper_remove_collection_progress(
+            collection_id=COLLECTION_ID, job=job, limit=limit
+        )
+    return len(fake.cores[articles])
+
+
+def _add_tr_passages(fake: FakeSolr, articles: str, passages: str, limit: int) -> int:
+    user = create_user()
+    create_collection(user)
+    job = create_job(user, Job.BULK_COLLECTION_FROM_QUERY_TR)
+    page, loops = 0, 1
+    while page < loops:
+        page, loops, _ = add_tr_passages_query_results_to_collection(
+            collection_id=COLLECTION_ID,
+            job=job,
+            query="*:*",
+            skip=page * limit,
+            limit=limit,
+        )
+    return len(fake.cores[passages])
+
+
+def add_tr_passages(fake: FakeSolr, articles: str, passages: str, limit: int) -> int:
+    with override_settings(IMPRESSO_SOLR_TR_JOIN=False):
+        return _add_tr_passages(fake, articles, passages, limit)
+
+
+def add_tr_passages_join(
+    fake: FakeSolr, articles: str, passages: str, limit: int
+) -> int:
+    with override_settings(IMPRESSO_SOLR_TR_JOIN=True):
+        return _add_tr_passages(fake, articles, passages, limit)
+
+
+SCENARIOS: dict[str, Callable[[FakeSolr, str, str, int], int]] = {
+    "export_query_as_csv": export_query_as_csv,
+    "store_collection": store_collection,
+    "remove_collection": remove_collection,
+    "add_tr_passages": add_tr_passages,
+    "add_tr_passages_join": add_tr_passages_join,
+}
@@ -1,7 +1,15 @@
 from __future__ import absolute_import, unicode_literals
 
-# This will make sure the app is always imported when
-# Django starts so that shared_task will use this app.
-from .celery import app as celery_app
-
 __all__ = ("celery_app",)
+
+
+def __getattr__(name):
+    # The Celery app is loaded on first access only: importing celery costs
+    # ~100ms and most management commands never send a task. Task modules
+    # import `impresso.celery` themselves, and `celery -A impresso` falls back
+    # to `impresso.celery`.
+    if name == "celery_app":
+        from .celery import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,11 +3,12 @@ from django.contrib import admin
 from django.contrib import messages
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db.models import Count
 from unfold.admin import ModelAdmin  # type: ignore
 from django.contrib.auth.models import User
 from django.utils.translation import ngettext
 from django.utils import timezone
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from impresso.models.userBitmapSubscription import UserBitmapSubscription
 from .models import Issue, Job, Page, Newspaper
 from .models import SearchQuery, ContentItem
@@ -15,6 +16,9 @@ from .models import Collection, CollectableItem, Tag, TaggableItem
 from .models import Attachment, UploadedImage
 from .models import UserBitmap, SpecialMembershipDataset, UserSpecialMembershipRequest
 from .models import BaristaConversation
+from .utils.bitmask import BitMask
+from .utils.models.userBitmap import rebuild_user_bitmaps
+from .utils.profiling import get_hot_functions, read_job_profile
 
 from .views.admin.user_admin import UserAdmin
 from .views.admin.user_change_plan_request_admin import UserChangePlanRequestAdmin
@@ -34,6 +38,7 @@ class UserSpecialMembershipRequestAdmin(ModelAdmin):
     search_fields = ["user__username", "subscription__title"]
     list_filter = ["status"]
     autocomplete_fields = ["user", "reviewer", "subscription"]
+    list_select_related = ["user", "reviewer", "subscription"]
 
 
 @admin.register(UserBitmapSubscription)
@@ -43,6 +48,7 @@ class UserBitmapSubscriptionAdmin(ModelAdmin):
         "specialmembershipdataset",
     )
     autocomplete_fields = ["userbitmap"]
+    list_select_related = ["userbitmap__user", "specialmembershipdataset"]
 
 
 @admin.register(UserBitmap)
@@ -57,24 +63,32 @@ class UserBitmapAdmin(ModelAdmin):
     search_fields = ["user__username", "user__email"]
     actions = ["set_terms_accepted_date"]
 
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("user")
+            .annotate(num_subscriptions=Count("subscriptions"))
+        )
+
+    @admin.display(description="Num subscriptions", ordering="num_subscriptions")
     def num_subscriptions(self, obj):
-        return obj.subscriptions.count()
+        return obj.num_subscriptions
 
     def bitmap_display(self, obj):
         if obj.bitmap is None:
             return ""
-        return bin(obj.get_bitmap_as_int())
+        return bin(int(BitMask(obj.bitmap)))
 
     def user_plan_display(self, obj):
         return obj.get_user_plan()
 
     @admin.action(description="Accept the terms of use for selected users")
     def set_terms_accepted_date(self, request, queryset):
-        # for each user, do a proper save
-        updated = queryset.count()
-        for user_bitmap in queryset:
-            user_bitmap.date_accepted_terms = timezone.now()
-            user_bitmap.save()
+        user_ids = list(queryset.values_list("user_id", flat=True))
+        updated = queryset.update(date_accepted_terms=timezone.now())
+        # recompute all bitmaps at once instead of saving them one by one
+        rebuild_user_bitmaps(user_ids=user_ids, create_missing=False)
         self.message_user(
             request,
             ngettext(
@@ -290,10 +304,13 @@ class CollectionAdmin(ModelAdmin):
         "creator",
         "name",
         "status",
+        "count_items",
         "date_created",
     )
+    list_select_related = ["creator"]
     ordering = ("-date_created",)
     readonly_fields = (
+        "count_items",
         "date_created",
         "date_last_modified",
     )
@@ -365,7 +382,7 @@ class AttachmentInline(admin.StackedInline):
 class JobAdmin(ModelAdmin):
     inlines = (AttachmentInline,)
     search_fields = ["creator__id", "creator__username"]
-    list_filter = ["status", "type"]
+    list_filter = ["status", "type", "profile"]
     show_facets = admin.ShowFacets.ALWAYS
     search_help_text = "Search by creator id (numeric) or username"
     list_display = (
@@ -377,6 +394,29 @@ class JobAdmin(ModelAdmin):
         "status",
         "attachment",
     )
+    list_select_related = ["creator", "attachment"]
+    readonly_fields = ("profile_hot_functions",)
+
+    @admin.display(description="Hot functions")
+    def profile_hot_functions(self, obj: Job) -> str:
+        samples = read_job_profile(obj)
+        if not samples:
+            return "-"
+        total = sum(samples.values())
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+            (
+                (name, own, f"{own / total:.1%}", f"{cumulative / total:.1%}")
+                for name, own, cumulative in get_hot_functions(samples)
+            ),
+        )
+        return format_html(
+            "<table><tr><th>function</th><th>samples</th><th>self</th>"
+            "<th>total</th></tr>{}</table>{} samples",
+            rows,
+            total,
+        )
 
 
 admin.site.unregister(User)
@@ -7,11 +7,14 @@ class ImpressoConfig(AppConfig):
 
     def ready(self):
         # we import the signal handler inside the ready() method to avoid import issues
+        from django.db.backends.signals import connection_created
         from django.db.models.signals import post_migrate, post_save, m2m_changed
         from impresso.models import UserBitmap
         from django.contrib.auth.models import User
+        from .utils.db import record_connection_created
         from .signals import (
             create_default_groups,
+            post_save_special_membership_dataset,
             post_save_user_change_plan_request,
             post_save_user_special_membership_request,
         )
@@ -26,3 +29,8 @@ class ImpressoConfig(AppConfig):
             post_save_user_special_membership_request,
             sender="impresso.UserSpecialMembershipRequest",
         )
+        post_save.connect(
+            post_save_special_membership_dataset,
+            sender="impresso.SpecialMembershipDataset",
+        )
+        connection_created.connect(record_connection_created)
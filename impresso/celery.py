@@ -1,7 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import setup_logging, task_postrun, worker_process_shutdown
 import pymysql
 
 # use pymysql isntead of MysQLdb
@@ -35,3 +35,19 @@ def use_django_logging(**kwargs):
     from django.utils.log import configure_logging
 
     configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+
+
+@task_postrun.connect
+def write_metrics_textfile(**kwargs):
+    # workers have no /metrics/ endpoint: export through the textfile
+    # collector, throttled by IMPRESSO_METRICS_TEXTFILE_INTERVAL.
+    from impresso.utils.metrics import write_metrics_textfile_on_task_postrun
+
+    write_metrics_textfile_on_task_postrun(**kwargs)
+
+
+@worker_process_shutdown.connect
+def remove_metrics_textfile(**kwargs):
+    from impresso.utils.metrics import remove_metrics_textfile_on_process_shutdown
+
+    remove_metrics_textfile_on_process_shutdown(**kwargs)
@@ -0,0 +1,133 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from impresso.models import CollectableItem, Collection
+from impresso.solr import get_facet_counts
+from impresso.utils.models.collection import reconcile_collection_count_items
+
+
+class Command(BaseCommand):
+    """
+    Audit the item counts of all collections at once, instead of running
+    `checkcollection` for each of them: one Solr facet request on ucoll_ss
+    (the number of tagged articles per collection), one GROUP BY on
+    collectable_items and one pass over Collection.count_items.
+
+    Flags:
+    - solr drift: the articles index and the db disagree on the number of items;
+    - cached drift: count_items differs from the number of items in the db;
+    - orphans: collection ids tagged in Solr that do not exist in the db.
+
+    Use --fix-counts to reconcile count_items and --enqueue-repairs to queue a
+    `reconcile_collection` celery task (reconcilecollection --repair solr)
+    for each collection with solr drift and for each orphan.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py auditcollections
+    ENV=dev pipenv run ./manage.py auditcollections --fix-counts --enqueue-repairs
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Audit all collection counts with one Solr facet request and one SQL GROUP BY"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--max-report",
+            type=int,
+            default=50,
+            help="Maximum number of collections listed per kind of drift, 0 for all (default: 50)",
+        )
+        parser.add_argument(
+            "--fix-counts",
+            action="store_true",
+            help="Set count_items to the number of items in the db where it drifted",
+        )
+        parser.add_argument(
+            "--enqueue-repairs",
+            action="store_true",
+            help="Queue a reconcile_collection task per drifted or orphan collection",
+        )
+
+    def _report(self, kind: str, lines: list[str], max_report: int) -> None:
+        self.stdout.write(f"  - {kind}: {len(lines)}")
+        for line in lines if not max_report else lines[:max_report]:
+            self.stdout.write(f"    {line}")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        max_report: int = max(0, options["max_report"])
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Audit collection counts{self.ANSI_RESET}\n"
+            f"  - Solr: {settings.IMPRESSO_SOLR_URL_SELECT}\n"
+        )
+        solr_counts = get_facet_counts(
+            field="ucoll_ss", url=settings.IMPRESSO_SOLR_URL_SELECT
+        )
+        db_counts = dict(
+            CollectableItem.objects.order_by()
+            .values("collection_id")
+            .annotate(total=Count("id"))
+            .values_list("collection_id", "total")
+        )
+
+        solr_drift: list[str] = []
+        solr_drift_lines: list[str] = []
+        cached_drift: list[str] = []
+        cached_drift_lines: list[str] = []
+        collections = 0
+        for pk, count_items in (
+            Collection.objects.order_by("pk").values_list("pk", "count_items").iterator()
+        ):
+            collections += 1
+            db_count = db_counts.get(pk, 0)
+            solr_count = solr_counts.pop(pk, 0)
+            if solr_count != db_count:
+                solr_drift.append(pk)
+                solr_drift_lines.append(f"{pk}: db={db_count} solr={solr_count}")
+            if count_items != db_count:
+                cached_drift.append(pk)
+                cached_drift_lines.append(
+                    f"{pk}: count_items={count_items} db={db_count}"
+                )
+        # what is left in the facet are ids without a collection in the db
+        orphans = sorted(solr_counts)
+
+        self.stdout.write(f"  - Collections: {collections}")
+        self._report("Solr drift", solr_drift_lines, max_report)
+        self._report("Cached count drift", cached_drift_lines, max_report)
+        self._report(
+            "Orphans in Solr",
+            [f"{pk}: solr={solr_counts[pk]}" for pk in orphans],
+            max_report,
+        )
+
+        fixed = 0
+        if options["fix_counts"] and cached_drift:
+            fixed = reconcile_collection_count_items(collection_ids=cached_drift)
+        enqueued = 0
+        if options["enqueue_repairs"]:
+            # imported here: loading the tasks loads celery
+            from impresso.tasks.collection_tasks import reconcile_collection
+
+            for collection_id in solr_drift + orphans:
+                reconcile_collection.delay(collection_id=collection_id, repair="solr")
+                enqueued += 1
+
+        drift = len(solr_drift) + len(cached_drift) + len(orphans)
+        color = self.ANSI_YELLOW if drift else self.ANSI_GREEN
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Drift: {color}{drift}{self.ANSI_RESET}\n"
+            f"  - Counts fixed: {fixed}\n"
+            f"  - Repairs enqueued: {enqueued}\n"
+            "Done."
+        )
@@ -0,0 +1,107 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from impresso.utils.db import get_connection_stats, reset_connection_stats
+
+
+class Command(BaseCommand):
+    """
+    Simulate request (or celery task) cycles running a single query and
+    compare opening a new connection every cycle (CONN_MAX_AGE=0) with
+    persistent connections (CONN_MAX_AGE > 0, health checks enabled).
+    Run it against the MySQL database, through the SOCKS proxy if configured,
+    to see the cost of the handshakes.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py benchmarkdbconnections
+    ENV=dev pipenv run ./manage.py benchmarkdbconnections --iterations 500 --max-age 300
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Benchmark connection churn vs persistent database connections"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of request cycles per mode (default: 200)",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=60,
+            help="CONN_MAX_AGE of the persistent mode, in seconds (default: 60)",
+        )
+        parser.add_argument(
+            "--database",
+            type=str,
+            default=DEFAULT_DB_ALIAS,
+            help=f"Database alias (default: {DEFAULT_DB_ALIAS})",
+        )
+
+    def _run_cycles(
+        self, alias: str, max_age: int, iterations: int
+    ) -> tuple[float, dict[str, float]]:
+        connection = connections[alias]
+        original_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+        reset_connection_stats()
+        try:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                # what request_started / request_finished and celery's task
+                # prerun / postrun handlers do around each unit of work
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                connection.close_if_unusable_or_obsolete()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = original_max_age
+        return elapsed_ms / iterations, get_connection_stats()
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        iterations: int = max(1, options["iterations"])
+        max_age: int = options["max_age"]
+        alias: str = options["database"]
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Database Connection Benchmark{self.ANSI_RESET}\n"
+            f"  - Database: {self.ANSI_BOLD}{alias}{self.ANSI_RESET}"
+            f" ({connections[alias].vendor})\n"
+            f"  - Iterations: {self.ANSI_BOLD}{iterations}{self.ANSI_RESET}\n"
+        )
+        results = {}
+        for label, mode_max_age in (("Reconnect", 0), ("Persistent", max_age)):
+            ms_per_cycle, stats = self._run_cycles(alias, mode_max_age, iterations)
+            results[label] = ms_per_cycle
+            color = self.ANSI_YELLOW if mode_max_age == 0 else self.ANSI_GREEN
+            self.stdout.write(
+                f"  - Mode: {label} (CONN_MAX_AGE={mode_max_age})\n"
+                f"    Time: {color}{ms_per_cycle:.3f} ms/cycle{self.ANSI_RESET}\n"
+                f"    Connections opened: {int(stats.get('connections_opened', 0))}\n"
+                f"    Proxied connections opened: "
+                f"{int(stats.get('proxied_connections_opened', 0))}\n"
+            )
+
+        speedup = (
+            results["Reconnect"] / results["Persistent"] if results["Persistent"] else 0
+        )
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Speedup: {speedup:.1f}x\n"
+            "Done."
+        )
@@ -0,0 +1,159 @@
+import time
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
+
+from impresso.models import SpecialMembershipDataset, UserSpecialMembershipRequest
+from impresso.utils.tasks.email import DEFAULT_TEMPLATE_DIR
+
+
+class Command(BaseCommand):
+    """
+    Report per-email render time for each template in templates/emails, as
+    sent (`render_to_string`, through Django's cached template loader), and
+    with the compiled templates held by the caller: the difference is the
+    most a template registry on top of the cached loader could save.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py benchmarkemailtemplates
+    ENV=dev pipenv run ./manage.py benchmarkemailtemplates pending_requests_summary_to_reviewer --iterations 500
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Benchmark email template rendering, cached loader vs held templates"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "prefixes",
+            nargs="*",
+            type=str,
+            help="Optional template prefixes to benchmark (default: all of them)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Number of emails rendered per template (default: 200)",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=3,
+            help="Number of pending request rows in reviewer templates (default: 3)",
+        )
+
+    def _get_templates_dir(self) -> Path:
+        return Path(__file__).resolve().parents[2] / "templates" / DEFAULT_TEMPLATE_DIR
+
+    def _get_context(self, rows: int) -> dict[str, Any]:
+        # unsaved instances are enough for rendering, nothing touches the db
+        now = timezone.now()
+        user = User(
+            username="benchmark-user",
+            first_name="Bench",
+            last_name="Mark",
+            email="benchmark@example.com",
+        )
+        reviewer = User(username="benchmark-reviewer", email="reviewer@example.com")
+        dataset = SpecialMembershipDataset(
+            title="Benchmark Dataset", bitmap_position=63, reviewer=reviewer
+        )
+        requests = []
+        for idx in range(rows):
+            request = UserSpecialMembershipRequest(
+                pk=idx + 1,
+                user=user,
+                reviewer=reviewer,
+                subscription=dataset,
+                notes="Please grant access for my research project " * 3,
+                date_created=now,
+                date_last_modified=now,
+            )
+            request.days_waiting = idx
+            requests.append(request)
+        return {
+            "user": user,
+            "reviewer": reviewer,
+            "key": "benchmark-activation-key",
+            "token": "benchmark-token",
+            "plan_label": settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER_LABEL,
+            "plan_to_name": settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER_LABEL,
+            "current_plan_name": settings.IMPRESSO_GROUP_USER_PLAN_BASIC_LABEL,
+            "from_email": settings.DEFAULT_FROM_EMAIL,
+            "impresso_base_url": settings.IMPRESSO_BASE_URL,
+            "user_special_membership_request": requests[0] if requests else None,
+            "latest_requests": requests,
+            "count_latest_requests": len(requests),
+            "total_count": len(requests),
+            "status_label": "Approved",
+            "settings": settings,
+        }
+
+    def _time_per_email(self, render, iterations: int) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        return (time.perf_counter() - start) * 1000 / iterations
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        iterations: int = max(1, options["iterations"])
+        rows: int = options["rows"]
+        templates_dir = self._get_templates_dir()
+        prefixes = options["prefixes"] or sorted(
+            {p.stem for p in templates_dir.glob("*.txt")}
+        )
+        context = self._get_context(rows=rows)
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Email Template Rendering Benchmark{self.ANSI_RESET}\n"
+            f"  - Templates: {self.ANSI_BOLD}{len(prefixes)}{self.ANSI_RESET}\n"
+            f"  - Iterations: {self.ANSI_BOLD}{iterations}{self.ANSI_RESET}\n"
+            f"  - Rows: {self.ANSI_BOLD}{rows}{self.ANSI_RESET}\n"
+        )
+
+        total_loader = 0.0
+        total_held = 0.0
+        for prefix in prefixes:
+            names = [
+                f"{DEFAULT_TEMPLATE_DIR}/{prefix}.txt",
+                f"{DEFAULT_TEMPLATE_DIR}/{prefix}.html",
+            ]
+            templates = [get_template(name) for name in names]
+
+            def render_loader() -> None:
+                # what send_templated_email_with_context does
+                for name in names:
+                    render_to_string(name, context)
+
+            def render_held() -> None:
+                for template in templates:
+                    template.render(context)
+
+            loader_ms = self._time_per_email(render_loader, iterations)
+            held_ms = self._time_per_email(render_held, iterations)
+            total_loader += loader_ms
+            total_held += held_ms
+            ratio = loader_ms / held_ms if held_ms else 0
+            self.stdout.write(
+                f"  - Template: {prefix}\n"
+                f"    Cached loader: {self.ANSI_YELLOW}{loader_ms:.3f} ms/email{self.ANSI_RESET}\n"
+                f"    Held templates: {self.ANSI_GREEN}{held_ms:.3f} ms/email{self.ANSI_RESET}\n"
+                f"    Ratio: {ratio:.2f}x\n"
+            )
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Cached loader total: {total_loader:.3f} ms/email\n"
+            f"  - Held templates total: {total_held:.3f} ms/email\n"
+        )
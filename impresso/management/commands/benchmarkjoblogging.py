@@ -0,0 +1,158 @@
+import io
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand
+from pythonjsonlogger.json import JsonFormatter
+
+from impresso.prod_log_config import JSON_LOG_FORMAT
+from impresso.utils.joblog import JobLogger
+
+COLLECTION_ID = "local-benchmark-collection"
+
+
+def make_page(docs: int, collections: int) -> dict[str, Any]:
+    """
+    A Solr response of TR passages as read by remove_collection_from_tr_passages.
+    """
+    return {
+        "numFound": docs * 10,
+        "start": 0,
+        "docs": [
+            {
+                "id": f"tr-passage-{i:08d}",
+                "ci_id_s": f"GDL-1900-01-01-a-i{i:04d}",
+                "_version_": 1800000000000000000 + i,
+                "ucoll_ss": [COLLECTION_ID]
+                + [f"local-user-{j:04d}" for j in range(collections - 1)],
+            }
+            for i in range(docs)
+        ],
+    }
+
+
+@dataclass
+class PagesResult:
+    ms_per_page: float
+    kb_per_page: float
+
+
+def eager_page(logger: logging.Logger, response: dict[str, Any]) -> None:
+    # the logging of a page before impresso.utils.joblog
+    logger.info(f"[job:1 user:1] {response}")
+    todos = []
+    for doc in response["docs"]:
+        logger.info(doc["ucoll_ss"])
+        todos.append({"id": doc["id"], "ucoll_ss": {"set": doc["ucoll_ss"][1:]}})
+    logger.info(f"[job:1 user:1] n. Solr updates needed in text_reuse: {len(todos)}")
+
+
+def joblogger_page(logger: logging.Logger, response: dict[str, Any]) -> None:
+    log = JobLogger(logger, job_id=1, user_id=1)
+    todos = []
+    for doc in response["docs"]:
+        log.sample("passage", "passage %s ucoll_ss=%s", doc["id"], doc["ucoll_ss"])
+        todos.append({"id": doc["id"], "ucoll_ss": {"set": doc["ucoll_ss"][1:]}})
+    log.summary("remove_collection_from_tr_passages", updates=len(todos))
+
+
+class Command(BaseCommand):
+    """
+    Compare the logging of a page of TR passages before and after
+    impresso.utils.joblog (lazy formatting, sampled per-item messages, capped
+    payloads, one summary per page), through the JSON formatter used in
+    production, at INFO level.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py benchmarkjoblogging
+    ENV=dev pipenv run ./manage.py benchmarkjoblogging --docs 1000 --pages 50
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Benchmark eager vs lazy, sampled logging of job pages"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--docs",
+            type=int,
+            default=100,
+            help="Documents per page (default: 100)",
+        )
+        parser.add_argument(
+            "--collections",
+            type=int,
+            default=5,
+            help="Collections per document (default: 5)",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=100,
+            help="Number of pages per mode (default: 100)",
+        )
+
+    def _run_pages(
+        self,
+        page: Callable[[logging.Logger, dict[str, Any]], None],
+        response: dict[str, Any],
+        pages: int,
+    ) -> PagesResult:
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter(JSON_LOG_FORMAT))
+        logger = logging.getLogger(f"impresso.benchmark.{page.__name__}")
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        try:
+            start = time.perf_counter()
+            for _ in range(pages):
+                page(logger, response)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        finally:
+            logger.handlers = []
+        return PagesResult(
+            ms_per_page=elapsed_ms / pages,
+            kb_per_page=len(stream.getvalue()) / 1024 / pages,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        pages: int = max(1, options["pages"])
+        response = make_page(max(1, options["docs"]), max(1, options["collections"]))
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Job Logging Benchmark{self.ANSI_RESET}\n"
+            f"  - Documents per page: {self.ANSI_BOLD}{len(response['docs'])}"
+            f"{self.ANSI_RESET}\n"
+            f"  - Pages: {self.ANSI_BOLD}{pages}{self.ANSI_RESET}\n"
+        )
+        results: dict[str, PagesResult] = {}
+        for label, page, color in (
+            ("Eager", eager_page, self.ANSI_YELLOW),
+            ("JobLogger", joblogger_page, self.ANSI_GREEN),
+        ):
+            result = results[label] = self._run_pages(page, response, pages)
+            self.stdout.write(
+                f"  - Mode: {label}\n"
+                f"    Time: {color}{result.ms_per_page:.3f} ms/page"
+                f"{self.ANSI_RESET}\n"
+                f"    Log volume: {result.kb_per_page:.1f} KB/page\n"
+            )
+
+        eager, joblogger = results["Eager"], results["JobLogger"]
+        speedup = (
+            eager.ms_per_page / joblogger.ms_per_page if joblogger.ms_per_page else 0
+        )
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Speedup: {speedup:.1f}x\n"
+            "Done."
+        )
@@ -0,0 +1,162 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_COMMANDS = ["sendreviewreminder", "rebuildbitmaps", "checksystemhealth"]
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """
+    Parse the output of `python -X importtime` into cumulative import times.
+
+    Args:
+        stderr (str): the stderr of the process, one line per imported module,
+            e.g. "import time:       123 |       4567 | impresso.tasks"
+
+    Returns:
+        dict[str, int]: cumulative import time in microseconds by module name.
+    """
+    cumulative: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1])
+        except ValueError:
+            # the header line: "self [us] | cumulative | imported package"
+            continue
+        cumulative[parts[2].strip()] = cumulative_us
+    return cumulative
+
+
+class Command(BaseCommand):
+    """
+    Measure the startup time of management commands, i.e. the time needed to
+    run `manage.py <command> --help` in a fresh interpreter, and fail if the
+    median exceeds the budget. The slowest top level imports are reported,
+    as measured with `python -X importtime`.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py benchmarkstartup
+    ENV=dev pipenv run ./manage.py benchmarkstartup sendreviewreminder --runs 10 --budget-ms 600
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+    ANSI_RED = "\033[31m"
+
+    help = "Benchmark management command startup time against a budget"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "commands",
+            nargs="*",
+            type=str,
+            help=f"Commands to benchmark (default: {', '.join(DEFAULT_COMMANDS)})",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Number of runs per command (default: 5)",
+        )
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            default=settings.IMPRESSO_CLI_STARTUP_BUDGET_MS,
+            help=(
+                "Maximum median startup time in milliseconds "
+                f"(default: IMPRESSO_CLI_STARTUP_BUDGET_MS={settings.IMPRESSO_CLI_STARTUP_BUDGET_MS})"
+            ),
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=5,
+            help="Number of slowest impresso imports to report (default: 5)",
+        )
+
+    def _run_once(self, command: str) -> tuple[float, str]:
+        manage_py = os.path.join(settings.BASE_DIR, "manage.py")
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", manage_py, command, "--help"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if completed.returncode != 0:
+            raise CommandError(
+                f"`manage.py {command} --help` exited with {completed.returncode}"
+            )
+        return elapsed_ms, completed.stderr
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        commands: list[str] = options["commands"] or DEFAULT_COMMANDS
+        runs: int = max(1, options["runs"])
+        budget_ms: float = options["budget_ms"]
+        top: int = options["top"]
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Management Command Startup Benchmark{self.ANSI_RESET}\n"
+            f"  - Commands: {self.ANSI_BOLD}{len(commands)}{self.ANSI_RESET}\n"
+            f"  - Runs: {self.ANSI_BOLD}{runs}{self.ANSI_RESET}\n"
+            f"  - Budget: {self.ANSI_BOLD}{budget_ms:.0f} ms{self.ANSI_RESET}\n"
+        )
+
+        over_budget = []
+        for command in commands:
+            timings = []
+            stderr = ""
+            for _ in range(runs):
+                elapsed_ms, stderr = self._run_once(command)
+                timings.append(elapsed_ms)
+            median_ms = statistics.median(timings)
+            color = self.ANSI_GREEN if median_ms <= budget_ms else self.ANSI_RED
+            if median_ms > budget_ms:
+                over_budget.append(command)
+            # only the last run is parsed, import times do not vary much
+            slowest = sorted(
+                (
+                    (name, us)
+                    for name, us in parse_importtime(stderr).items()
+                    if name.startswith("impresso.")
+                ),
+                key=lambda item: item[1],
+                reverse=True,
+            )[:top]
+            self.stdout.write(
+                f"  - Command: {command}\n"
+                f"    Median: {color}{median_ms:.0f} ms{self.ANSI_RESET}"
+                f" (min {min(timings):.0f} ms, max {max(timings):.0f} ms)\n"
+            )
+            for name, us in slowest:
+                self.stdout.write(
+                    f"    {self.ANSI_YELLOW}{us / 1000:8.1f} ms{self.ANSI_RESET} {name}\n"
+                )
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Within budget: {len(commands) - len(over_budget)}\n"
+            f"  - Over budget: {len(over_budget)}\n"
+        )
+        if over_budget:
+            raise CommandError(
+                f"Startup time over the {budget_ms:.0f} ms budget for: "
+                f"{', '.join(over_budget)}"
+            )
+        self.stdout.write("Done.")
@@ -0,0 +1,144 @@
+import math
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from impresso.solr import find_all, iter_all
+from impresso.utils.tasks.textreuse import get_tr_passages_join_query
+
+
+class Command(BaseCommand):
+    """
+    Compare, for a collection, the two ways of selecting the TR passages of
+    its content items, read-only:
+    - id lists: page through the tagged content items and OR their ids into
+      `ci_id_s:` clauses against the passages core, page by page (the
+      current approach of `add_tr_passages_query_results_to_collection`);
+    - join: a single cross-core `{!join fromIndex=...}` query streamed with a
+      cursorMark (settings.IMPRESSO_SOLR_TR_JOIN).
+
+    Usage:
+    ENV=dev pipenv run ./manage.py benchmarktrpassages local-user-abc
+    ENV=dev pipenv run ./manage.py benchmarktrpassages local-user-abc --chunk-size 500
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Benchmark the selection of TR passages with id lists vs a cross-core join"
+    # Solr requests per strategy, largest id list query: reset by handle()
+    requests: dict[str, int]
+    max_clauses: int
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("collection_id", type=str)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Content items per id list and passages per request (default: 100)",
+        )
+
+    def _count_cursor_requests(self, key: str, docs: int, chunk_size: int) -> None:
+        # with a cursorMark, a last request returns no documents
+        self.requests[key] += math.ceil(docs / chunk_size) + 1
+
+    def _select_with_id_lists(self, collection_id: str, chunk_size: int) -> set[str]:
+        passages: set[str] = set()
+        items_ids: list[str] = []
+        articles = 0
+        for doc in iter_all(
+            q=f'ucoll_ss:"{collection_id}"',
+            url=settings.IMPRESSO_SOLR_URL_SELECT,
+            fl="id",
+            rows=chunk_size,
+        ):
+            articles += 1
+            items_ids.append(doc["id"])
+            if len(items_ids) >= chunk_size:
+                passages.update(self._find_passages(items_ids, chunk_size))
+                items_ids = []
+        if items_ids:
+            passages.update(self._find_passages(items_ids, chunk_size))
+        self._count_cursor_requests("id_lists", articles, chunk_size)
+        return passages
+
+    def _find_passages(self, items_ids: list[str], chunk_size: int) -> list[str]:
+        query = " OR ".join(f"ci_id_s:{item_id}" for item_id in items_ids)
+        self.max_clauses = max(self.max_clauses, len(items_ids))
+        ids: list[str] = []
+        skip = 0
+        while True:
+            res = find_all(
+                q=query,
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                fl="id",
+                skip=skip,
+                limit=chunk_size,
+                sort="id asc",
+            )
+            self.requests["id_lists"] += 1
+            ids.extend(doc["id"] for doc in res["response"]["docs"])
+            skip += chunk_size
+            if skip >= res["response"]["numFound"]:
+                return ids
+
+    def _select_with_join(self, collection_id: str, chunk_size: int) -> set[str]:
+        passages = {
+            doc["id"]
+            for doc in iter_all(
+                q=get_tr_passages_join_query(collection_id),
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                fl="id",
+                rows=chunk_size,
+            )
+        }
+        self._count_cursor_requests("join", len(passages), chunk_size)
+        return passages
+
+    def handle(self, collection_id: str, *args: Any, **options: Any) -> None:
+        chunk_size: int = max(1, options["chunk_size"])
+        self.requests = {"id_lists": 0, "join": 0}
+        self.max_clauses = 0
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}TR passages selection benchmark{self.ANSI_RESET}\n"
+            f"  - Collection: {self.ANSI_BOLD}{collection_id}{self.ANSI_RESET}\n"
+            f"  - Join: {get_tr_passages_join_query(collection_id)}\n"
+            f"  - Chunk size: {chunk_size}\n"
+        )
+        results = {}
+        for label, key, select in (
+            ("Id lists", "id_lists", self._select_with_id_lists),
+            ("Join", "join", self._select_with_join),
+        ):
+            start = time.perf_counter()
+            passages = select(collection_id, chunk_size)
+            elapsed = time.perf_counter() - start
+            results[key] = (elapsed, passages)
+            color = self.ANSI_YELLOW if key == "id_lists" else self.ANSI_GREEN
+            self.stdout.write(
+                f"  - Mode: {label}\n"
+                f"    Time: {color}{elapsed:.3f} s{self.ANSI_RESET}\n"
+                f"    Passages: {len(passages)}"
+                f" ({len(passages) / elapsed if elapsed else 0:.0f}/s)\n"
+                f"    Solr requests: {self.requests[key]}\n"
+            )
+
+        (id_lists_time, id_lists), (join_time, join) = (
+            results["id_lists"],
+            results["join"],
+        )
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Max clauses per id list query: {self.max_clauses}\n"
+            f"  - Same passages: {'yes' if id_lists == join else 'no'}\n"
+            f"  - Speedup: {id_lists_time / join_time if join_time else 0:.1f}x\n"
+            "Done."
+        )
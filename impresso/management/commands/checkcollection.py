@@ -56,6 +56,14 @@ class Command(BaseCommand):
             self.stdout.write(
                 f"   (db)CollectableItem.count()={total_content_items_found_in_db} \n"
             )
+            if collection.count_items != total_content_items_found_in_db:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"   WARNING: cached count_items ({collection.count_items}) "
+                        f"drifted from the db ({total_content_items_found_in_db}), "
+                        "it is fixed by the reconcile-collection-count-items periodic task."
+                    )
+                )
 
             # 1. check content items TAGGED WITH collection_uid
             ci_url = settings.IMPRESSO_SOLR_URL_SELECT
@@ -78,14 +86,16 @@ class Command(BaseCommand):
                         f"do not match with Solr index ({ci_num_found}) for collection {collection_id}!"
                     )
                 )
-                break
-
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"   OK content items in db ({total_content_items_found_in_db}) "
-                    f"match with Solr index ({ci_num_found}) for collection {collection_id}."
+                self.stdout.write(
+                    f"   run `reconcilecollection {collection_id}` to list the differing items.\n"
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"   OK content items in db ({total_content_items_found_in_db}) "
+                        f"match with Solr index ({ci_num_found}) for collection {collection_id}."
+                    )
                 )
-            )
 
             # self.stdout.write(f" - responseHeader={ci_response_header}")
             # 2. check in TR passages
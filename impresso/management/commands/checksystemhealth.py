@@ -20,13 +20,6 @@ def test_proxy_connection(proxy_host, proxy_port):
         return False
 
 
-# Test your proxy first
-if test_proxy_connection("localhost", 1080):
-    print("Proxy is reachable")
-else:
-    print("Cannot reach proxy")
-
-
 def query_solr_through_proxy(url, proxy_host, proxy_port, params, auth=None):
     host = re.match(r"https?://([^:/]+)", url).group(0)
     path = re.match(r"https?://[^/]+(/.*)", url).group(1)
@@ -53,6 +46,12 @@ class Command(BaseCommand):
     help = "Check SOLR connectivity"
 
     def handle(self, *args, **options):
+        # Test your proxy first (not at import time: no network I/O on startup)
+        if test_proxy_connection("localhost", 1080):
+            self.stdout.write("Proxy is reachable")
+        else:
+            self.stdout.write("Cannot reach proxy")
+
         self.stdout.write("Checking Database connectivity...")
         with connection.cursor() as cursor:
             cursor.execute("SELECT DATABASE()")
@@ -1,4 +1,6 @@
+from datetime import timedelta
 from typing import Any
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from impresso.models import UserSpecialMembershipRequest
@@ -18,16 +20,51 @@ class Command(BaseCommand):
             action="store_true",
             help="Run the command without making any actual changes to the database.",
         )
+        parser.add_argument(
+            "--expiring-within-hours",
+            type=float,
+            default=None,
+            help=(
+                "Only list the temporary memberships that expire (or have expired) "
+                "within the next N hours."
+            ),
+        )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help=(
+                "Revoke expired memberships in a single task, sending revocation "
+                "emails in batches over one SMTP connection."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.IMPRESSO_EMAIL_BATCH_SIZE,
+            help=(
+                "Number of emails per batch when --batch is used "
+                f"(default: {settings.IMPRESSO_EMAIL_BATCH_SIZE})."
+            ),
+        )
 
     def handle(self, *args: Any, **options: Any) -> None:
         dry_run = options.get("dry_run", False)
+        batch = options.get("batch", False)
+        batch_size = options.get("batch_size", settings.IMPRESSO_EMAIL_BATCH_SIZE)
+        expiring_within_hours = options.get("expiring_within_hours")
 
         if dry_run:
             self.stdout.write(self.style.NOTICE("Running in DRY RUN mode."))
 
         requests = UserSpecialMembershipRequest.objects.filter(
             status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY
-        )
+        ).select_related("user", "subscription")
+        if expiring_within_hours is not None:
+            # range scan on the (status, revoke_at) index
+            requests = requests.filter(
+                revoke_at__lte=timezone.now()
+                + timedelta(hours=expiring_within_hours)
+            ).order_by("revoke_at")
 
         count = requests.count()
         self.stdout.write(self.style.SUCCESS(f"Found {count} special memberships with temporary approval."))
@@ -54,7 +91,12 @@ class Command(BaseCommand):
             )
             return
 
-        async_result = revoke_expired_temporary_memberships.delay()
+        if batch:
+            async_result = revoke_expired_temporary_memberships.delay(
+                batch=True, batch_size=batch_size
+            )
+        else:
+            async_result = revoke_expired_temporary_memberships.delay()
         self.stdout.write(
             self.style.SUCCESS(
                 f"Enqueued revoke_expired_temporary_memberships task (id={async_result.id})."
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from ...utils.bitmask import BitMask64, is_access_allowed
+from ...utils.bitmask import BitMask, is_access_allowed
 from impresso.solr import find_all
 
 ci_fields_to_display = [
@@ -35,7 +35,7 @@ class Command(BaseCommand):
         self.stdout.write(f"Get user with username: {username}")
         user = User.objects.get(username=username)
         self.stdout.write(f"User: pk={user.id} \033[34m{user.username}\033[0m")
-        user_bitmask = BitMask64(user.bitmap.bitmap)
+        user_bitmask = BitMask(user.bitmap.bitmap)
         self.stdout.write(f"Get content item with id: {contentItemId}")
         solr_response_data = find_all(
             q=f"id:{contentItemId}",
@@ -59,14 +59,14 @@ class Command(BaseCommand):
             "rights_bm_get_img_l",
         ]
 
-        self.stdout.write(f"user BitMask64:\n \033[34m{str(user_bitmask)}\033[0m")
+        self.stdout.write(f"user BitMask:\n \033[34m{str(user_bitmask)}\033[0m")
 
         for key in rights_keys:
-            content_bitmask = BitMask64(content_item.get(key))
+            content_bitmask = BitMask(content_item.get(key))
             access_allowed = is_access_allowed(user_bitmask, content_bitmask)
 
             self.stdout.write(
-                f"\ncontent \033[1m{key}\033[0m BitMask64:\n \033[34m{str(content_bitmask)}\033[0m"
+                f"\ncontent \033[1m{key}\033[0m BitMask:\n \033[34m{str(content_bitmask)}\033[0m"
             )
             self.stdout.write(
                 f" int value (check):\n {encode_bitmap_str2int_solr_b2(str(content_bitmask)[::-1])}"
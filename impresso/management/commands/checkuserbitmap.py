@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from impresso.models import UserBitmap
 from impresso.models import SpecialMembershipDataset
-from ...utils.bitmask import BitMask64
+from ...utils.bitmask import BitMask
 
 
 class Command(BaseCommand):
@@ -22,10 +22,10 @@ class Command(BaseCommand):
         self.stdout.write(f"User groups: \n \033[34m{groups_list}\033[0m")
         # print out its related user bitmap. If no one, just create it.
 
-        user_bitmask = BitMask64(user.bitmap.bitmap)
+        user_bitmask = BitMask(user.bitmap.bitmap)
 
         # print user_bitmap binary as sequence of 0 and 1
-        self.stdout.write(f"user BitMask64: \033[34m{str(user_bitmask)}\033[0m")
+        self.stdout.write(f"user BitMask: \033[34m{str(user_bitmask)}\033[0m")
         # # get the total number of bits
         # self.stdout.write(f"user bitmap length: \033[34m{user_bitmap_length}\033[0m")
 
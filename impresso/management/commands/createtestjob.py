@@ -9,15 +9,21 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('user_id', type=str)
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Run the job under the sampling profiler (see Job.profile)',
+        )
 
-    def handle(self, user_id, *args, **options):
+    def handle(self, user_id, *args, profile=False, **options):
         user = User.objects.get(pk=user_id)
 
         self.stdout.write('\n\n--- start ---')
         self.stdout.write('user id: "%s"' % user.pk)
         self.stdout.write('user uid: "%s"' % user.profile.uid)
+        self.stdout.write('profile: %s' % profile)
 
-        test.delay(user_id=user.pk)
+        test.delay(user_id=user.pk, profile=profile)
 
         self.stdout.write('"test" task launched, check celery.')
         self.stdout.write('---- end ----\n\n')
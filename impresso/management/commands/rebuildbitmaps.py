@@ -0,0 +1,146 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+
+from impresso.models import UserBitmap
+from impresso.utils.bitmask import int_to_bytes
+from impresso.utils.models.userBitmap import compute_user_bitmaps
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the bitmap of every user with a few set-based queries, e.g. after a
+    SpecialMembershipDataset.bitmap_position migration.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py rebuildbitmaps --dry-run
+    ENV=dev pipenv run ./manage.py rebuildbitmaps --chunk-size 500
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_CYAN = "\033[36m"
+    ANSI_YELLOW = "\033[33m"
+    ANSI_GREEN = "\033[32m"
+
+    help = "Rebuild all user bitmaps in bulk, with a dry-run diff"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show the bitmaps that would change without saving them.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of bitmaps written per bulk_update (default: 1000).",
+        )
+        parser.add_argument(
+            "--max-diff",
+            type=int,
+            default=50,
+            help="Maximum number of changed bitmaps listed in the output (default: 50).",
+        )
+
+    def _format_record_block(
+        self, user_bitmap: UserBitmap, saved: int, expected: int
+    ) -> str:
+        return (
+            f"  - User: {user_bitmap.user.username} (pk={user_bitmap.user_id})\n"
+            f"    Saved: {bin(saved)}\n"
+            f"    Expected: {bin(expected)}\n"
+            f"    Difference: {bin(saved ^ expected)}\n"
+        )
+
+    def _write_section(self, title: str, color: str, records: list[str]) -> None:
+        self.stdout.write(
+            f"\n{color}{self.ANSI_BOLD}{title}{self.ANSI_RESET}\n"
+            f"{color}{'-' * len(title)}{self.ANSI_RESET}\n"
+        )
+        if not records:
+            self.stdout.write("  (none)\n")
+            return
+        for record in records:
+            self.stdout.write(record)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        dry_run: bool = options["dry_run"]
+        chunk_size: int = max(1, options["chunk_size"])
+        max_diff: int = options["max_diff"]
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}User Bitmap Rebuild{self.ANSI_RESET}\n"
+            f"  - Dry run: {self.ANSI_BOLD}{dry_run}{self.ANSI_RESET}\n"
+            f"  - Chunk size: {self.ANSI_BOLD}{chunk_size}{self.ANSI_RESET}\n"
+        )
+
+        started_at = time.perf_counter()
+        expected_bitmaps = compute_user_bitmaps()
+        users_without_bitmap = User.objects.filter(bitmap__isnull=True).count()
+
+        changed: list[UserBitmap] = []
+        diff_blocks: list[str] = []
+        for user_bitmap in UserBitmap.objects.select_related("user").only(
+            "pk", "bitmap", "user__username"
+        ):
+            saved = user_bitmap.get_bitmap_as_int() if user_bitmap.bitmap else 0
+            expected = expected_bitmaps.get(user_bitmap.pk, saved)
+            if saved == expected:
+                continue
+            if len(diff_blocks) < max_diff:
+                diff_blocks.append(
+                    self._format_record_block(user_bitmap, saved, expected)
+                )
+            user_bitmap.bitmap = int_to_bytes(expected)
+            changed.append(user_bitmap)
+        computed_in = time.perf_counter() - started_at
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Bitmaps: {len(expected_bitmaps)}\n"
+            f"  - Changed: {self.ANSI_YELLOW}{len(changed)}{self.ANSI_RESET}\n"
+            f"  - Unchanged: {self.ANSI_GREEN}{len(expected_bitmaps) - len(changed)}{self.ANSI_RESET}\n"
+            f"  - Users without bitmap: {users_without_bitmap}\n"
+            f"  - Computed in: {computed_in:.2f}s "
+            f"({len(expected_bitmaps) / computed_in if computed_in else 0:.0f} users/s)\n"
+        )
+        if len(changed) > len(diff_blocks):
+            diff_blocks.append(
+                f"  ... and {len(changed) - len(diff_blocks)} more, "
+                "use --max-diff to list them.\n"
+            )
+        self._write_section("Changed", self.ANSI_YELLOW, diff_blocks)
+
+        if dry_run:
+            self.stdout.write(
+                self.style.NOTICE(
+                    f"\nDry run completed: {len(changed)} bitmaps need to be rebuilt."
+                )
+            )
+            return
+
+        written = 0
+        started_at = time.perf_counter()
+        for start in range(0, len(changed), chunk_size):
+            chunk = changed[start : start + chunk_size]
+            UserBitmap.objects.bulk_update(chunk, ["bitmap"])
+            written += len(chunk)
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(
+                f"  - Progress: {written}/{len(changed)} bitmaps saved "
+                f"({written / elapsed if elapsed else 0:.0f} users/s)\n"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nRebuilt {written} user bitmaps.")
+        )
+        self.stdout.write(
+            f"\n{self.ANSI_CYAN}{self.ANSI_BOLD}Done.{self.ANSI_RESET}"
+            " Bitmap rebuild completed.\n"
+        )
@@ -0,0 +1,298 @@
+from collections import Counter, defaultdict
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from impresso.models import CollectableItem, Collection
+from impresso.solr import iter_all
+from impresso.utils.models.collection import (
+    add_collectable_items,
+    iter_collectable_item_ids,
+    merge_sorted_ids,
+    remove_collectable_items,
+)
+
+MISSING_IN_ARTICLES = "missing_in_articles"
+EXTRA_IN_ARTICLES = "extra_in_articles"
+MISSING_IN_TR = "missing_in_tr"
+EXTRA_IN_TR = "extra_in_tr"
+
+REPAIR_SOLR = "solr"
+REPAIR_DB = "db"
+
+
+def escape_solr_id(item_id: str) -> str:
+    # TR passage ids contain ":" and "/", see utils.tasks.textreuse
+    return item_id.replace(":", "\\:").replace("/", "\\/")
+
+
+class Command(BaseCommand):
+    """
+    Compare the items of collections in the db (CollectableItem) with the
+    documents tagged with the collection (ucoll_ss) in the articles and in the
+    TR passages Solr indexes, and list the ids that differ.
+
+    The three sources are streamed sorted by id (keyset pagination in the db,
+    cursorMark in Solr) and merge-joined in a single pass, in constant memory,
+    so collections with millions of items can be checked. TR passages are
+    compared by content item id (ci_id_s): passages of collected items not
+    tagged with the collection are missing, tagged passages of content items
+    not in the collection are extra.
+
+    With --repair solr, Solr is fixed to match the db; with --repair db, the db
+    is fixed to match the articles index (TR passages are only repaired with
+    --repair solr). Fixes are applied in batches while streaming. Ids of
+    collections missing from the db (orphans found by `auditcollections`) are
+    accepted with --repair solr: their tagged documents are untagged.
+
+    Usage:
+    ENV=dev pipenv run ./manage.py reconcilecollection local-user-abc
+    ENV=dev pipenv run ./manage.py reconcilecollection local-user-abc --repair solr --batch-size 200
+    ENV=dev pipenv run ./manage.py reconcilecollection local-user-abc local-user-def --skip-tr --max-report 0
+    """
+
+    ANSI_RESET = "\033[0m"
+    ANSI_BOLD = "\033[1m"
+    ANSI_GREEN = "\033[32m"
+    ANSI_YELLOW = "\033[33m"
+
+    help = "Stream and merge collection items from the db and Solr, list (and repair) differences"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("collection_ids", nargs="+", type=str)
+        parser.add_argument(
+            "--repair",
+            choices=[REPAIR_SOLR, REPAIR_DB],
+            help="Fix Solr to match the db (solr) or the db to match Solr (db)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of ids fetched per db query or Solr request (default: 5000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of ids fixed per repair batch (default: 200)",
+        )
+        parser.add_argument(
+            "--max-report",
+            type=int,
+            default=20,
+            help="Maximum number of ids listed per kind of difference, 0 for all (default: 20)",
+        )
+        parser.add_argument(
+            "--skip-tr",
+            action="store_true",
+            help="Do not check the TR passages index",
+        )
+
+    def _iter_article_ids(self, collection_id: str, chunk_size: int) -> Iterator[str]:
+        for doc in iter_all(
+            q=f"ucoll_ss:{collection_id}",
+            url=settings.IMPRESSO_SOLR_URL_SELECT,
+            fl="id",
+            sort="id asc",
+            rows=chunk_size,
+        ):
+            yield doc["id"]
+
+    def _iter_tr_ci_ids(self, collection_id: str, chunk_size: int) -> Iterator[str]:
+        # several passages per content item: merge_sorted_ids skips duplicates
+        for doc in iter_all(
+            q=f"ucoll_ss:{collection_id}",
+            url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+            fl="id,ci_id_s",
+            sort="ci_id_s asc,id asc",
+            rows=chunk_size,
+        ):
+            yield doc["ci_id_s"]
+
+    def _find_tr_passage_ids(
+        self, collection_id: str, ci_ids: list[str], tagged: bool
+    ) -> list[tuple[str, str]]:
+        """
+        Return (ci_id_s, id) of the TR passages of the given content items,
+        tagged or not with the collection.
+        """
+        ci_filter = " OR ".join(f'"{ci_id}"' for ci_id in ci_ids)
+        collection_filter = f"ucoll_ss:{collection_id}"
+        return [
+            (doc["ci_id_s"], doc["id"])
+            for doc in iter_all(
+                q=collection_filter if tagged else "*:*",
+                fq=(
+                    f"ci_id_s:({ci_filter})"
+                    if tagged
+                    else f"ci_id_s:({ci_filter}) AND -{collection_filter}"
+                ),
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                fl="id,ci_id_s",
+            )
+        ]
+
+    def _repair(self, collection: Collection, kind: str, ids: list[str]) -> None:
+        if self.repair == REPAIR_SOLR:
+            if kind == MISSING_IN_ARTICLES:
+                collection.add_items_to_index(items_ids=ids)
+            elif kind == EXTRA_IN_ARTICLES:
+                collection.remove_items_from_index(items_ids=ids)
+            elif kind == MISSING_IN_TR:
+                collection.add_items_to_index(
+                    items_ids=[escape_solr_id(i) for i in ids],
+                    solr_url_select=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                    solr_url_update=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+                )
+            elif kind == EXTRA_IN_TR:
+                passage_ids = [
+                    passage_id
+                    for _, passage_id in self._find_tr_passage_ids(
+                        collection.pk, ids, tagged=True
+                    )
+                ]
+                collection.remove_items_from_index(
+                    items_ids=[escape_solr_id(i) for i in passage_ids],
+                    solr_url_select=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                    solr_url_update=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+                )
+        elif self.repair == REPAIR_DB:
+            if kind == MISSING_IN_ARTICLES:
+                remove_collectable_items(collection.pk, ids)
+            elif kind == EXTRA_IN_ARTICLES:
+                add_collectable_items(
+                    collection.pk,
+                    [
+                        CollectableItem(
+                            item_id=item_id,
+                            content_type=CollectableItem.ARTICLE,
+                            collection_id=collection.pk,
+                        )
+                        for item_id in ids
+                    ],
+                )
+        self.repaired[kind] += len(ids)
+
+    def _found(self, collection: Collection, kind: str, item_id: str) -> None:
+        self.counters[kind] += 1
+        if not self.max_report or self.counters[kind] <= self.max_report:
+            self.stdout.write(f"    - {kind}: {item_id}")
+        if self.repair == REPAIR_DB and kind in (MISSING_IN_TR, EXTRA_IN_TR):
+            return
+        if self.repair:
+            self.to_repair[kind].append(item_id)
+            if len(self.to_repair[kind]) >= self.batch_size:
+                self._repair(collection, kind, self.to_repair.pop(kind))
+
+    def _check_tr_candidates(self, collection: Collection, ci_ids: list[str]) -> None:
+        for _, passage_id in self._find_tr_passage_ids(
+            collection.pk, ci_ids, tagged=False
+        ):
+            self._found(collection, MISSING_IN_TR, passage_id)
+
+    def _reconcile(self, collection: Collection, chunk_size: int, check_tr: bool):
+        streams = [
+            iter_collectable_item_ids(collection.pk, chunk_size=chunk_size),
+            self._iter_article_ids(collection.pk, chunk_size),
+        ]
+        if check_tr:
+            streams.append(self._iter_tr_ci_ids(collection.pk, chunk_size))
+        tr_candidates: list[str] = []
+        for item_id, presence in merge_sorted_ids(*streams):
+            in_db, in_articles = presence[0], presence[1]
+            self.counters["db"] += in_db
+            self.counters["articles"] += in_articles
+            if in_db and not in_articles:
+                self._found(collection, MISSING_IN_ARTICLES, item_id)
+            elif in_articles and not in_db:
+                self._found(collection, EXTRA_IN_ARTICLES, item_id)
+            if not check_tr:
+                continue
+            in_tr = presence[2]
+            if in_tr and not in_db:
+                self._found(collection, EXTRA_IN_TR, item_id)
+            elif in_db and not in_tr:
+                # most content items have no passages: check them in batches
+                tr_candidates.append(item_id)
+                if len(tr_candidates) >= self.batch_size:
+                    self._check_tr_candidates(collection, tr_candidates)
+                    tr_candidates = []
+        if tr_candidates:
+            self._check_tr_candidates(collection, tr_candidates)
+        for kind, ids in list(self.to_repair.items()):
+            if ids:
+                self._repair(collection, kind, ids)
+        self.to_repair.clear()
+
+    def handle(self, collection_ids: list[str], *args: Any, **options: Any) -> None:
+        self.repair = options["repair"]
+        self.batch_size = max(1, options["batch_size"])
+        self.max_report = max(0, options["max_report"])
+        chunk_size = max(1, options["chunk_size"])
+        check_tr = not options["skip_tr"]
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Reconcile collections in db and Solr{self.ANSI_RESET}\n"
+            f"  - Collections: {self.ANSI_BOLD}{len(collection_ids)}{self.ANSI_RESET}\n"
+            f"  - Repair: {self.ANSI_BOLD}{self.repair or 'no'}{self.ANSI_RESET}\n"
+            f"  - TR passages: {self.ANSI_BOLD}{'yes' if check_tr else 'no'}{self.ANSI_RESET}\n"
+        )
+        totals: Counter = Counter()
+        for collection_id in collection_ids:
+            try:
+                collection = Collection.objects.get(pk=collection_id)
+            except Collection.DoesNotExist:
+                if self.repair == REPAIR_DB:
+                    self.stdout.write(
+                        f"  - Collection: {collection_id} "
+                        f"{self.ANSI_YELLOW}does not exist, skipped{self.ANSI_RESET}\n"
+                    )
+                    continue
+                # orphan id in Solr: all its tagged documents are extra.
+                # The unsaved instance is only used to untag them.
+                collection = Collection(pk=collection_id, name="does not exist")
+            self.counters: Counter = Counter()
+            self.repaired: Counter = Counter()
+            self.to_repair: dict[str, list[str]] = defaultdict(list)
+            self.stdout.write(f"  - Collection: {collection.pk} ({collection.name})")
+            try:
+                self._reconcile(collection, chunk_size=chunk_size, check_tr=check_tr)
+            except ValueError as e:
+                raise CommandError(
+                    f"Collection {collection.pk}: cannot merge unsorted ids, {e}"
+                )
+            differences = sum(
+                self.counters[kind]
+                for kind in (
+                    MISSING_IN_ARTICLES,
+                    EXTRA_IN_ARTICLES,
+                    MISSING_IN_TR,
+                    EXTRA_IN_TR,
+                )
+            )
+            color = self.ANSI_YELLOW if differences else self.ANSI_GREEN
+            self.stdout.write(
+                f"    Items in db: {self.counters['db']}\n"
+                f"    Items in articles index: {self.counters['articles']}\n"
+                f"    Missing in articles index: {self.counters[MISSING_IN_ARTICLES]}\n"
+                f"    Extra in articles index: {self.counters[EXTRA_IN_ARTICLES]}\n"
+                f"    Missing TR passages: {self.counters[MISSING_IN_TR]}\n"
+                f"    Extra TR content items: {self.counters[EXTRA_IN_TR]}\n"
+                f"    Differences: {color}{differences}{self.ANSI_RESET}\n"
+                f"    Repaired: {sum(self.repaired.values())}\n"
+            )
+            totals["collections"] += 1
+            totals["differences"] += differences
+            totals["repaired"] += sum(self.repaired.values())
+
+        self.stdout.write(
+            "\n"
+            f"{self.ANSI_BOLD}Summary{self.ANSI_RESET}\n"
+            f"  - Collections checked: {totals['collections']}\n"
+            f"  - Differences: {totals['differences']}\n"
+            f"  - Repaired: {totals['repaired']}\n"
+            "Done."
+        )
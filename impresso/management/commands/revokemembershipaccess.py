@@ -1,13 +1,19 @@
-from datetime import timedelta
-from typing import Any
+import json
+from datetime import datetime
+from typing import Any, Iterator
 from urllib.parse import urljoin
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db.models import QuerySet
 from django.urls import reverse
 from django.utils import timezone
 
-from impresso.models import UserSpecialMembershipRequest
+from impresso.models import SpecialMembershipDataset, UserSpecialMembershipRequest
+from impresso.utils.tasks.email import EmailDispatcher
+from impresso.utils.tasks.userSpecialMembershipRequest import (
+    revoke_special_membership_requests_in_batch,
+)
 
 
 class Command(BaseCommand):
@@ -18,6 +24,9 @@ class Command(BaseCommand):
     ANSI_GREEN = "\033[32m"
     ANSI_RED = "\033[31m"
 
+    ADMIN_URL_PLACEHOLDER = "__request_id__"
+    DEFAULT_CHUNK_SIZE = 2000
+
     help = (
         "Check approved special memberships and revoke access when the related "
         "dataset revokeAfterDays threshold has elapsed."
@@ -29,15 +38,109 @@ class Command(BaseCommand):
             action="store_true",
             help="Run the command without making any actual changes to the database.",
         )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help=(
+                "Revoke inline and send revocation emails in batches over a single "
+                "SMTP connection, instead of one Celery task per request."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.IMPRESSO_EMAIL_BATCH_SIZE,
+            help=(
+                "Number of emails per batch when --batch is used "
+                f"(default: {settings.IMPRESSO_EMAIL_BATCH_SIZE})."
+            ),
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help=(
+                "Stream the requests from the database and write one JSON object "
+                "per line (JSON lines) instead of the human readable report. "
+                "Revocations are always done in bulk in this mode."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=self.DEFAULT_CHUNK_SIZE,
+            help=(
+                "Number of requests fetched (and revoked) at once when --stream "
+                f"is used (default: {self.DEFAULT_CHUNK_SIZE})."
+            ),
+        )
 
-    def _get_admin_change_url(self, request_id: int) -> str:
+    def _get_admin_change_url_template(self) -> str:
+        # reverse() once, then substitute the request id for each record
         admin_path = reverse(
-            "admin:impresso_userspecialmembershiprequest_change", args=[request_id]
+            "admin:impresso_userspecialmembershiprequest_change",
+            args=[self.ADMIN_URL_PLACEHOLDER],
         )
         return urljoin(
             f"{settings.IMPRESSO_BASE_URL.rstrip('/')}/", admin_path.lstrip("/")
         )
 
+    def _get_admin_change_url(self, request_id: int) -> str:
+        return self.admin_change_url_template.replace(
+            self.ADMIN_URL_PLACEHOLDER, str(request_id)
+        )
+
+    def _get_revoke_after_days_by_dataset(self) -> dict[int, float]:
+        """
+        The revokeAfterDays of each dataset, read once for the report; the
+        revocation itself only relies on the stored, indexed `revoke_at`.
+        """
+        revoke_after_days_by_dataset: dict[int, float] = {}
+        for dataset in SpecialMembershipDataset.objects.only("pk", "metadata"):
+            revoke_after_days = dataset.resolve_revoke_after_days(default_days=None)
+            if revoke_after_days is not None:
+                revoke_after_days_by_dataset[dataset.pk] = revoke_after_days
+        return revoke_after_days_by_dataset
+
+    def _iter_jsonl_records(
+        self,
+        requests: QuerySet[UserSpecialMembershipRequest],
+        revoke_after_days_by_dataset: dict[int, float],
+        now: datetime,
+        chunk_size: int,
+    ) -> Iterator[dict[str, Any]]:
+        for (
+            pk,
+            user_id,
+            username,
+            subscription_id,
+            dataset_title,
+            revoke_at,
+        ) in requests.values_list(
+            "pk",
+            "user_id",
+            "user__username",
+            "subscription_id",
+            "subscription__title",
+            "revoke_at",
+        ).order_by("pk").iterator(chunk_size=chunk_size):
+            if revoke_at is None:
+                state = "non_revokable"
+            elif revoke_at <= now:
+                state = "revocation_needed"
+            else:
+                state = "active"
+            yield {
+                "event": "record",
+                "request_id": pk,
+                "user_id": user_id,
+                "username": username,
+                "dataset": dataset_title,
+                "state": state,
+                "revoke_after_days": revoke_after_days_by_dataset.get(subscription_id),
+                "revoke_at": revoke_at.isoformat() if revoke_at else None,
+                "admin_url": self._get_admin_change_url(pk),
+            }
+
     def _format_record_block(
         self,
         req: UserSpecialMembershipRequest,
@@ -64,14 +167,85 @@ class Command(BaseCommand):
         for record in records:
             self.stdout.write(record)
 
+    def _handle_stream(
+        self, dry_run: bool, batch_size: int, chunk_size: int, now: datetime
+    ) -> None:
+        """
+        JSON lines report, suitable for cron: one "record" object per approved
+        request, then one "summary" object. Only the ids of the requests to
+        revoke are kept in memory; they are revoked in bulk, chunk by chunk.
+        The expiry comes from the stored `revoke_at` column.
+        """
+        revoke_after_days_by_dataset = self._get_revoke_after_days_by_dataset()
+        requests = UserSpecialMembershipRequest.objects.filter(
+            status=UserSpecialMembershipRequest.STATUS_APPROVED
+        )
+        counts = {"revocation_needed": 0, "active": 0, "non_revokable": 0}
+        revokable_ids: list[int] = []
+        for record in self._iter_jsonl_records(
+            requests=requests,
+            revoke_after_days_by_dataset=revoke_after_days_by_dataset,
+            now=now,
+            chunk_size=chunk_size,
+        ):
+            counts[record["state"]] += 1
+            if record["state"] == "revocation_needed":
+                revokable_ids.append(record["request_id"])
+            self.stdout.write(json.dumps(record, ensure_ascii=True))
+
+        revoked = 0
+        emails_sent = 0
+        emails_failed = 0
+        if not dry_run and revokable_ids:
+            with EmailDispatcher(batch_size=batch_size) as dispatcher:
+                for i in range(0, len(revokable_ids), chunk_size):
+                    revoked += revoke_special_membership_requests_in_batch(
+                        requests=UserSpecialMembershipRequest.objects.filter(
+                            pk__in=revokable_ids[i : i + chunk_size],
+                            status=UserSpecialMembershipRequest.STATUS_APPROVED,
+                        )
+                        .select_related("user", "reviewer", "subscription__reviewer")
+                        .prefetch_related("user__groups"),
+                        dispatcher=dispatcher,
+                        batch_size=chunk_size,
+                    )
+            emails_sent = dispatcher.sent
+            emails_failed = dispatcher.failed
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "event": "summary",
+                    "date": now.isoformat(),
+                    "dry_run": dry_run,
+                    **counts,
+                    "revoked": revoked,
+                    "emails_sent": emails_sent,
+                    "emails_failed": emails_failed,
+                },
+                ensure_ascii=True,
+            )
+        )
+
     def handle(self, *args: Any, **options: Any) -> None:
         dry_run = options.get("dry_run", False)
+        batch = options.get("batch", False)
+        batch_size = options.get("batch_size", settings.IMPRESSO_EMAIL_BATCH_SIZE)
+        chunk_size = options.get("chunk_size", self.DEFAULT_CHUNK_SIZE)
         now = timezone.now()
+        self.admin_change_url_template = self._get_admin_change_url_template()
+
+        if options.get("stream", False):
+            self._handle_stream(
+                dry_run=dry_run, batch_size=batch_size, chunk_size=chunk_size, now=now
+            )
+            return
 
         self.stdout.write(
             "\n"
             f"{self.ANSI_BOLD}Special Membership Revocation Audit{self.ANSI_RESET}\n"
             f"  - Dry run: {self.ANSI_BOLD}{dry_run}{self.ANSI_RESET}\n"
+            f"  - Batch: {self.ANSI_BOLD}{batch}{self.ANSI_RESET}\n"
             f"  - Base URL: {self.ANSI_BOLD}{settings.IMPRESSO_BASE_URL}{self.ANSI_RESET}\n"
         )
 
@@ -102,8 +276,9 @@ class Command(BaseCommand):
                 if req.subscription
                 else None
             )
+            revoke_at = req.revoke_at
 
-            if revoke_after_days is None:
+            if revoke_at is None:
                 non_revokable_blocks.append(
                     self._format_record_block(
                         req=req,
@@ -117,7 +292,6 @@ class Command(BaseCommand):
                 )
                 continue
 
-            revoke_at = req.date_created + timedelta(days=revoke_after_days)
             if revoke_at <= now:
                 revokable_requests.append(req)
                 revocation_needed_blocks.append(
@@ -179,9 +353,19 @@ class Command(BaseCommand):
             )
             return
 
-        for req in revokable_requests:
-            req.status = UserSpecialMembershipRequest.STATUS_REVOKED
-            req.save()
+        if batch:
+            with EmailDispatcher(batch_size=batch_size) as dispatcher:
+                revoke_special_membership_requests_in_batch(
+                    requests=revokable_requests, dispatcher=dispatcher
+                )
+            self.stdout.write(
+                f"Batch emails: {dispatcher.sent} sent, {dispatcher.failed} failed "
+                f"in {dispatcher.batches} batch(es)."
+            )
+        else:
+            for req in revokable_requests:
+                req.status = UserSpecialMembershipRequest.STATUS_REVOKED
+                req.save()
 
         self.stdout.write(
             self.style.SUCCESS(
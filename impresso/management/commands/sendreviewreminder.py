@@ -3,12 +3,14 @@ from typing import Any, Dict, List, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db.models import Q, QuerySet
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from impresso.models import UserSpecialMembershipRequest
 from impresso.utils.tasks.email import (
+    EmailDispatcher,
     get_emails_rendered_contents,
     send_templated_email_with_context,
 )
@@ -26,6 +28,8 @@ class Command(BaseCommand):
     ENV=dev pipenv run ./manage.py sendreviewreminder summary
     ENV=dev pipenv run ./manage.py sendreviewreminder gentle-reminder --days 14
     ENV=dev pipenv run ./manage.py sendreviewreminder summary john.doe --dry-run
+    ENV=dev pipenv run ./manage.py sendreviewreminder summary --batch --batch-size 25
+    ENV=dev pipenv run ./manage.py sendreviewreminder summary --created-after 2026-01-31T00:00:00+00:00
     """
 
     MODE_SUMMARY = "summary"
@@ -58,6 +62,15 @@ class Command(BaseCommand):
                 "(default: 7)"
             ),
         )
+        parser.add_argument(
+            "--created-after",
+            type=str,
+            default=None,
+            help=(
+                "Only notify reviewers having pending requests created after this "
+                "ISO 8601 date (e.g. the previous run)"
+            ),
+        )
         parser.add_argument(
             "--dry-run",
             action="store_true",
@@ -75,6 +88,23 @@ class Command(BaseCommand):
             default="txt",
             help="Select preview output format when --preview is used (default: txt)",
         )
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help=(
+                "Send emails in batches over a single SMTP connection instead of "
+                "one connection per email"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.IMPRESSO_EMAIL_BATCH_SIZE,
+            help=(
+                "Number of emails per batch when --batch is used "
+                f"(default: {settings.IMPRESSO_EMAIL_BATCH_SIZE})"
+            ),
+        )
 
     def handle(
         self,
@@ -87,6 +117,17 @@ class Command(BaseCommand):
         dry_run: bool = options.get("dry_run", False)
         preview: bool = options.get("preview", False)
         preview_mode: str = options.get("preview_mode", "txt")
+        batch: bool = options.get("batch", False)
+        batch_size: int = options.get("batch_size", settings.IMPRESSO_EMAIL_BATCH_SIZE)
+        created_after_str: Optional[str] = options.get("created_after")
+
+        created_after = None
+        if created_after_str:
+            created_after = parse_datetime(created_after_str)
+            if created_after is None:
+                raise CommandError(
+                    f"Invalid --created-after date: {created_after_str!r}"
+                )
 
         cutoff_date = None
         if mode == self.MODE_GENTLE_REMINDER:
@@ -96,7 +137,8 @@ class Command(BaseCommand):
             self.style.HTTP_INFO("\nRunning sendreviewreminder command with:\n")
             + self.style.SUCCESS(
                 f"mode={mode}, days={days_threshold}, dry_run={dry_run}, "
-                f"preview={preview}, preview_mode={preview_mode}, username={username}\n"
+                f"preview={preview}, preview_mode={preview_mode}, username={username}, "
+                f"batch={batch}, created_after={created_after_str}\n"
             )
         )
 
@@ -116,7 +158,9 @@ class Command(BaseCommand):
                 )
             )
 
-        reviewers = self._get_reviewers(username=username, cutoff_date=cutoff_date)
+        reviewers = self._get_reviewers(
+            username=username, cutoff_date=cutoff_date, created_after=created_after
+        )
 
         if not reviewers:
             self.stdout.write(
@@ -128,23 +172,42 @@ class Command(BaseCommand):
 
         self.stdout.write(f"\nFound {len(reviewers)} reviewer(s) to process\n")
 
+        dispatcher: Optional[EmailDispatcher] = None
+        if batch and not dry_run and not preview:
+            dispatcher = EmailDispatcher(batch_size=batch_size)
+            dispatcher.open()
+
         total_emails_sent = 0
-        for idx, reviewer in enumerate(reviewers, start=1):
+        try:
+            for idx, reviewer in enumerate(reviewers, start=1):
+                self.stdout.write(
+                    f"\n{idx} of {len(reviewers)} - Reviewer: <{reviewer.email}> "
+                    f"(username: {reviewer.username})"
+                )
+                self.stdout.write(f"\n{'-' * 80}")
+                sent = self._process_reviewer(
+                    reviewer=reviewer,
+                    mode=mode,
+                    cutoff_date=cutoff_date,
+                    created_after=created_after,
+                    dry_run=dry_run,
+                    preview=preview,
+                    preview_mode=preview_mode,
+                    dispatcher=dispatcher,
+                )
+                if sent:
+                    total_emails_sent += 1
+        finally:
+            if dispatcher is not None:
+                dispatcher.flush()
+                dispatcher.close()
+
+        if dispatcher is not None:
             self.stdout.write(
-                f"\n{idx} of {len(reviewers)} - Reviewer: <{reviewer.email}> "
-                f"(username: {reviewer.username})"
-            )
-            self.stdout.write(f"\n{'-' * 80}")
-            sent = self._process_reviewer(
-                reviewer=reviewer,
-                mode=mode,
-                cutoff_date=cutoff_date,
-                dry_run=dry_run,
-                preview=preview,
-                preview_mode=preview_mode,
+                f"\nBatch sending: {dispatcher.batches} batch(es), "
+                f"{dispatcher.sent} sent, {dispatcher.failed} failed"
             )
-            if sent:
-                total_emails_sent += 1
+            total_emails_sent = dispatcher.sent
 
         if dry_run:
             self.stdout.write(
@@ -170,6 +233,7 @@ class Command(BaseCommand):
         self,
         username: Optional[str],
         cutoff_date,
+        created_after=None,
     ) -> List[User]:
         if username:
             try:
@@ -192,6 +256,11 @@ class Command(BaseCommand):
             dataset_query[
                 "reviewed_datasets__userspecialmembershiprequest__date_last_modified__lt"
             ] = cutoff_date
+        if created_after is not None:
+            direct_query["review__date_created__gt"] = created_after
+            dataset_query[
+                "reviewed_datasets__userspecialmembershiprequest__date_created__gt"
+            ] = created_after
 
         direct_reviewers = User.objects.filter(**direct_query).distinct()
         dataset_reviewers = User.objects.filter(**dataset_query).distinct()
@@ -209,6 +278,8 @@ class Command(BaseCommand):
         dry_run: bool,
         preview: bool,
         preview_mode: str,
+        dispatcher: Optional[EmailDispatcher] = None,
+        created_after=None,
     ) -> bool:
         if not reviewer.email:
             self.stdout.write(
@@ -223,9 +294,11 @@ class Command(BaseCommand):
                 status=UserSpecialMembershipRequest.STATUS_PENDING,
             )
             .filter(Q(reviewer=reviewer) | Q(subscription__reviewer=reviewer))
-            .select_related("user", "reviewer", "subscription")
+            .select_related("user__profile", "reviewer", "subscription")
         )
 
+        if created_after is not None:
+            pending_requests = pending_requests.filter(date_created__gt=created_after)
         if cutoff_date is not None:
             pending_requests = pending_requests.filter(
                 date_last_modified__lt=cutoff_date
@@ -297,6 +370,7 @@ class Command(BaseCommand):
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 to=[reviewer.email],
                 context=context,
+                dispatcher=dispatcher,
             )
         except Exception as exc:
             self.stdout.write(
@@ -304,6 +378,12 @@ class Command(BaseCommand):
             )
             return False
 
+        if success and dispatcher is not None:
+            self.stdout.write(
+                self.style.SUCCESS(f"Reminder email queued for {reviewer.email}")
+            )
+            return True
+
         if success:
             self.stdout.write(
                 self.style.SUCCESS(f"Reminder email sent to {reviewer.email}")
@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from impresso.models.userBitmap import UserBitmap
 from impresso.tests.utils.tasks.email import User
 from impresso.models import SpecialMembershipDataset
-from impresso.utils.bitmask import BitMask64
+from impresso.utils.bitmask import BitMask
 
 
 class Command(BaseCommand):
@@ -131,7 +131,7 @@ class Command(BaseCommand):
             userBitmap, created = UserBitmap.objects.get_or_create(
                 user=user,
             )
-            user_bitmask = BitMask64(
+            user_bitmask = BitMask(
                 userBitmap.get_up_to_date_bitmap(ignore_accepted_terms=True)
             )
 
@@ -152,7 +152,7 @@ class Command(BaseCommand):
 
             userBitmap.save()
             userBitmap.refresh_from_db()
-            user_bitmask = BitMask64(
+            user_bitmask = BitMask(
                 userBitmap.get_up_to_date_bitmap(ignore_accepted_terms=True)
             )
             self.stdout.write(
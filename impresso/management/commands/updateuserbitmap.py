@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from impresso.tasks import update_user_bitmap_task
-from impresso.utils.bitmask import BitMask64
+from impresso.utils.bitmask import BitMask
 
 
 class Command(BaseCommand):
@@ -23,11 +23,11 @@ class Command(BaseCommand):
         self.stdout.write(f"User: pk={user.id} \033[34m{user.username}\033[0m")
         # currrent user bitmap
         user_current_bitmap = user.bitmap.bitmap
-        user_bitmask = BitMask64(user.bitmap.bitmap)
+        user_bitmask = BitMask(user.bitmap.bitmap)
 
         self.stdout.write(f"user SAVED bitmap():\n  \033[34m{str(user_bitmask)}\033[0m")
         user_expected_bitmap = user.bitmap.get_up_to_date_bitmap()
-        user_expected_bitmask = BitMask64(user_expected_bitmap)
+        user_expected_bitmask = BitMask(user_expected_bitmap)
         self.stdout.write(
             f"user EXPECTED get_up_to_date_bitmap():\n  \033[34m{str(user_expected_bitmask)}\033[0m"
         )
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from numbers import Real
+
+from django.db import migrations, models
+
+
+def backfill_revoke_at(apps, _schema_editor):
+    UserSpecialMembershipRequest = apps.get_model(
+        "impresso", "UserSpecialMembershipRequest"
+    )
+    SpecialMembershipDataset = apps.get_model("impresso", "SpecialMembershipDataset")
+
+    UserSpecialMembershipRequest.objects.filter(status="temporary").update(
+        revoke_at=models.F("temporary_expires_at")
+    )
+    # one UPDATE per dataset having a valid revokeAfterDays
+    for dataset in SpecialMembershipDataset.objects.all():
+        revoke_after_days = (dataset.metadata or {}).get("revokeAfterDays")
+        if not isinstance(revoke_after_days, Real) or revoke_after_days <= 0:
+            continue
+        UserSpecialMembershipRequest.objects.filter(
+            subscription=dataset, status="approved"
+        ).update(
+            revoke_at=models.F("date_created")
+            + timedelta(days=float(revoke_after_days))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("impresso", "0063_alter_specialmembershipdataset_bitmap_position"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userspecialmembershiprequest",
+            name="revoke_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When the access must be revoked: temporary_expires_at for temporary approvals, date_created + revokeAfterDays for approved requests",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="userspecialmembershiprequest",
+            index=models.Index(
+                fields=["status", "revoke_at"], name="impresso_userrequest_revoke"
+            ),
+        ),
+        migrations.RunPython(backfill_revoke_at, migrations.RunPython.noop),
+    ]
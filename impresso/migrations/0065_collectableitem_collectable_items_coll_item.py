@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("impresso", "0064_userspecialmembershiprequest_revoke_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="collectableitem",
+            index=models.Index(
+                fields=["collection", "item_id"], name="collectable_items_coll_item"
+            ),
+        ),
+    ]
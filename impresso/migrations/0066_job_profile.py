@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+import impresso.models.job
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("impresso", "0065_collectableitem_collectable_items_coll_item"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="profile",
+            field=models.BooleanField(
+                default=False,
+                help_text="Run the tasks of the job under the sampling profiler",
+            ),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="profile_output",
+            field=models.FileField(
+                blank=True,
+                help_text="Samples of the profiled tasks, in the folded stacks format (flamegraph.pl, speedscope)",
+                upload_to=impresso.models.job.job_profile_path,
+            ),
+        ),
+    ]
@@ -32,3 +32,9 @@ class CollectableItem(models.Model):
     class Meta:
         db_table = 'collectable_items'
         unique_together = ("item_id", "collection")
+        indexes = [
+            # keyset pagination of the items of a collection, sorted by item_id
+            models.Index(
+                fields=["collection", "item_id"], name="collectable_items_coll_item"
+            ),
+        ]
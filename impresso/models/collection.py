@@ -1,14 +1,17 @@
 import json
 import logging
-import requests
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.conf import settings
 from . import Bucket
-from ..solr import find_all
 
 default_logger = logging.getLogger(__name__)
 
+# `requests` and the Solr helpers are imported in the functions using them:
+# models are loaded by every management command.
+
 
 def get_indexed_items(
     items_ids=[],
@@ -19,6 +22,8 @@ def get_indexed_items(
     solr_auth=settings.IMPRESSO_SOLR_AUTH,
     logger=default_logger,
 ):
+    import requests
+
     rows = len(items_ids) if limit is None else limit
     res = requests.post(
         solr_url,
@@ -55,6 +60,7 @@ def set_indexed_items(
     solr_auth=settings.IMPRESSO_SOLR_AUTH_WRITE,
     logger=default_logger,
 ):
+    import requests
 
     res = requests.post(
         solr_url,
@@ -198,7 +204,15 @@ class Collection(Bucket):
             "todos": todos,
         }
 
-    def remove_items_from_index(self, items_ids=[], logger=None):
+    def remove_items_from_index(
+        self,
+        items_ids=[],
+        logger=None,
+        solr_url_select=settings.IMPRESSO_SOLR_URL_SELECT,
+        solr_url_update=settings.IMPRESSO_SOLR_URL_UPDATE,
+        solr_auth_select=settings.IMPRESSO_SOLR_AUTH,
+        solr_auth_update=settings.IMPRESSO_SOLR_AUTH_WRITE,
+    ):
         """
         Remove selected items_ids from this collection
         """
@@ -217,7 +231,9 @@ class Collection(Bucket):
                     self.pk, len(items_ids)
                 )
             )
-        docs = get_indexed_items(items_ids)
+        docs = get_indexed_items(
+            items_ids, solr_url=solr_url_select, solr_auth=solr_auth_select
+        )
         todos = []
         for doc in docs:
             # get list of collection in ucoll_ss field
@@ -245,7 +261,9 @@ class Collection(Bucket):
                 )
             return
 
-        contents = set_indexed_items(todos=todos)
+        contents = set_indexed_items(
+            todos=todos, solr_url=solr_url_update, solr_auth=solr_auth_update
+        )
         if logger:
             logger.info(
                 "Collection {} remove_items_from_index SUCCESS for {} items ({} docs updated)!".format(
@@ -258,16 +276,38 @@ class Collection(Bucket):
         print(contents)
 
     def update_count_items(self, logger=default_logger):
+        """
+        Set count_items to the number of documents tagged with this collection
+        in Solr. Full count: day to day, count_items is maintained by
+        `increment_count_items` and reconciled with the db periodically.
+        """
         logger.info(f"Collection(pk:{self.pk}).update_count_items ...")
+        from ..solr import find_all
+
         ci_request = find_all(q=f"ucoll_ss:{self.pk}", fl="id", skip=0, limit=0)
 
         count_items = ci_request["response"]["numFound"]
         logger.info(f"Collection(pk:{self.pk}).count_items = {count_items}")
 
         self.count_items = count_items
-        self.save()
+        self.save(update_fields=["count_items"])
         return count_items
 
+    @classmethod
+    def increment_count_items(cls, collection_id: str, delta: int) -> int:
+        """
+        Add `delta` (negative when items are removed) to count_items in a single
+        UPDATE, without reading the collection; the count never goes below 0.
+
+        Returns:
+            int: The number of updated collections, 0 or 1.
+        """
+        if not delta:
+            return 0
+        return cls.objects.filter(pk=collection_id).update(
+            count_items=Greatest(F("count_items") + delta, Value(0))
+        )
+
     class Meta(Bucket.Meta):
         db_table = "collections"
         verbose_name_plural = "collections"
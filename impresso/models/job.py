@@ -3,6 +3,11 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
+def job_profile_path(instance, filename):
+    # file will be uploaded to MEDIA_ROOT/profiles/user_<id>/<filename>
+    return "profiles/user_{0}/{1}".format(instance.creator_id, filename)
+
+
 class Job(models.Model):
     BULK_COLLECTION_FROM_QUERY = "BCQ"
     BULK_COLLECTION_FROM_QUERY_TR = "BCT"
@@ -70,6 +75,17 @@ class Job(models.Model):
 
     description = models.TextField(default="")
 
+    profile = models.BooleanField(
+        default=False,
+        help_text="Run the tasks of the job under the sampling profiler",
+    )
+    profile_output = models.FileField(
+        upload_to=job_profile_path,
+        blank=True,
+        help_text="Samples of the profiled tasks, in the folded stacks format "
+        "(flamegraph.pl, speedscope)",
+    )
+
     def get_progress(self):
         try:
             json.loads(self.extra).get("progress", 0.0)
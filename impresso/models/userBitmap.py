@@ -1,5 +1,8 @@
 import logging
-from django.db import models
+import threading
+import weakref
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
 from django.conf import settings
 from django.contrib.auth.models import User
 from .specialMembershipDataset import SpecialMembershipDataset
@@ -136,23 +139,175 @@ class UserBitmap(models.Model):
         super().save(*args, **kwargs)
 
 
-def update_user_bitmap_on_subscriptions_changed(sender, instance, action, **kwargs):
-    if action == "post_add" or action == "post_remove" or action == "post_clear":
-        logger.info(
-            f"User {instance.user} subscription changed, updating. Action: {action}"
+class PendingUserBitmapChanges(threading.local):
+    """
+    Bitmap changes collected during the current transaction, per database
+    alias and user id. Each entry lives as long as its single
+    `transaction.on_commit` callback, so that several m2m changes on the same
+    user end up in a single write: the callback flushes it on commit, and it
+    is discarded when Django drops the callback on rollback.
+    """
+
+    def __init__(self) -> None:
+        self.changes: dict[tuple[str, int], dict] = {}
+
+
+pending_user_bitmap_changes = PendingUserBitmapChanges()
+
+
+def _discard_pending_user_bitmap_changes(
+    pending: dict[tuple[str, int], dict], key: tuple[str, int], changes: dict
+) -> None:
+    if pending.get(key) is changes:
+        del pending[key]
+
+
+def _get_pending_user_bitmap_changes(user_id: int, using: str = "default") -> dict:
+    pending = pending_user_bitmap_changes.changes
+    key = (using, user_id)
+    changes = pending.get(key)
+    if changes is None:
+        changes = {"datasets": set(), "rebuild": False}
+        pending[key] = changes
+
+        def callback() -> None:
+            flush_user_bitmap_changes(user_id, using=using)
+
+        # the rollback path: Django drops the on_commit callbacks of a rolled
+        # back transaction (or savepoint), and the entry goes with them.
+        weakref.finalize(
+            callback, _discard_pending_user_bitmap_changes, pending, key, changes
+        )
+        transaction.on_commit(callback, using=using)
+    return changes
+
+
+def flush_user_bitmap_changes(user_id: int, using: str = "default") -> None:
+    """
+    Apply the pending bitmap changes of the given user with a single write.
+
+    Subscriptions added or removed only set or clear their own bit on the
+    stored bitmap, as found in the db on commit: changes rolled back in a
+    savepoint are recorded too. Group changes (i.e. the user plan) and
+    cleared subscriptions trigger a full rebuild via `UserBitmap.save()`.
+
+    Args:
+        user_id (int): The id of the user whose bitmap changed.
+        using (str): The database alias. Defaults to "default".
+    """
+    changes = pending_user_bitmap_changes.changes.pop((using, user_id), None)
+    if changes is None:
+        return
+    user_bitmap, created = UserBitmap.objects.using(using).get_or_create(
+        user_id=user_id
+    )
+    if created:
+        # save() already computed the full bitmap
+        return
+    if changes["rebuild"] or not user_bitmap.bitmap:
+        logger.info(f"User {user_id} bitmap changed, rebuilding.")
+        user_bitmap.save(using=using)
+        return
+    if not user_bitmap.date_accepted_terms:
+        # guest bitmap, subscriptions are not taken into account
+        return
+    value = user_bitmap.get_bitmap_as_int()
+    positions = (
+        SpecialMembershipDataset.objects.using(using)
+        .filter(pk__in=changes["datasets"])
+        .annotate(
+            subscribed=Exists(
+                UserBitmap.subscriptions.through.objects.filter(
+                    userbitmap=user_bitmap, specialmembershipdataset=OuterRef("pk")
+                )
+            )
         )
-        instance.save()
+        .values_list("bitmap_position", "subscribed")
+    )
+    for position, subscribed in positions:
+        if subscribed:
+            value |= 1 << position
+        else:
+            value &= ~(1 << position)
+    logger.info(
+        f"User {user_id} subscriptions changed, bitmap {bin(user_bitmap.get_bitmap_as_int())} -> {bin(value)}"
+    )
+    user_bitmap.bitmap = int_to_bytes(value)
+    UserBitmap.objects.using(using).filter(pk=user_bitmap.pk).update(
+        bitmap=user_bitmap.bitmap
+    )
+
+
+def update_user_bitmap_on_subscriptions_changed(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+) -> None:
+    if reverse:
+        # instance is a SpecialMembershipDataset, pk_set contains UserBitmap ids
+        if action == "pre_clear":
+            user_ids = instance.userbitmap_set.using(using).values_list(
+                "user_id", flat=True
+            )
+        elif action in ("post_add", "post_remove"):
+            user_ids = (
+                UserBitmap.objects.using(using)
+                .filter(pk__in=pk_set)
+                .values_list("user_id", flat=True)
+            )
+        else:
+            return
+        for user_id in user_ids:
+            _get_pending_user_bitmap_changes(user_id, using=using)["rebuild"] = True
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    logger.info(
+        f"User {instance.user_id} subscription changed, scheduling update. Action: {action}"
+    )
+    changes = _get_pending_user_bitmap_changes(instance.user_id, using=using)
+    if action == "post_clear":
+        # the cleared subscriptions are unknown
+        changes["rebuild"] = True
+    else:
+        changes["datasets"] |= pk_set
 
 
 def update_user_bitmap_on_user_groups_changed(
-    sender, instance: User, action, **kwargs
+    sender, instance, action, reverse, pk_set, using, **kwargs
 ) -> None:
-    if action == "post_add" or action == "post_remove" or action == "post_clear":
-        user_bitmap, created = UserBitmap.objects.get_or_create(user=instance)
+    if reverse:
+        # instance is a Group, pk_set contains User ids: the users are
+        # rebuilt together, in bulk.
+        if action == "pre_clear":
+            user_ids = set(instance.user_set.values_list("pk", flat=True))
+        elif action in ("post_add", "post_remove"):
+            user_ids = set(pk_set)
+        else:
+            return
+        if instance.name not in (
+            settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER,
+            settings.IMPRESSO_GROUP_USER_PLAN_EDUCATIONAL,
+        ):
+            # only these groups change the plan bits of the bitmap
+            return
         logger.info(
-            f"User {instance} groups changed. {'Creating new bitmap.' if created else 'Updating bitmap.'}"
+            f"Group {instance.name} changed for {len(user_ids)} user(s), scheduling bulk bitmap rebuild."
         )
-        user_bitmap.save()
+        transaction.on_commit(
+            lambda: _rebuild_user_bitmaps(user_ids=user_ids), using=using
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    logger.info(f"User {instance.pk} groups changed, scheduling bitmap rebuild.")
+    _get_pending_user_bitmap_changes(instance.pk, using=using)["rebuild"] = True
+
+
+def _rebuild_user_bitmaps(user_ids: set[int]) -> None:
+    # imported here to avoid a circular import with impresso.utils.models
+    from ..utils.models.userBitmap import rebuild_user_bitmaps
+
+    rebuild_user_bitmaps(user_ids=user_ids)
 
 
 m2m_changed.connect(
@@ -3,7 +3,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from .specialMembershipDataset import SpecialMembershipDataset
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 
 # --- Typing Definition for Changelog Entry ---
@@ -44,6 +44,8 @@ class UserSpecialMembershipRequest(models.Model):
         date_created (DateTimeField): The date and time when the request was created.
         date_last_modified (DateTimeField): The date and time when the request was last modified.
         temporary_expires_at (DateTimeField): The expiration date used for temporary automatic approvals.
+        revoke_at (DateTimeField): When the access must be revoked, kept in sync by `save()` and
+            `update_revoke_at_for_subscription()`. Indexed together with the status.
         status (CharField): The current status of the request.
         changelog (JSONField): A list of changes made to the request.
         notes (TextField): Additional notes related to the request.
@@ -51,7 +53,8 @@ class UserSpecialMembershipRequest(models.Model):
 
     Methods:
         __str__(): Returns a string representation of the UserRequest instance.
-        save(*args, **kwargs): Overrides the save method to append changes to the changelog before saving.
+        save(*args, **kwargs): Overrides the save method to append changes to the changelog
+            and to compute `revoke_at` before saving.
 
     Meta:
         unique_together (tuple): Ensures that each user can only have one request per subscription.
@@ -91,6 +94,12 @@ class UserSpecialMembershipRequest(models.Model):
         blank=True,
         help_text="Expiration date used for temporary automatic approvals",
     )
+    revoke_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the access must be revoked: temporary_expires_at for temporary approvals, date_created + revokeAfterDays for approved requests",
+    )
     status = models.CharField(
         max_length=10,
         default=STATUS_PENDING,
@@ -107,6 +116,11 @@ class UserSpecialMembershipRequest(models.Model):
         verbose_name = "User Special Membership Request"
         verbose_name_plural = "User Special Membership Requests"
         db_table = "impresso_userrequest"
+        indexes = [
+            models.Index(
+                fields=["status", "revoke_at"], name="impresso_userrequest_revoke"
+            ),
+        ]
 
     def _append_changelog(self) -> None:
         entry: ChangelogEntry = {
@@ -141,8 +155,47 @@ class UserSpecialMembershipRequest(models.Model):
                 return
         self.changelog = current_changelog + [entry]
 
+    def compute_revoke_at(self) -> Optional[datetime]:
+        """
+        Returns the date when the access granted by this request must be revoked,
+        or None if it never expires (or is not granted).
+        """
+        if self.status == self.STATUS_APPROVED_TEMPORARY:
+            return self.temporary_expires_at
+        if self.status == self.STATUS_APPROVED and self.subscription:
+            revoke_after_days = self.subscription.resolve_revoke_after_days(
+                default_days=None
+            )
+            if revoke_after_days is not None:
+                initial_datetime = self.date_created or timezone.now()
+                return initial_datetime + timedelta(days=revoke_after_days)
+        return None
+
+    @classmethod
+    def update_revoke_at_for_subscription(
+        cls, subscription: SpecialMembershipDataset
+    ) -> int:
+        """
+        Recomputes `revoke_at` of the approved requests of the given subscription,
+        e.g. after its revokeAfterDays metadata changed, with a single UPDATE.
+
+        Returns:
+            int: The number of updated requests.
+        """
+        revoke_after_days = subscription.resolve_revoke_after_days(default_days=None)
+        return cls.objects.filter(
+            subscription=subscription, status=cls.STATUS_APPROVED
+        ).update(
+            revoke_at=(
+                models.F("date_created") + timedelta(days=revoke_after_days)
+                if revoke_after_days is not None
+                else None
+            )
+        )
+
     def save(self, *args: Any, **kwargs: Any) -> None:
         self._append_changelog()
+        self.revoke_at = self.compute_revoke_at()
         super().save(*args, **kwargs)
 
     def save_without_signals(self, *args: Any, **kwargs: Any) -> None:
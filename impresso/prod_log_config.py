@@ -9,6 +9,10 @@ SHOW_TEST_LOGS = os.environ.get("TEST_LOGS", "") == "1"
 
 LOG_LEVEL = "CRITICAL" if (RUNNING_TESTS and not SHOW_TEST_LOGS) else "INFO"
 
+JSON_LOG_FORMAT = (
+    "%(asctime)s %(levelname)s %(name)s %(message)s %(filename)s %(lineno)d"
+)
+
 
 CONFIG = {
     "version": 1,
@@ -17,7 +21,7 @@ CONFIG = {
         "json": {
             # Update this string to the new modern import path:
             "()": "pythonjsonlogger.json.JsonFormatter",
-            "format": "%(asctime)s %(levelname)s %(name)s %(message)s %(filename)s %(lineno)d",
+            "format": JSON_LOG_FORMAT,
         },
     },
     "handlers": {
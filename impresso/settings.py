@@ -1,13 +1,16 @@
 import os
 import socket
 
-from impresso.utils.proxy import with_optional_proxy
+from impresso.utils.proxy import get_proxy_settings, with_optional_proxy
 from .base import get_env_variable
 from django import __version__ as django_version
 
-import MySQLdb as Database
+# Only import and wrap the MySQL driver when a SOCKS proxy is configured;
+# otherwise Django imports it lazily, when the first connection is opened.
+if get_proxy_settings():
+    import MySQLdb as Database
 
-Database.connect = with_optional_proxy(Database.connect)
+    Database.connect = with_optional_proxy(Database.connect)
 
 VERSION = (3, 2, 0)
 
@@ -90,6 +93,14 @@ DATABASES = {
         "PASSWORD": get_env_variable("IMPRESSO_DB_PASSWORD"),
         "HOST": get_env_variable("IMPRESSO_DB_HOST"),
         "PORT": get_env_variable("IMPRESSO_DB_PORT"),
+        # keep connections open between requests and celery tasks: through the
+        # SOCKS proxy each new connection costs DNS, SOCKS5 and MySQL handshakes.
+        # Health checks ping reused connections and replace broken ones.
+        "CONN_MAX_AGE": int(get_env_variable("IMPRESSO_DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": get_env_variable(
+            "IMPRESSO_DB_CONN_HEALTH_CHECKS", "True"
+        )
+        == "True",
         "TEST": {
             "NAME": get_env_variable("IMPRESSO_DB_NAME_TEST", "impresso_test"),
             "ENGINE": get_env_variable(
@@ -172,6 +183,54 @@ CELERYD_CONCURRENCY = int(get_env_variable("CELERYD_CONCURRENCY", "1"))
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = (
     get_env_variable("CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP", False) == "True"
 )
+# Periodic maintenance tasks (see impresso.tasks.periodic_tasks), run with
+# `celery -A impresso beat`. A Redis lock keeps a single run cluster-wide.
+IMPRESSO_REDIS_LOCK_URL = get_env_variable(
+    "IMPRESSO_REDIS_LOCK_URL", f"redis://{REDIS_HOST}/6"
+)
+IMPRESSO_PERIODIC_TASK_LOCK_TIMEOUT = int(
+    get_env_variable("IMPRESSO_PERIODIC_TASK_LOCK_TIMEOUT", 600)
+)
+IMPRESSO_BEAT_REVOKE_EXPIRED_MEMBERSHIPS_INTERVAL = float(
+    get_env_variable("IMPRESSO_BEAT_REVOKE_EXPIRED_MEMBERSHIPS_INTERVAL", 60)
+)
+IMPRESSO_BEAT_SEND_REVIEW_REMINDERS_INTERVAL = float(
+    get_env_variable("IMPRESSO_BEAT_SEND_REVIEW_REMINDERS_INTERVAL", 86400)
+)
+IMPRESSO_BEAT_RECONCILE_COLLECTION_COUNTS_INTERVAL = float(
+    get_env_variable("IMPRESSO_BEAT_RECONCILE_COLLECTION_COUNTS_INTERVAL", 3600)
+)
+IMPRESSO_BEAT_GC_ORPHAN_COLLECTION_IDS_INTERVAL = float(
+    get_env_variable("IMPRESSO_BEAT_GC_ORPHAN_COLLECTION_IDS_INTERVAL", 86400)
+)
+# orphan ucoll_ss garbage collection: documents per Solr update request, pause
+# between requests (throttling, so that it can run during the day) and
+# maximum number of documents updated per run and per core (0: no limit)
+IMPRESSO_UCOLL_GC_BATCH_SIZE = int(get_env_variable("IMPRESSO_UCOLL_GC_BATCH_SIZE", 500))
+IMPRESSO_UCOLL_GC_SLEEP = float(get_env_variable("IMPRESSO_UCOLL_GC_SLEEP", 1.0))
+IMPRESSO_UCOLL_GC_MAX_DOCS = int(get_env_variable("IMPRESSO_UCOLL_GC_MAX_DOCS", 200000))
+# median startup time of `manage.py <command> --help`, see benchmarkstartup
+IMPRESSO_CLI_STARTUP_BUDGET_MS = float(
+    get_env_variable("IMPRESSO_CLI_STARTUP_BUDGET_MS", 1000)
+)
+CELERY_BEAT_SCHEDULE = {
+    "revoke-expired-memberships": {
+        "task": "impresso.tasks.periodic_tasks.periodic_revoke_expired_memberships",
+        "schedule": IMPRESSO_BEAT_REVOKE_EXPIRED_MEMBERSHIPS_INTERVAL,
+    },
+    "send-review-reminders": {
+        "task": "impresso.tasks.periodic_tasks.periodic_send_review_reminders",
+        "schedule": IMPRESSO_BEAT_SEND_REVIEW_REMINDERS_INTERVAL,
+    },
+    "reconcile-collection-count-items": {
+        "task": "impresso.tasks.periodic_tasks.periodic_reconcile_collection_count_items",
+        "schedule": IMPRESSO_BEAT_RECONCILE_COLLECTION_COUNTS_INTERVAL,
+    },
+    "gc-orphan-collection-ids": {
+        "task": "impresso.tasks.periodic_tasks.periodic_gc_orphan_collection_ids",
+        "schedule": IMPRESSO_BEAT_GC_ORPHAN_COLLECTION_IDS_INTERVAL,
+    },
+}
 
 IMPRESSO_BASE_URL = get_env_variable("IMPRESSO_BASE_URL", "https://impresso-project.ch")
 IMPRESSO_INSTITUTIONS_ACCESS_URL = get_env_variable(
@@ -335,6 +394,54 @@ IMPRESSO_SOLR_EXEC_MAX_LOOPS = int(
     get_env_variable("IMPRESSO_SOLR_EXEC_MAX_LOOPS", 100000)
 )  # aka 500000 docs
 IMPRESSO_SOLR_EXEC_LIMIT = int(get_env_variable("IMPRESSO_SOLR_EXEC_LIMIT", 100))
+# tag the results of a query to collection inside Solr with a streaming
+# expression. Requires the /stream handler and an /update chain turning
+# ucoll_ss into an atomic add (AtomicUpdateProcessorFactory, atomic.ucoll_ss=add)
+IMPRESSO_SOLR_STREAMING_UPDATE = (
+    get_env_variable("IMPRESSO_SOLR_STREAMING_UPDATE", "False") == "True"
+)
+# set to True only once that /update chain is configured on the cores: without
+# it, the streaming expression replaces every matching document with a stub.
+# Streaming is refused while it is False.
+IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN = (
+    get_env_variable("IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN", "False") == "True"
+)
+IMPRESSO_SOLR_STREAMING_BATCH_SIZE = int(
+    get_env_variable("IMPRESSO_SOLR_STREAMING_BATCH_SIZE", 1000)
+)
+# select the TR passages of a collection with a cross-core join on the articles
+# core ({!join fromIndex=...}): requires both cores on the same Solr node
+IMPRESSO_SOLR_TR_JOIN = get_env_variable("IMPRESSO_SOLR_TR_JOIN", "False") == "True"
+
+# hot-path metrics (impresso.utils.metrics), in the Prometheus text format.
+# The web process serves them at /metrics/, protected by a bearer token
+# (required); celery worker processes write them, with a pid label, to
+# <IMPRESSO_METRICS_TEXTFILE_DIR>/impresso-<pid>.prom for the node_exporter
+# textfile collector, and remove the file on shutdown.
+IMPRESSO_METRICS_ENABLED = (
+    get_env_variable("IMPRESSO_METRICS_ENABLED", "False") == "True"
+)
+IMPRESSO_METRICS_TOKEN = get_env_variable("IMPRESSO_METRICS_TOKEN", "")
+IMPRESSO_METRICS_TEXTFILE_DIR = get_env_variable("IMPRESSO_METRICS_TEXTFILE_DIR", "")
+IMPRESSO_METRICS_TEXTFILE_INTERVAL = float(
+    get_env_variable("IMPRESSO_METRICS_TEXTFILE_INTERVAL", 15.0)
+)
+# sampling interval of the profiler of jobs flagged with Job.profile
+IMPRESSO_PROFILER_INTERVAL = float(
+    get_env_variable("IMPRESSO_PROFILER_INTERVAL", 0.005)
+)
+# logging in the hot loops of jobs (impresso.utils.joblog): one per-item
+# message every IMPRESSO_LOG_SAMPLE_EVERY, payloads capped to
+# IMPRESSO_LOG_MAX_CHARS characters
+IMPRESSO_LOG_SAMPLE_EVERY = int(get_env_variable("IMPRESSO_LOG_SAMPLE_EVERY", 100))
+IMPRESSO_LOG_MAX_CHARS = int(get_env_variable("IMPRESSO_LOG_MAX_CHARS", 1000))
+# jobs running all their pages in one task (PagedSolrJob.run): fetch the next
+# page while the current one is written, save progress and the cursor
+# checkpoint at most every IMPRESSO_JOB_PROGRESS_INTERVAL seconds
+IMPRESSO_JOB_PREFETCH = get_env_variable("IMPRESSO_JOB_PREFETCH", "True") == "True"
+IMPRESSO_JOB_PROGRESS_INTERVAL = float(
+    get_env_variable("IMPRESSO_JOB_PROGRESS_INTERVAL", 2.0)
+)
 
 IMPRESSO_CONTENT_REDACTED_LABEL = "[Copyright restricted]"
 IMPRESSO_CONTENT_DOWNLOAD_MAX_YEAR = int(
@@ -386,6 +493,14 @@ IMPRESSO_DEFAULT_GROUP_USERS = (
 
 IMPRESSO_SPECIAL_MEMBERSHIP_TEMPORARY_APPROVAL_DEFAULT_DAYS = 1
 IMPRESSO_EMAIL_LABEL_DEFAULT_FROM_EMAIL = f"Impresso Team <{DEFAULT_FROM_EMAIL}>"
+# Batched email sending (see impresso.utils.tasks.email.EmailDispatcher)
+IMPRESSO_EMAIL_BATCH_SIZE = int(get_env_variable("IMPRESSO_EMAIL_BATCH_SIZE", 50))
+IMPRESSO_EMAIL_BATCH_MAX_RETRIES = int(
+    get_env_variable("IMPRESSO_EMAIL_BATCH_MAX_RETRIES", 2)
+)
+IMPRESSO_EMAIL_BATCH_RETRY_QUEUE_SIZE = int(
+    get_env_variable("IMPRESSO_EMAIL_BATCH_RETRY_QUEUE_SIZE", 100)
+)
 
 IMPRESSO_EMAIL_SUBJECT_AFTER_USER_REGISTRATION_PLAN_BASIC = "Access to Impresso"
 IMPRESSO_EMAIL_SUBJECT_AFTER_USER_REGISTRATION_PLAN_EDUCATIONAL = (
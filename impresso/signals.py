@@ -2,14 +2,13 @@ import logging
 import sys
 from django.conf import settings
 from django.contrib.auth.models import Group, User
+from impresso.models.specialMembershipDataset import SpecialMembershipDataset
 from impresso.models.userBitmap import UserBitmap
 from impresso.models.userChangePlanRequest import UserChangePlanRequest
 from impresso.models.userSpecialMembershipRequest import UserSpecialMembershipRequest
-from impresso.tasks.userChangePlanRequest_task import after_change_plan_request_updated
-from impresso.tasks.userSpecialMembershipRequest_tasks import (
-    after_special_membership_request_created,
-    after_special_membership_request_updated,
-)
+
+# Task modules (and celery) are imported inside the handlers: this module is
+# loaded by AppConfig.ready() for every management command.
 
 logger = logging.getLogger(__name__)
 
@@ -64,9 +63,29 @@ def post_save_user_change_plan_request(sender, instance, created, **kwargs):
         UserChangePlanRequest.STATUS_PENDING,
     ]:
         instance.user.groups.remove(instance.plan)
+    from impresso.tasks.userChangePlanRequest_task import (
+        after_change_plan_request_updated,
+    )
+
     after_change_plan_request_updated.delay(user_id=instance.user.pk)
 
 
+def post_save_special_membership_dataset(
+    sender, instance: SpecialMembershipDataset, created: bool, **kwargs
+) -> None:
+    """
+    Signal handler for post-save event of SpecialMembershipDataset model.
+    Keeps the stored `revoke_at` of the related requests in sync with the
+    revokeAfterDays metadata.
+    """
+    if created:
+        return
+    updated = UserSpecialMembershipRequest.update_revoke_at_for_subscription(instance)
+    logger.info(
+        f"@post_save SpecialMembershipDataset pk={instance.pk} revokeAfterDays={instance.revoke_after_days} - revoke_at updated for {updated} request(s)"
+    )
+
+
 def post_save_user_special_membership_request(
     sender, instance: UserSpecialMembershipRequest, created: bool, **kwargs
 ) -> None:
@@ -84,6 +103,11 @@ def post_save_user_special_membership_request(
     logger.info(
         f"@post_save UserSpecialMembershipRequest for user={instance.user.pk} subscription={instance.subscription.title if instance.subscription else 'None'} status={instance.status}"
     )
+    from impresso.tasks.userSpecialMembershipRequest_tasks import (
+        after_special_membership_request_created,
+        after_special_membership_request_updated,
+    )
+
     if created:
         after_special_membership_request_created.delay(instance_id=instance.pk)
     else:
@@ -1,10 +1,16 @@
 import requests
 import json
 import logging
+import time
 from django.conf import settings
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 
-from impresso.utils.proxy import get_proxy_for_host_or_url
+from impresso.utils.joblog import Truncated
+from impresso.utils.metrics import record_solr_request
+from impresso.utils.proxy import (
+    get_proxy_for_host_or_url,
+    get_session_for_host_or_url,
+)
 
 
 def find_all(
@@ -17,6 +23,7 @@ def find_all(
     logger: Optional[logging.Logger] = None,
     sort: str = "id ASC",
     fq: str = "",
+    cursor_mark: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Execute a query against a Solr instance and return the results.
@@ -31,6 +38,9 @@ def find_all(
         logger (Optional[logging.Logger]): Logger instance for logging. Defaults to None.
         sort (str): The sort order of the results. Defaults to "id ASC".
         fq (str): The filter query. Defaults to an empty string.
+        cursor_mark (Optional[str]): Page with a cursor instead of `skip`
+            ("*" for the first page, then the nextCursorMark of the response);
+            `sort` must end with the uniqueKey field. Defaults to None.
 
     Returns:
         dict: The response from the Solr instance as a dictionary.
@@ -51,22 +61,22 @@ def find_all(
         "hl": "off",
         "sort": sort,
     }
+    if cursor_mark is not None:
+        params.update({"start": 0, "cursorMark": cursor_mark})
 
     proxy = get_proxy_for_host_or_url(url)
 
-    if proxy:
-        if logger:
+    if logger:
+        if proxy:
             logger.info(f"Using proxy: {proxy[0]}:{proxy[1]}")
-
-        proxies = {
-            "http": f"socks4://{proxy[0]}:{proxy[1]}",
-            "https": f"socks4://{proxy[0]}:{proxy[1]}",
-        }
-        res = requests.post(url, auth=auth, params=params, proxies=proxies, data=data)
-    else:
-        if logger:
+        else:
             logger.info("No proxy used for Solr query.")
-        res = requests.post(url, auth=auth, params=params, data=data)
+    # the session carries the proxies and keeps the connection alive
+    start = time.perf_counter()
+    res = get_session_for_host_or_url(url).post(
+        url, auth=auth, params=params, data=data
+    )
+    record_solr_request("find_all", url, time.perf_counter() - start, res)
     try:
         res.raise_for_status()
     except requests.exceptions.HTTPError as err:
@@ -80,6 +90,193 @@ def find_all(
     return data
 
 
+def iter_all(
+    q: str,
+    url: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    auth: tuple = settings.IMPRESSO_SOLR_AUTH,
+    fl: str = "id",
+    sort: str = "id asc",
+    fq: str = "",
+    rows: int = 1000,
+    logger: Optional[logging.Logger] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over all the documents matching a query with a Solr cursorMark,
+    in constant memory and without the cost of deep `start` offsets.
+
+    Args:
+        q (str): The query string.
+        url (str): The Solr select URL. Defaults to settings.IMPRESSO_SOLR_URL_SELECT.
+        auth (tuple): Authentication credentials. Defaults to settings.IMPRESSO_SOLR_AUTH.
+        fl (str): The fields to return. Defaults to "id".
+        sort (str): The sort order; cursors require it to end with the
+            uniqueKey field. Defaults to "id asc".
+        fq (str): The filter query. Defaults to an empty string.
+        rows (int): Number of documents per request. Defaults to 1000.
+        logger (Optional[logging.Logger]): Logger instance. Defaults to None.
+
+    Yields:
+        dict: The documents, in `sort` order.
+
+    Raises:
+        requests.exceptions.HTTPError: If a request returned an unsuccessful status code.
+    """
+    session = get_session_for_host_or_url(url)
+    cursor_mark = "*"
+    while True:
+        data = {"q": q, "fq": fq} if fq else {"q": q}
+        params: Dict[str, Any] = {
+            "fl": fl,
+            "rows": int(rows),
+            "sort": sort,
+            "cursorMark": cursor_mark,
+            "wt": "json",
+            "hl": "off",
+        }
+        start = time.perf_counter()
+        res = session.post(url, auth=auth, params=params, data=data)
+        record_solr_request("iter_all", url, time.perf_counter() - start, res)
+        res.raise_for_status()
+        contents = res.json()
+        docs = contents.get("response", {}).get("docs", [])
+        if logger:
+            logger.info(
+                f"iter_all q={q} cursorMark={cursor_mark} docs={len(docs)} "
+                f"numFound={contents.get('response', {}).get('numFound')}"
+            )
+        yield from docs
+        next_cursor_mark = contents.get("nextCursorMark")
+        if not docs or next_cursor_mark in (None, cursor_mark):
+            return
+        cursor_mark = next_cursor_mark
+
+
+def get_facet_counts(
+    field: str,
+    q: str = "*:*",
+    url: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    auth: tuple = settings.IMPRESSO_SOLR_AUTH,
+    fq: str = "",
+    limit: int = -1,
+    mincount: int = 1,
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, int]:
+    """
+    Get the number of documents per term of a field with a single facet
+    request, e.g. the number of documents per collection with `ucoll_ss`.
+
+    Args:
+        field (str): The field to facet on.
+        q (str): The query string. Defaults to "*:*".
+        url (str): The Solr select URL. Defaults to settings.IMPRESSO_SOLR_URL_SELECT.
+        auth (tuple): Authentication credentials. Defaults to settings.IMPRESSO_SOLR_AUTH.
+        fq (str): The filter query. Defaults to an empty string.
+        limit (int): Maximum number of terms, -1 for all of them. Defaults to -1.
+        mincount (int): Minimum count of the returned terms. Defaults to 1.
+        logger (Optional[logging.Logger]): Logger instance. Defaults to None.
+
+    Returns:
+        dict: The document count per term, in index order.
+
+    Raises:
+        requests.exceptions.HTTPError: If the HTTP request returned an unsuccessful status code.
+    """
+    data = {"q": q, "fq": fq} if fq else {"q": q}
+    params: Dict[str, Any] = {
+        "rows": 0,
+        "facet": "true",
+        "facet.field": field,
+        "facet.limit": limit,
+        "facet.mincount": mincount,
+        "facet.sort": "index",
+        "json.nl": "map",
+        "wt": "json",
+    }
+    start = time.perf_counter()
+    res = get_session_for_host_or_url(url).post(
+        url, auth=auth, params=params, data=data
+    )
+    record_solr_request("get_facet_counts", url, time.perf_counter() - start, res)
+    res.raise_for_status()
+    contents = res.json()
+    if logger:
+        logger.info(
+            f"get_facet_counts field={field} q={q} "
+            f"QTime={contents.get('responseHeader', {}).get('QTime')}"
+        )
+    return contents.get("facet_counts", {}).get("facet_fields", {}).get(field, {})
+
+
+class SolrStreamingError(Exception):
+    """
+    A streaming expression failed inside Solr (EXCEPTION tuple).
+    """
+
+
+def quote_streaming_value(value: str) -> str:
+    """
+    Quote a string parameter of a Solr streaming expression.
+
+    >>> quote_streaming_value('title:"a b"')
+    '"title:\\\\"a b\\\\""'
+    """
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def get_core_from_url(url: str) -> tuple[str, str]:
+    """
+    Return the core name and the /stream URL of a Solr select or update URL,
+    e.g. http://localhost:8983/solr/impresso/select gives
+    ("impresso", "http://localhost:8983/solr/impresso/stream").
+    """
+    core_url = url.rstrip("/").rsplit("/", 1)[0]
+    return core_url.rsplit("/", 1)[1], f"{core_url}/stream"
+
+
+def stream(
+    expr: str,
+    url: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    auth: tuple = settings.IMPRESSO_SOLR_AUTH_WRITE,
+    logger: Optional[logging.Logger] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a streaming expression on the /stream handler of the core of `url`
+    and return its tuples, without the final EOF tuple. Solr reports errors
+    met while streaming with HTTP 200 and an EXCEPTION tuple.
+
+    Args:
+        expr (str): The streaming expression.
+        url (str): A select or update URL of the core. Defaults to settings.IMPRESSO_SOLR_URL_SELECT.
+        auth (tuple): Authentication credentials. Defaults to settings.IMPRESSO_SOLR_AUTH_WRITE,
+            as expressions may update the index.
+        logger (Optional[logging.Logger]): Logger instance. Defaults to None.
+
+    Returns:
+        List[Dict[str, Any]]: The tuples.
+
+    Raises:
+        requests.exceptions.HTTPError: If the handler is not available.
+        SolrStreamingError: If the expression failed.
+    """
+    _, stream_url = get_core_from_url(url)
+    if logger:
+        logger.info(f"stream url:{stream_url} expr:{expr}")
+    start = time.perf_counter()
+    res = get_session_for_host_or_url(stream_url).post(
+        stream_url, auth=auth, data={"expr": expr}
+    )
+    record_solr_request("stream", stream_url, time.perf_counter() - start, res)
+    res.raise_for_status()
+    tuples = []
+    for doc in res.json().get("result-set", {}).get("docs", []):
+        if "EXCEPTION" in doc:
+            raise SolrStreamingError(doc["EXCEPTION"])
+        if doc.get("EOF"):
+            break
+        tuples.append(doc)
+    return tuples
+
+
 def find_collections_by_ids(ids: List[str]) -> List[Dict[str, Any]]:
     res = find_all(
         q=" OR ".join(map(lambda id: "id:%s" % id, ids)),
@@ -94,41 +291,48 @@ def update(
     url: Optional[str] = None,
     auth: tuple = settings.IMPRESSO_SOLR_AUTH_WRITE,
     logger: Optional[logging.Logger] = None,
+    commit_within_ms: Optional[int] = None,
 ) -> Dict[str, Any]:
+    """
+    Send atomic updates to Solr. Commits immediately, unless
+    `commit_within_ms` is set: Solr then commits within that many
+    milliseconds, grouping the commits of frequent batches.
+    """
     if logger:
         logger.info(f"todos n:{len(todos)} for url:{url}")
 
     if url is None:
         raise ValueError("url is required")
 
-    proxies = None
-    proxy = get_proxy_for_host_or_url(url or "")
-
-    if proxy:
-        PROXY_HOST, PROXY_PORT = proxy
-        if logger:
-            logger.info(f"Using proxy: {PROXY_HOST}:{PROXY_PORT}")
+    proxy = get_proxy_for_host_or_url(url)
 
-        proxies = {
-            "http": f"socks4://{PROXY_HOST}:{PROXY_PORT}",
-            "https": f"socks4://{PROXY_HOST}:{PROXY_PORT}",
-        }
+    if proxy and logger:
+        logger.info(f"Using proxy: {proxy[0]}:{proxy[1]}")
 
-    res = requests.post(
+    params: Dict[str, Any] = {"versions": "true", "fl": "id"}
+    if commit_within_ms:
+        params["commitWithin"] = commit_within_ms
+    else:
+        params["commit"] = "true"
+    start = time.perf_counter()
+    res = get_session_for_host_or_url(url).post(
         url,
-        proxies=proxies,
         auth=auth,
-        params={"commit": "true", "versions": "true", "fl": "id"},
+        params=params,
         data=json.dumps(todos),
         json=True,
         headers={"content-type": "application/json; charset=UTF-8"},
     )
+    record_solr_request(
+        "update", url, time.perf_counter() - start, res, batch_size=len(todos)
+    )
     try:
         res.raise_for_status()
     except requests.exceptions.HTTPError as err:
         if logger:
-            logger.info("sending data: {}".format(json.dumps(todos)))
-            logger.info(res.text)
+            # capped: a page of atomic updates can weigh megabytes
+            logger.info("sending data: %s", Truncated(todos))
+            logger.info("%s", Truncated(res.text))
             logger.exception(err)
         raise
     return res.json()
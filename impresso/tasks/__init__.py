@@ -23,9 +23,12 @@ from ..utils.tasks.account import (
     send_magic_link_email,
 )
 from ..utils.tasks.userBitmap import helper_update_user_bitmap
+from ..utils.profiling import profile_job
 
 from .userSpecialMembershipRequest_tasks import *
 from .userChangePlanRequest_task import *
+from .periodic_tasks import *
+from .collection_tasks import *
 
 logger = get_task_logger(__name__)
 
@@ -78,8 +81,9 @@ def test_progress(self, job_id, sleep=100, pace=0.01, progress=0.0):
     )
 
     if progress < 1.0:
-        # do heavy stuff during this time
-        time.sleep(sleep)
+        with profile_job(job, logger=logger):
+            # do heavy stuff during this time
+            time.sleep(sleep)
         # call the same function right after
         test_progress.delay(
             job_id=job.pk, sleep=sleep, pace=pace, progress=progress + pace
@@ -89,7 +93,9 @@ def test_progress(self, job_id, sleep=100, pace=0.01, progress=0.0):
 
 
 @default_task_config
-def test(self, user_id: int, sleep: int = 1, pace: float = 0.05):
+def test(
+    self, user_id: int, sleep: int = 1, pace: float = 0.05, profile: bool = False
+):
     """
     Initiates a test job and starts the test_progress task.
 
@@ -98,12 +104,15 @@ def test(self, user_id: int, sleep: int = 1, pace: float = 0.05):
         user_id (int): The ID of the user initiating the test.
         sleep (int, optional): The sleep duration between progress updates. Defaults to 1.
         pace (float, optional): The pace of progress updates. Defaults to 0.05.
+        profile (bool, optional): Run the job under the sampling profiler. Defaults to False.
 
     Returns:
         None
     """
     # save current job then start test_progress task.
-    job = Job.objects.create(type=Job.TEST, status=Job.RUN, creator_id=user_id)
+    job = Job.objects.create(
+        type=Job.TEST, status=Job.RUN, creator_id=user_id, profile=profile
+    )
     logger.info(f"[job:{job.pk} user:{user_id}] launched!")
     # stat loop
     update_job_progress(task=self, job=job, taskstate=TASKSTATE_INIT, progress=0.0)
@@ -0,0 +1,98 @@
+from io import StringIO
+from typing import Any
+
+from celery.utils.log import get_task_logger
+from django.core.management import call_command
+
+from ..celery import app
+from ..models import CollectableItem, Job
+from ..utils.profiling import profile_job
+from ..utils.tasks import update_job_completed
+from ..utils.tasks.collection import helper_store_collection
+
+logger = get_task_logger(__name__)
+
+
+@app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    exponential_backoff=2,
+    retry_kwargs={"max_retries": 3},
+    retry_jitter=True,
+)
+def reconcile_collection(
+    self, collection_id: str, repair: str = "solr", skip_tr: bool = False
+) -> dict[str, Any]:
+    """
+    Repair the items of a single collection with the `reconcilecollection`
+    command, e.g. for the collections flagged by `auditcollections`.
+    Retrying is safe: a second run only fixes what is still different.
+
+    Args:
+        self: The task instance.
+        collection_id (str): The collection id, may be an orphan id found in Solr.
+        repair (str): "solr" to fix Solr to match the db, "db" for the opposite.
+            Defaults to "solr".
+        skip_tr (bool): Do not check the TR passages index. Defaults to False.
+
+    Returns:
+        dict: The collection id and the command output.
+    """
+    args = ["reconcilecollection", collection_id, "--repair", repair]
+    if skip_tr:
+        args.append("--skip-tr")
+    out = StringIO()
+    call_command(*args, stdout=out)
+    logger.info(out.getvalue())
+    return {"collection_id": collection_id, "output": out.getvalue()}
+
+
+@app.task(bind=True)
+def store_collection_from_query(
+    self,
+    collection_id: str,
+    user_id: int,
+    query: str,
+    content_type: str = CollectableItem.ARTICLE,
+    profile: bool = False,
+) -> dict[str, Any]:
+    """
+    Add the results of a Solr query to a collection, with a streaming
+    expression when enabled (settings.IMPRESSO_SOLR_STREAMING_UPDATE),
+    otherwise page by page. See `helper_store_collection`.
+
+    Args:
+        self: The task instance.
+        collection_id (str): The collection id.
+        user_id (int): The user running the job.
+        query (str): The Solr query.
+        content_type (str): The CollectableItem content type. Defaults to ARTICLE.
+        profile (bool): Run the job under the sampling profiler. Defaults to False.
+
+    Returns:
+        dict: The engine used and its counts.
+    """
+    job = Job.objects.create(
+        type=Job.BULK_COLLECTION_FROM_QUERY,
+        creator_id=user_id,
+        status=Job.RUN,
+        profile=profile,
+    )
+    with profile_job(job, logger=logger):
+        result = helper_store_collection(
+            task=self,
+            collection_id=collection_id,
+            job=job,
+            query=query,
+            content_type=content_type,
+            logger=logger,
+        )
+    if job.status == Job.RUN:
+        update_job_completed(
+            task=self,
+            job=job,
+            extra={"collection_id": collection_id, "query": query, **result},
+            message=f"Collection {collection_id} updated!",
+            logger=logger,
+        )
+    return result
@@ -0,0 +1,204 @@
+from io import StringIO
+from typing import Any, Optional
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from ..celery import app
+from ..models.userSpecialMembershipRequest import UserSpecialMembershipRequest
+from impresso.utils.models.collection import reconcile_collection_count_items
+from impresso.utils.tasks.collection import (
+    find_orphan_collection_ids,
+    strip_collection_ids_from_index,
+)
+from impresso.utils.tasks.email import EmailDispatcher
+from impresso.utils.tasks.periodic import get_watermark, set_watermark, singleton_lock
+from impresso.utils.tasks.userSpecialMembershipRequest import (
+    revoke_special_membership_requests_in_batch,
+)
+
+logger = get_task_logger(__name__)
+
+# Periodic tasks are scheduled by celery beat (see settings.CELERY_BEAT_SCHEDULE).
+# They are not retried: they are idempotent and the next tick picks up
+# whatever a failed run left behind.
+
+
+@app.task(bind=True)
+def periodic_revoke_expired_memberships(
+    self, batch_size: Optional[int] = None, chunk_size: int = 1000
+) -> dict[str, Any]:
+    """
+    Revoke, in bulk, the approved and temporarily approved special memberships
+    whose `revoke_at` has passed. Replaces the cron-driven
+    `checktemporarymemberships` and `revokemembershipaccess` commands.
+
+    Revoked requests leave the approved statuses, so each run only sees the
+    requests that expired since the previous one: a range scan on the
+    (status, revoke_at) index. The watermark records the end of the last
+    successful run.
+
+    Args:
+        self: The task instance.
+        batch_size (int, optional): Number of emails per batch. Defaults to
+            settings.IMPRESSO_EMAIL_BATCH_SIZE.
+        chunk_size (int): Number of requests revoked per transaction. Defaults to 1000.
+
+    Returns:
+        dict: A summary of the run.
+    """
+    task_name = "revoke_expired_memberships"
+    with singleton_lock(task_name, logger=logger) as acquired:
+        if not acquired:
+            return {"skipped": True}
+        previous_run = get_watermark(task_name)
+        now = timezone.now()
+        expired_ids = list(
+            UserSpecialMembershipRequest.objects.filter(
+                status__in=[
+                    UserSpecialMembershipRequest.STATUS_APPROVED,
+                    UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+                ],
+                revoke_at__lte=now,
+            ).values_list("pk", flat=True)
+        )
+        revoked = 0
+        if expired_ids:
+            with EmailDispatcher(batch_size=batch_size, logger=logger) as dispatcher:
+                for i in range(0, len(expired_ids), chunk_size):
+                    revoked += revoke_special_membership_requests_in_batch(
+                        # the status is checked again: the rows may have changed
+                        requests=UserSpecialMembershipRequest.objects.filter(
+                            pk__in=expired_ids[i : i + chunk_size],
+                            status__in=[
+                                UserSpecialMembershipRequest.STATUS_APPROVED,
+                                UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+                            ],
+                        )
+                        .select_related("user", "reviewer", "subscription__reviewer")
+                        .prefetch_related("user__groups"),
+                        dispatcher=dispatcher,
+                        logger=logger,
+                        batch_size=chunk_size,
+                    )
+        set_watermark(task_name, now)
+        logger.info(
+            f"Revoked {revoked} expired special membership(s) since {previous_run.isoformat() if previous_run else 'the beginning'}"
+        )
+        return {
+            "skipped": False,
+            "revoked": revoked,
+            "since": previous_run.isoformat() if previous_run else None,
+            "until": now.isoformat(),
+        }
+
+
+@app.task(bind=True)
+def periodic_send_review_reminders(self) -> dict[str, Any]:
+    """
+    Send one summary email to each reviewer having pending special membership
+    requests created since the previous successful run (the watermark), using
+    the `sendreviewreminder` command in batch mode. The first run covers all
+    pending requests.
+
+    Args:
+        self: The task instance.
+
+    Returns:
+        dict: A summary of the run.
+    """
+    task_name = "send_review_reminders"
+    with singleton_lock(task_name, logger=logger) as acquired:
+        if not acquired:
+            return {"skipped": True}
+        previous_run = get_watermark(task_name)
+        now = timezone.now()
+        args = ["sendreviewreminder", "summary", "--batch"]
+        if previous_run is not None:
+            args += ["--created-after", previous_run.isoformat()]
+        out = StringIO()
+        call_command(
+            *args, batch_size=settings.IMPRESSO_EMAIL_BATCH_SIZE, stdout=out
+        )
+        logger.info(out.getvalue())
+        set_watermark(task_name, now)
+        return {
+            "skipped": False,
+            "since": previous_run.isoformat() if previous_run else None,
+            "until": now.isoformat(),
+        }
+
+
+@app.task(bind=True)
+def periodic_reconcile_collection_count_items(self) -> dict[str, Any]:
+    """
+    Fix the `count_items` of the collections whose cached count drifted from
+    the number of their collectable items, e.g. after concurrent jobs on the
+    same collection. count_items is otherwise maintained incrementally.
+
+    Args:
+        self: The task instance.
+
+    Returns:
+        dict: A summary of the run.
+    """
+    task_name = "reconcile_collection_count_items"
+    with singleton_lock(task_name, logger=logger) as acquired:
+        if not acquired:
+            return {"skipped": True}
+        fixed = reconcile_collection_count_items()
+        logger.info(f"Reconciled count_items of {fixed} collection(s)")
+        return {"skipped": False, "fixed": fixed}
+
+
+@app.task(bind=True)
+def periodic_gc_orphan_collection_ids(self) -> dict[str, Any]:
+    """
+    Remove from ucoll_ss, in the articles and in the TR passages cores, the
+    ids of collections that no longer exist in the db (deleted collections,
+    or collections deleted with their user). Orphans are found with one facet
+    request per core; updates are throttled with settings.IMPRESSO_UCOLL_GC_*
+    and capped per run, the next run continues where this one stopped.
+
+    Args:
+        self: The task instance.
+
+    Returns:
+        dict: A summary of the run, per core.
+    """
+    task_name = "gc_orphan_collection_ids"
+    # the lock outlives a throttled run over a large core
+    with singleton_lock(task_name, timeout=6 * 3600, logger=logger) as acquired:
+        if not acquired:
+            return {"skipped": True}
+        result: dict[str, Any] = {"skipped": False}
+        for core, url_select, url_update in (
+            (
+                "articles",
+                settings.IMPRESSO_SOLR_URL_SELECT,
+                settings.IMPRESSO_SOLR_URL_UPDATE,
+            ),
+            (
+                "tr_passages",
+                settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+            ),
+        ):
+            orphans = find_orphan_collection_ids(url=url_select, logger=logger)
+            updated = strip_collection_ids_from_index(
+                orphans,
+                url_select=url_select,
+                url_update=url_update,
+                batch_size=settings.IMPRESSO_UCOLL_GC_BATCH_SIZE,
+                sleep=settings.IMPRESSO_UCOLL_GC_SLEEP,
+                max_docs=settings.IMPRESSO_UCOLL_GC_MAX_DOCS or None,
+                logger=logger,
+            )
+            logger.info(
+                f"{core}: removed {len(orphans)} orphan collection id(s) "
+                f"from {updated} document(s)"
+            )
+            result[core] = {"orphans": len(orphans), "updated": updated}
+        return result
@@ -1,10 +1,14 @@
+from typing import Optional
+
 from celery.utils.log import get_task_logger
 from django.utils import timezone
 from django.conf import settings
 from ..celery import app
 from ..models.userSpecialMembershipRequest import UserSpecialMembershipRequest
+from impresso.utils.tasks.email import EmailDispatcher
 from impresso.utils.tasks.userSpecialMembershipRequest import (
     apply_special_membership_to_bitmap,
+    revoke_special_membership_requests_in_batch,
     send_email_after_user_special_membership_request_created,
     send_email_after_user_special_membership_request_updated,
 )
@@ -212,14 +216,29 @@ def revoke_special_membership_request(self, instance_id: int) -> None:
     retry_kwargs={"max_retries": 5},
     retry_jitter=True,
 )
-def revoke_expired_temporary_memberships(self) -> None:
+def revoke_expired_temporary_memberships(
+    self, batch: bool = False, batch_size: Optional[int] = None
+) -> None:
     """
     Periodic task to revoke any STATUS_APPROVED_TEMPORARY memberships
-    that have passed their temporary_expires_at date.
+    that have passed their temporary_expires_at date. The lookup is a range
+    scan on the (status, revoke_at) index, cheap enough to run every minute.
+
+    By default one `revoke_special_membership_request` task is enqueued per
+    expired request. With `batch=True`, all expired requests are revoked in a
+    single transactional pass (bulk status update, grouped delete of the
+    bitmap subscriptions, bulk bitmap recompute) and the revocation emails are
+    sent in batches over a single SMTP connection.
+
+    Args:
+        self: The task instance.
+        batch (bool): Revoke inline and batch the emails. Defaults to False.
+        batch_size (int, optional): Number of emails per batch. Defaults to
+            settings.IMPRESSO_EMAIL_BATCH_SIZE.
     """
     expired_requests = UserSpecialMembershipRequest.objects.filter(
         status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
-        temporary_expires_at__lt=timezone.now(),
+        revoke_at__lt=timezone.now(),
     )
 
     count = expired_requests.count()
@@ -229,6 +248,20 @@ def revoke_expired_temporary_memberships(self) -> None:
 
     logger.info(f"Found {count} expired temporary memberships to revoke.")
 
+    if batch:
+        with EmailDispatcher(batch_size=batch_size, logger=logger) as dispatcher:
+            revoke_special_membership_requests_in_batch(
+                requests=expired_requests.select_related(
+                    "user", "reviewer", "subscription__reviewer"
+                ).prefetch_related("user__groups"),
+                dispatcher=dispatcher,
+                logger=logger,
+            )
+        logger.info(
+            f"Batch revocation emails: {dispatcher.sent} sent, {dispatcher.failed} failed"
+        )
+        return
+
     for req in expired_requests:
         revoke_special_membership_request.delay(instance_id=req.pk)
 
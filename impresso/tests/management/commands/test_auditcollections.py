@@ -0,0 +1,70 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from impresso.models import CollectableItem, Collection
+
+
+class TestAuditCollectionsCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_auditcollections
+    """
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(username="testuser")
+        self.in_sync = Collection.objects.create(
+            id="local-in-sync", name="In sync", creator=user, count_items=2
+        )
+        self.drifted = Collection.objects.create(
+            id="local-drifted", name="Drifted", creator=user, count_items=5
+        )
+        for collection, items_ids in (
+            (self.in_sync, ("a", "b")),
+            (self.drifted, ("a",)),
+        ):
+            for item_id in items_ids:
+                CollectableItem.objects.create(
+                    item_id=item_id,
+                    content_type=CollectableItem.ARTICLE,
+                    collection=collection,
+                )
+        self.solr_counts = {"local-drifted": 3, "local-in-sync": 2, "local-orphan": 7}
+
+    def _call(self, *args: str) -> str:
+        out = StringIO()
+        with patch(
+            "impresso.management.commands.auditcollections.get_facet_counts",
+            return_value=dict(self.solr_counts),
+        ) as get_facet_counts:
+            call_command("auditcollections", *args, stdout=out)
+        self.assertEqual(get_facet_counts.call_count, 1)
+        return out.getvalue()
+
+    def test_flags_drift_and_orphans(self) -> None:
+        with self.assertNumQueries(2):
+            output = self._call()
+        self.assertIn("Solr drift: 1", output)
+        self.assertIn("local-drifted: db=1 solr=3", output)
+        self.assertIn("Cached count drift: 1", output)
+        self.assertIn("local-drifted: count_items=5 db=1", output)
+        self.assertIn("Orphans in Solr: 1", output)
+        self.assertIn("local-orphan: solr=7", output)
+        self.assertNotIn("local-in-sync:", output)
+
+    def test_fix_counts_and_enqueue_repairs(self) -> None:
+        with patch(
+            "impresso.tasks.collection_tasks.reconcile_collection.delay"
+        ) as delay:
+            output = self._call("--fix-counts", "--enqueue-repairs")
+        self.assertIn("Counts fixed: 1", output)
+        self.assertIn("Repairs enqueued: 2", output)
+        self.assertEqual(
+            [c.kwargs["collection_id"] for c in delay.call_args_list],
+            ["local-drifted", "local-orphan"],
+        )
+        self.drifted.refresh_from_db()
+        self.assertEqual(self.drifted.count_items, 1)
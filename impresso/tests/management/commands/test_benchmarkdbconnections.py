@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase
+
+from impresso.utils.db import get_connection_stats, reset_connection_stats
+
+
+class TestBenchmarkDbConnectionsCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_benchmarkdbconnections
+    """
+
+    def test_reports_both_modes_and_restores_settings(self) -> None:
+        max_age = connection.settings_dict["CONN_MAX_AGE"]
+        out = StringIO()
+        call_command(
+            "benchmarkdbconnections", "--iterations", "3", "--max-age", "30", stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn("Mode: Reconnect (CONN_MAX_AGE=0)", output)
+        self.assertIn("Mode: Persistent (CONN_MAX_AGE=30)", output)
+        self.assertIn("Connections opened:", output)
+        self.assertIn("Done.", output)
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], max_age)
+
+    def test_connection_created_is_counted_per_alias(self) -> None:
+        reset_connection_stats()
+        connection_created.send(sender=connection.__class__, connection=connection)
+        stats = get_connection_stats()
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats[f"connections_opened.{connection.alias}"], 1)
@@ -0,0 +1,27 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class TestBenchmarkEmailTemplatesCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_benchmarkemailtemplates
+    """
+
+    def test_reports_render_time_per_template(self) -> None:
+        out = StringIO()
+        call_command(
+            "benchmarkemailtemplates",
+            "pending_requests_summary_to_reviewer",
+            "account_password_reset",
+            "--iterations",
+            "2",
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("Template: pending_requests_summary_to_reviewer", output)
+        self.assertIn("Template: account_password_reset", output)
+        self.assertIn("ms/email", output)
+        self.assertIn("Cached loader total:", output)
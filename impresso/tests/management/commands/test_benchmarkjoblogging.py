@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class TestBenchmarkJobLoggingCommand(SimpleTestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_benchmarkjoblogging
+    """
+
+    def test_reports_both_modes(self) -> None:
+        out = StringIO()
+        call_command("benchmarkjoblogging", "--docs", "20", "--pages", "2", stdout=out)
+        output = out.getvalue()
+        self.assertIn("Mode: Eager", output)
+        self.assertIn("Mode: JobLogger", output)
+        self.assertIn("KB/page", output)
+        self.assertIn("Done.", output)
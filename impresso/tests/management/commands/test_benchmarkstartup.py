@@ -0,0 +1,76 @@
+import subprocess
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from impresso.management.commands.benchmarkstartup import parse_importtime
+
+IMPORTTIME_STDERR = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   impresso.utils.bitmask
+import time:      4200 |      90000 | impresso.tasks
+import time:       300 |       5000 | impresso.models
+"""
+
+
+class TestBenchmarkStartupCommand(SimpleTestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_benchmarkstartup
+    """
+
+    def _completed(self, *args, **kwargs) -> subprocess.CompletedProcess:
+        return subprocess.CompletedProcess(
+            args=args, returncode=0, stdout="", stderr=IMPORTTIME_STDERR
+        )
+
+    def test_parse_importtime(self) -> None:
+        self.assertEqual(
+            parse_importtime(IMPORTTIME_STDERR),
+            {
+                "impresso.utils.bitmask": 120,
+                "impresso.tasks": 90000,
+                "impresso.models": 5000,
+            },
+        )
+
+    def test_reports_median_and_slowest_imports(self) -> None:
+        out = StringIO()
+        with patch(
+            "impresso.management.commands.benchmarkstartup.subprocess.run",
+            side_effect=self._completed,
+        ) as run:
+            call_command(
+                "benchmarkstartup",
+                "rebuildbitmaps",
+                "--runs",
+                "3",
+                "--budget-ms",
+                "60000",
+                stdout=out,
+            )
+        self.assertEqual(run.call_count, 3)
+        self.assertIn("-X", run.call_args.args[0])
+        output = out.getvalue()
+        self.assertIn("Command: rebuildbitmaps", output)
+        self.assertLess(output.index("impresso.tasks"), output.index("impresso.models"))
+        self.assertIn("Over budget: 0", output)
+        self.assertIn("Done.", output)
+
+    def test_fails_over_budget(self) -> None:
+        with patch(
+            "impresso.management.commands.benchmarkstartup.subprocess.run",
+            side_effect=self._completed,
+        ):
+            with self.assertRaisesMessage(CommandError, "rebuildbitmaps"):
+                call_command(
+                    "benchmarkstartup",
+                    "rebuildbitmaps",
+                    "--runs",
+                    "1",
+                    "--budget-ms",
+                    "0",
+                    stdout=StringIO(),
+                )
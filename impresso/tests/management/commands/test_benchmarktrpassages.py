@@ -0,0 +1,63 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+COLLECTION_ID = "local-testuser-abc"
+PASSAGES = {"a": ["a-1", "a-2"], "b": [], "c": ["c-1"]}
+
+
+def fake_iter_all(q, url, fl="id", rows=1000, **kwargs):
+    if url == settings.IMPRESSO_SOLR_URL_SELECT:
+        return iter([{"id": ci_id} for ci_id in PASSAGES])
+    # join query on the passages core
+    return iter([{"id": i} for ids in PASSAGES.values() for i in ids])
+
+
+def fake_find_all(q, url, fl, skip, limit, sort):
+    ids = [
+        i
+        for clause in q.split(" OR ")
+        for i in PASSAGES[clause.removeprefix("ci_id_s:")]
+    ]
+    return {
+        "response": {
+            "numFound": len(ids),
+            "docs": [{"id": i} for i in ids[skip : skip + limit]],
+        }
+    }
+
+
+@patch(
+    "impresso.management.commands.benchmarktrpassages.find_all",
+    side_effect=fake_find_all,
+)
+@patch(
+    "impresso.management.commands.benchmarktrpassages.iter_all",
+    side_effect=fake_iter_all,
+)
+class TestBenchmarkTrPassagesCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_benchmarktrpassages
+    """
+
+    def test_compares_id_lists_and_join(self, iter_all, find_all) -> None:
+        out = StringIO()
+        call_command(
+            "benchmarktrpassages", COLLECTION_ID, "--chunk-size", "2", stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn("Mode: Id lists", output)
+        self.assertIn("Mode: Join", output)
+        self.assertIn("Passages: 3", output)
+        self.assertIn("Same passages: yes", output)
+        self.assertIn("Max clauses per id list query: 2", output)
+        self.assertIn("Done.", output)
+        self.assertIn(
+            "{!join fromIndex=", iter_all.call_args_list[-1].kwargs["q"]
+        )
+        # two id lists: a, b then c
+        self.assertEqual(find_all.call_count, 2)
@@ -106,3 +106,31 @@ class TestCheckTemporaryMembershipsCommand(TestCase):
         self.assertIn("Running in DRY RUN mode.", output)
         self.assertIn("Found 0 special memberships with temporary approval.", output)
         self.assertIn("Dry run completed: task dispatch skipped.", output)
+
+    def test_expiring_within_hours(self) -> None:
+        expiring_req = UserSpecialMembershipRequest.objects.create(
+            user=self.user1,
+            subscription=self.dataset,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+            temporary_expires_at=timezone.now() + timedelta(hours=2),
+        )
+        later_req = UserSpecialMembershipRequest.objects.create(
+            user=self.user2,
+            subscription=self.dataset,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+            temporary_expires_at=timezone.now() + timedelta(days=3),
+        )
+
+        out = StringIO()
+        call_command(
+            "checktemporarymemberships",
+            "--dry-run",
+            "--expiring-within-hours",
+            "6",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("Found 1 special memberships with temporary approval.", output)
+        self.assertIn(f"Request ID: {expiring_req.pk}", output)
+        self.assertNotIn(f"Request ID: {later_req.pk},", output)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from impresso.models import SpecialMembershipDataset, UserBitmap
+from impresso.utils.bitmask import int_to_bytes
+from impresso.utils.models.userBitmap import compute_user_bitmaps
+
+
+class TestRebuildBitmapsCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_rebuildbitmaps
+    """
+
+    def setUp(self) -> None:
+        researcher_group = Group.objects.create(
+            name=settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER
+        )
+        self.dataset = SpecialMembershipDataset.objects.create(
+            bitmap_position=6, title="Dataset Rebuild"
+        )
+        self.guest = User.objects.create_user(username="guest", password="x")
+        self.guest_bitmap = UserBitmap.objects.create(user=self.guest)
+
+        self.researcher = User.objects.create_user(username="researcher", password="x")
+        self.researcher_bitmap = UserBitmap.objects.create(user=self.researcher)
+        self.researcher_bitmap.date_accepted_terms = timezone.now()
+        self.researcher_bitmap.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.researcher.groups.add(researcher_group)
+            self.researcher_bitmap.subscriptions.add(self.dataset)
+        self.researcher_bitmap.refresh_from_db()
+
+    def test_compute_user_bitmaps_matches_get_up_to_date_bitmap(self) -> None:
+        expected = compute_user_bitmaps()
+        for user_bitmap in UserBitmap.objects.all():
+            self.assertEqual(
+                expected[user_bitmap.pk],
+                int.from_bytes(user_bitmap.get_up_to_date_bitmap(), byteorder="big"),
+            )
+        self.assertEqual(expected[self.researcher_bitmap.pk], 0b1001011)
+
+    def test_dry_run_reports_diff_without_saving(self) -> None:
+        UserBitmap.objects.filter(pk=self.researcher_bitmap.pk).update(
+            bitmap=int_to_bytes(0b11)
+        )
+        out = StringIO()
+        call_command("rebuildbitmaps", "--dry-run", stdout=out)
+
+        self.researcher_bitmap.refresh_from_db()
+        self.assertEqual(self.researcher_bitmap.get_bitmap_as_int(), 0b11)
+        output = out.getvalue()
+        self.assertIn("Changed: \033[33m1", output)
+        self.assertIn("User: researcher", output)
+        self.assertIn("Expected: 0b1001011", output)
+        self.assertIn("Dry run completed: 1 bitmaps need to be rebuilt.", output)
+
+    def test_rebuilds_stale_bitmaps(self) -> None:
+        UserBitmap.objects.filter(pk=self.researcher_bitmap.pk).update(
+            bitmap=int_to_bytes(0b11)
+        )
+        UserBitmap.objects.filter(pk=self.guest_bitmap.pk).update(
+            bitmap=int_to_bytes(0b11)
+        )
+        out = StringIO()
+        # 5 set-based reads, then one bulk update per chunk
+        with self.assertNumQueries(7):
+            call_command("rebuildbitmaps", "--chunk-size", "1", stdout=out)
+
+        self.researcher_bitmap.refresh_from_db()
+        self.guest_bitmap.refresh_from_db()
+        self.assertEqual(self.researcher_bitmap.get_bitmap_as_int(), 0b1001011)
+        self.assertEqual(
+            self.guest_bitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_GUEST
+        )
+        output = out.getvalue()
+        self.assertIn("Progress: 2/2 bitmaps saved", output)
+        self.assertIn("Rebuilt 2 user bitmaps.", output)
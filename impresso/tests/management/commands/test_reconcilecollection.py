@@ -0,0 +1,158 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from impresso.models import CollectableItem, Collection
+from impresso.utils.models.collection import (
+    iter_collectable_item_ids,
+    merge_sorted_ids,
+)
+
+COLLECTION_ID = "local-testuser-abc"
+
+
+def fake_iter_all(q, url, fl="id", sort="id asc", fq="", rows=1000, **kwargs):
+    """
+    Articles index: b, c, d are tagged with the collection.
+    TR passages: passages of c are tagged, e-1 is a tagged passage of e
+    (not in the collection), a-1 is an untagged passage of a.
+    """
+    if url == settings.IMPRESSO_SOLR_URL_SELECT:
+        return iter([{"id": i} for i in ("b", "c", "d")])
+    if q == f"ucoll_ss:{COLLECTION_ID}" and not fq:
+        return iter(
+            [
+                {"id": "c-1", "ci_id_s": "c"},
+                {"id": "c-2", "ci_id_s": "c"},
+                {"id": "e-1", "ci_id_s": "e"},
+            ]
+        )
+    if q == "*:*" and '"a"' in fq:
+        return iter([{"id": "a-1", "ci_id_s": "a"}])
+    if q == f"ucoll_ss:{COLLECTION_ID}" and '"e"' in fq:
+        return iter([{"id": "e-1", "ci_id_s": "e"}])
+    return iter([])
+
+
+@patch(
+    "impresso.management.commands.reconcilecollection.iter_all",
+    side_effect=fake_iter_all,
+)
+class TestReconcileCollectionCommand(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.management.commands.test_reconcilecollection
+    """
+
+    def setUp(self) -> None:
+        user = User.objects.create_user(username="testuser")
+        self.collection = Collection.objects.create(
+            id=COLLECTION_ID, name="Collection", creator=user
+        )
+        CollectableItem.objects.bulk_create(
+            CollectableItem(
+                item_id=item_id,
+                content_type=CollectableItem.ARTICLE,
+                collection=self.collection,
+            )
+            for item_id in ("c", "a", "b")
+        )
+        Collection.objects.filter(pk=COLLECTION_ID).update(count_items=3)
+
+    def test_merge_sorted_ids(self, _iter_all) -> None:
+        self.assertEqual(
+            list(merge_sorted_ids(["a", "b", "b"], ["b", "c"])),
+            [("a", (True, False)), ("b", (True, True)), ("c", (False, True))],
+        )
+        with self.assertRaises(ValueError):
+            list(merge_sorted_ids(["b", "a"], []))
+
+    def test_iter_collectable_item_ids_mixed_case(self, _iter_all) -> None:
+        item_ids = ["excelsior-1900-01-01-a-i0001", "GDL-1900-01-01-a-i0001", "Zz-1"]
+        CollectableItem.objects.bulk_create(
+            CollectableItem(
+                item_id=item_id,
+                content_type=CollectableItem.ARTICLE,
+                collection=self.collection,
+            )
+            for item_id in item_ids
+        )
+        with CaptureQueriesContext(connection) as context:
+            ids = list(iter_collectable_item_ids(COLLECTION_ID, chunk_size=2))
+        # code point order, as Solr: upper case first
+        self.assertEqual(ids, sorted(["a", "b", "c"] + item_ids))
+        self.assertEqual(ids[0], "GDL-1900-01-01-a-i0001")
+        # order and keyset filter are both binary, whatever the column collation
+        for query in context.captured_queries[1:]:
+            self.assertEqual(query["sql"].count("COLLATE"), 2)
+        self.assertEqual(list(merge_sorted_ids(ids, sorted(ids)))[-1][0], ids[-1])
+
+    def test_lists_differences_in_a_single_pass(self, _iter_all) -> None:
+        out = StringIO()
+        call_command(
+            "reconcilecollection", COLLECTION_ID, "--chunk-size", "2", stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn("missing_in_articles: a", output)
+        self.assertIn("extra_in_articles: d", output)
+        self.assertIn("missing_in_tr: a-1", output)
+        self.assertIn("extra_in_tr: e", output)
+        self.assertIn("Items in db: 3", output)
+        self.assertIn("Differences: 4", output)
+        self.assertIn("Repaired: 0", output)
+
+    def test_repair_solr(self, _iter_all) -> None:
+        with patch.object(Collection, "add_items_to_index") as add, patch.object(
+            Collection, "remove_items_from_index"
+        ) as remove:
+            call_command(
+                "reconcilecollection",
+                COLLECTION_ID,
+                "--repair",
+                "solr",
+                stdout=StringIO(),
+            )
+        added = [c.kwargs["items_ids"] for c in add.call_args_list]
+        removed = [c.kwargs["items_ids"] for c in remove.call_args_list]
+        self.assertCountEqual(added, [["a"], ["a-1"]])
+        self.assertCountEqual(removed, [["d"], ["e-1"]])
+
+    def test_repair_db(self, _iter_all) -> None:
+        call_command(
+            "reconcilecollection",
+            COLLECTION_ID,
+            "--repair",
+            "db",
+            "--skip-tr",
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            sorted(
+                CollectableItem.objects.filter(collection=self.collection).values_list(
+                    "item_id", flat=True
+                )
+            ),
+            ["b", "c", "d"],
+        )
+        self.collection.refresh_from_db()
+        # -1 for a, +1 for d
+        self.assertEqual(self.collection.count_items, 3)
+
+    def test_repair_solr_untags_orphan_collection(self, _iter_all) -> None:
+        self.collection.delete()
+        with patch.object(Collection, "remove_items_from_index") as remove:
+            call_command(
+                "reconcilecollection",
+                COLLECTION_ID,
+                "--repair",
+                "solr",
+                "--skip-tr",
+                stdout=StringIO(),
+            )
+        self.assertEqual(remove.call_args.kwargs["items_ids"], ["b", "c", "d"])
@@ -1,7 +1,9 @@
+import json
 from datetime import timedelta
 from io import StringIO
 
 from django.contrib.auth.models import User
+from django.core import mail
 from django.core.management import call_command
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -56,6 +58,8 @@ class TestRevokeMembershipAccessCommand(TestCase):
             date_created=created_at
         )
         request.refresh_from_db()
+        # recompute the stored revoke_at from the new date_created
+        request.save_without_signals()
 
     def _get_expected_admin_url(self, request_id: int) -> str:
         return "https://admin.example.test" + reverse(
@@ -138,6 +142,37 @@ class TestRevokeMembershipAccessCommand(TestCase):
             "Revoked 1 approved special memberships that needed revocation.", output
         )
 
+    def test_batch_mode_revokes_and_sends_emails_in_batch(self) -> None:
+        revokable_request = UserSpecialMembershipRequest.objects.create(
+            user=self.user_revokable,
+            subscription=self.dataset_revokable,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED,
+        )
+        self._set_request_created_at(
+            revokable_request, timezone.now() - timedelta(days=10)
+        )
+        self.user_revokable.refresh_from_db()
+        self.assertEqual(self.user_revokable.bitmap.subscriptions.count(), 1)
+        mail.outbox = []
+
+        out = StringIO()
+        call_command("revokemembershipaccess", "--batch", stdout=out)
+
+        revokable_request.refresh_from_db()
+        self.user_revokable.refresh_from_db()
+        self.assertEqual(
+            revokable_request.status, UserSpecialMembershipRequest.STATUS_REVOKED
+        )
+        self.assertEqual(self.user_revokable.bitmap.subscriptions.count(), 0)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["revokable@example.com"])
+
+        output = out.getvalue()
+        self.assertIn("Batch emails: 1 sent, 0 failed in 1 batch(es).", output)
+        self.assertIn(
+            "Revoked 1 approved special memberships that needed revocation.", output
+        )
+
     def test_keeps_recent_approved_request_active(self) -> None:
         active_request = UserSpecialMembershipRequest.objects.create(
             user=self.user_active,
@@ -189,3 +224,64 @@ class TestRevokeMembershipAccessCommand(TestCase):
         self.assertIn(
             "Revoked 0 approved special memberships that needed revocation.", output
         )
+
+    def test_stream_mode_writes_json_lines_and_revokes_in_bulk(self) -> None:
+        revokable_request = UserSpecialMembershipRequest.objects.create(
+            user=self.user_revokable,
+            subscription=self.dataset_revokable,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED,
+        )
+        self._set_request_created_at(
+            revokable_request, timezone.now() - timedelta(days=10)
+        )
+        active_request = UserSpecialMembershipRequest.objects.create(
+            user=self.user_active,
+            subscription=self.dataset_active,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED,
+        )
+        self._set_request_created_at(active_request, timezone.now() - timedelta(days=2))
+        non_revokable_request = UserSpecialMembershipRequest.objects.create(
+            user=self.user_non_revokable,
+            subscription=self.dataset_missing_metadata,
+            status=UserSpecialMembershipRequest.STATUS_APPROVED,
+        )
+        mail.outbox = []
+
+        out = StringIO()
+        call_command(
+            "revokemembershipaccess", "--stream", "--chunk-size", "1", stdout=out
+        )
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines() if line]
+        records = {line["request_id"]: line for line in lines[:-1]}
+        self.assertEqual(records[revokable_request.pk]["state"], "revocation_needed")
+        self.assertEqual(
+            records[revokable_request.pk]["admin_url"],
+            self._get_expected_admin_url(revokable_request.pk),
+        )
+        self.assertEqual(records[revokable_request.pk]["revoke_after_days"], 3.0)
+        self.assertEqual(
+            records[revokable_request.pk]["revoke_at"],
+            (revokable_request.date_created + timedelta(days=3)).isoformat(),
+        )
+        self.assertEqual(records[active_request.pk]["state"], "active")
+        self.assertEqual(records[non_revokable_request.pk]["state"], "non_revokable")
+        self.assertIsNone(records[non_revokable_request.pk]["revoke_at"])
+        self.assertEqual(lines[-1]["event"], "summary")
+        self.assertEqual(lines[-1]["revocation_needed"], 1)
+        self.assertEqual(lines[-1]["active"], 1)
+        self.assertEqual(lines[-1]["non_revokable"], 1)
+        self.assertEqual(lines[-1]["revoked"], 1)
+        self.assertEqual(lines[-1]["emails_sent"], 1)
+
+        revokable_request.refresh_from_db()
+        active_request.refresh_from_db()
+        self.assertEqual(
+            revokable_request.status, UserSpecialMembershipRequest.STATUS_REVOKED
+        )
+        self.assertEqual(
+            active_request.status, UserSpecialMembershipRequest.STATUS_APPROVED
+        )
+        self.user_revokable.refresh_from_db()
+        self.assertEqual(self.user_revokable.bitmap.subscriptions.count(), 0)
+        self.assertEqual(mail.outbox[0].to, ["revokable@example.com"])
@@ -62,6 +62,40 @@ class TestSendReviewReminderCommand(TestCase):
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn("Pending Special Membership Request", mail.outbox[0].subject)
 
+    def test_batch_mode_sends_emails_over_single_connection(self) -> None:
+        second_reviewer = User.objects.create_user(
+            username="second_reviewer",
+            email="second.reviewer@example.com",
+            password="testpass123",
+        )
+        UserSpecialMembershipRequest.objects.create(
+            user=self.user1,
+            reviewer=self.reviewer,
+            subscription=self.dataset,
+            status=UserSpecialMembershipRequest.STATUS_PENDING,
+        )
+        UserSpecialMembershipRequest.objects.create(
+            user=self.user2,
+            reviewer=second_reviewer,
+            subscription=self.dataset,
+            status=UserSpecialMembershipRequest.STATUS_PENDING,
+        )
+        mail.outbox = []
+        out = StringIO()
+        call_command(
+            "sendreviewreminder", "summary", "--batch", "--batch-size", "1", stdout=out
+        )
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["reviewer@example.com", "second.reviewer@example.com"],
+        )
+        output = out.getvalue()
+        self.assertIn("Reminder email queued for reviewer@example.com", output)
+        self.assertIn("Batch sending: 2 batch(es), 2 sent, 0 failed", output)
+        self.assertIn("OK Successfully sent 2 email(s)", output)
+
     def test_gentle_reminder_mode_applies_days_filter(self) -> None:
         old_request = UserSpecialMembershipRequest.objects.create(
             user=self.user1,
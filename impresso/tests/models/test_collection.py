@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ...models import CollectableItem, Collection
+from ...utils.models.collection import (
+    add_collectable_items,
+    reconcile_collection_count_items,
+    remove_collectable_items,
+)
+
+
+class CollectionCountItemsTestCase(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.models.test_collection
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="12345")
+        self.collection = Collection.objects.create(
+            id="local-testuser-abc", name="Collection", creator=self.user
+        )
+
+    def _items(self, *items_ids):
+        return [
+            CollectableItem(
+                item_id=item_id,
+                content_type=CollectableItem.ARTICLE,
+                collection_id=self.collection.pk,
+            )
+            for item_id in items_ids
+        ]
+
+    def test_count_items_follows_added_and_removed_items(self):
+        self.assertEqual(
+            add_collectable_items(self.collection.pk, self._items("a", "b", "c")), 3
+        )
+        # already collected items are not counted twice
+        self.assertEqual(
+            add_collectable_items(self.collection.pk, self._items("c", "d")), 1
+        )
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.count_items, 4)
+
+        self.assertEqual(
+            remove_collectable_items(self.collection.pk, ["a", "d", "missing"]), 2
+        )
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.count_items, 2)
+
+    def test_count_items_never_goes_below_zero(self):
+        Collection.increment_count_items(self.collection.pk, -5)
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.count_items, 0)
+
+    def test_reconcile_fixes_drifted_counts_only(self):
+        add_collectable_items(self.collection.pk, self._items("a", "b"))
+        in_sync = Collection.objects.create(
+            id="local-testuser-def", name="In sync", creator=self.user
+        )
+        Collection.objects.filter(pk=self.collection.pk).update(count_items=10)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(reconcile_collection_count_items(), 1)
+        self.collection.refresh_from_db()
+        in_sync.refresh_from_db()
+        self.assertEqual(self.collection.count_items, 2)
+        self.assertEqual(in_sync.count_items, 0)
@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.db import transaction
 from django.test import TestCase
 from django.contrib.auth.models import User, Group
 from ...models import Profile, UserBitmap, SpecialMembershipDataset
+from ...models.userBitmap import pending_user_bitmap_changes
 from django.utils import timezone
 from ...utils.bitmask import BitMask64, is_access_allowed
 
@@ -64,7 +66,8 @@ class UserBitmapTestCase(TestCase):
             "User has only access to public domain content as the terms have not been accepted yet",
         )
         # just add user to the researcher group
-        self.user.groups.add(self.groupPlanResearcher)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.add(self.groupPlanResearcher)
         # test update_user_bitmap_on_user_groups_changed signal
         self.userBitmap.refresh_from_db()
 
@@ -86,9 +89,10 @@ class UserBitmapTestCase(TestCase):
         self.userBitmap.date_accepted_terms = timezone.now()
         self.userBitmap.save()
 
-        self.userBitmap.subscriptions.add(
-            self.test_subscription_domain_B,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.userBitmap.subscriptions.add(
+                self.test_subscription_domain_B,
+            )
         # adding a subscription trigger a post_save, let's get it back
         self.userBitmap.refresh_from_db()
         self.assertEqual(
@@ -98,8 +102,11 @@ class UserBitmapTestCase(TestCase):
         )
 
         # remove the subscription to B and add the subscription to A
-        self.userBitmap.subscriptions.remove(self.test_subscription_domain_B)
-        self.userBitmap.subscriptions.add(self.test_subscription_domain_A)
+        # both changes are coalesced in a single bitmap update on commit
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.userBitmap.subscriptions.remove(self.test_subscription_domain_B)
+            self.userBitmap.subscriptions.add(self.test_subscription_domain_A)
+        self.assertEqual(len(callbacks), 1)
         self.userBitmap.refresh_from_db()
 
         self.assertEqual(
@@ -108,9 +115,10 @@ class UserBitmapTestCase(TestCase):
             "User researcher has access to subscription TEST A",
         )
 
-        self.userBitmap.subscriptions.add(
-            self.test_subscription_domain_C,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.userBitmap.subscriptions.add(
+                self.test_subscription_domain_C,
+            )
         self.userBitmap.refresh_from_db()
         self.assertEqual(
             [x for x in self.userBitmap.subscriptions.values_list("title", flat=True)],
@@ -158,7 +166,8 @@ class UserBitmapTestCase(TestCase):
             "User does NOT have access to content {content_bitmask}",
         )
         # add the correct subscription
-        self.userBitmap.subscriptions.add(self.test_subscription_domain_D)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.userBitmap.subscriptions.add(self.test_subscription_domain_D)
         self.userBitmap.refresh_from_db()
         self.assertTrue(
             is_access_allowed(BitMask64(self.userBitmap.bitmap), content_bitmask),
@@ -175,7 +184,8 @@ class UserBitmapTestCase(TestCase):
         self.assertTrue(result, "User has still access to content 1010....")
 
         # clear all subscription!
-        self.userBitmap.subscriptions.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.userBitmap.subscriptions.clear()
         self.userBitmap.refresh_from_db()
         self.assertEqual(
             self.userBitmap.get_bitmap_as_int(),
@@ -189,3 +199,65 @@ class UserBitmapTestCase(TestCase):
             ),
             "However, user has no more access to content subscription D!",
         )
+
+    def test_user_bitmap_changes_are_coalesced_on_commit(self):
+        self.userBitmap.date_accepted_terms = timezone.now()
+        self.userBitmap.save()
+        groupPlanBasic = Group.objects.create(
+            name=settings.IMPRESSO_GROUP_USER_PLAN_BASIC
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.groups.add(groupPlanBasic)
+            self.user.groups.add(self.groupPlanEducational)
+            self.user.groups.add(self.groupPlanResearcher)
+            # the bitmap is left untouched until the transaction commits
+            self.userBitmap.refresh_from_db()
+            self.assertEqual(
+                self.userBitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_AUTH_USER
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.userBitmap.refresh_from_db()
+        self.assertEqual(
+            self.userBitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_RESEARCHER
+        )
+
+    def test_user_bitmap_subscription_change_sets_single_bit(self):
+        self.userBitmap.date_accepted_terms = timezone.now()
+        self.userBitmap.save()
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            # only the m2m select + insert, the signal itself does not query the db
+            with self.assertNumQueries(2):
+                self.userBitmap.subscriptions.add(self.test_subscription_domain_B)
+        # flushing: get bitmap, get bitmap positions, update bitmap
+        with self.assertNumQueries(3):
+            callbacks[0]()
+        self.userBitmap.refresh_from_db()
+        self.assertEqual(self.userBitmap.get_bitmap_as_int(), 0b1000011)
+
+        # unrelated bits set by previous writes are preserved
+        with self.captureOnCommitCallbacks(execute=True):
+            self.userBitmap.subscriptions.add(self.test_subscription_domain_D)
+            self.userBitmap.subscriptions.remove(self.test_subscription_domain_B)
+        self.userBitmap.refresh_from_db()
+        self.assertEqual(self.userBitmap.get_bitmap_as_int(), 0b100000011)
+
+    def test_user_bitmap_rolled_back_changes_are_discarded(self):
+        self.userBitmap.date_accepted_terms = timezone.now()
+        self.userBitmap.save()
+        key = ("default", self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.userBitmap.subscriptions.add(self.test_subscription_domain_B)
+                self.assertIn(key, pending_user_bitmap_changes.changes)
+                raise RuntimeError()
+            # the entry was dropped with the callback of the savepoint
+            self.assertNotIn(key, pending_user_bitmap_changes.changes)
+            self.userBitmap.subscriptions.add(self.test_subscription_domain_D)
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                # recorded in the entry of the outer transaction
+                self.userBitmap.subscriptions.add(self.test_subscription_domain_A)
+                raise RuntimeError()
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotIn(key, pending_user_bitmap_changes.changes)
+        self.userBitmap.refresh_from_db()
+        self.assertEqual(self.userBitmap.get_bitmap_as_int(), 0b100000011)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -158,3 +160,67 @@ class UserSpecialMembershipRequestTestCase(TransactionTestCase):
             3,
             "The user should have three subscriptions after admin assignment.",
         )
+
+
+class UserSpecialMembershipRequestRevokeAtTestCase(TestCase):
+    """
+    The stored revoke_at follows the status, the temporary expiration date and
+    the revokeAfterDays metadata of the dataset.
+
+    ENV=test pipenv run ./manage.py test impresso.tests.models.test_userSpecialMembershipRequest.UserSpecialMembershipRequestRevokeAtTestCase
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username="testuser-revoke-at", password="12345", email="jane@does.it"
+        )
+        self.dataset = SpecialMembershipDataset.objects.create(
+            bitmap_position=7,
+            title="Domain of TEST C archives",
+            metadata={"revokeAfterDays": 10},
+        )
+
+    def test_revoke_at_is_kept_in_sync(self) -> None:
+        req = UserSpecialMembershipRequest(
+            user=self.user,
+            subscription=self.dataset,
+            status=UserSpecialMembershipRequest.STATUS_PENDING,
+        )
+        req.save_without_signals()
+        self.assertIsNone(req.revoke_at)
+
+        req.status = UserSpecialMembershipRequest.STATUS_APPROVED
+        req.save_without_signals()
+        req.refresh_from_db()
+        self.assertEqual(req.revoke_at, req.date_created + timedelta(days=10))
+
+        # the dataset metadata changes: a single UPDATE on the related requests
+        self.dataset.metadata = {"revokeAfterDays": 2}
+        with self.assertNumQueries(2):
+            self.dataset.save()
+        req.refresh_from_db()
+        self.assertEqual(req.revoke_at, req.date_created + timedelta(days=2))
+
+        self.dataset.metadata = {}
+        self.dataset.save()
+        req.refresh_from_db()
+        self.assertIsNone(req.revoke_at)
+
+        expires_at = timezone.now() + timedelta(hours=5)
+        req.status = UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY
+        req.temporary_expires_at = expires_at
+        req.save_without_signals()
+        req.refresh_from_db()
+        self.assertEqual(req.revoke_at, expires_at)
+        self.assertEqual(
+            UserSpecialMembershipRequest.objects.filter(
+                status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+                revoke_at__lte=timezone.now() + timedelta(hours=6),
+            ).count(),
+            1,
+        )
+
+        req.status = UserSpecialMembershipRequest.STATUS_REVOKED
+        req.save_without_signals()
+        req.refresh_from_db()
+        self.assertIsNone(req.revoke_at)
@@ -0,0 +1,206 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import fakeredis
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from impresso.models import (
+    CollectableItem,
+    Collection,
+    SpecialMembershipDataset,
+    UserSpecialMembershipRequest,
+)
+from impresso.tasks.periodic_tasks import (
+    periodic_gc_orphan_collection_ids,
+    periodic_reconcile_collection_count_items,
+    periodic_revoke_expired_memberships,
+    periodic_send_review_reminders,
+)
+from impresso.utils.tasks.periodic import (
+    LOCK_KEY_PREFIX,
+    get_watermark,
+    set_watermark,
+    singleton_lock,
+)
+
+
+class TestPeriodicTasks(TestCase):
+    """
+    Test the celery beat periodic tasks, with an in-memory Redis.
+
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.tasks.test_periodic_tasks
+    """
+
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = patch(
+            "impresso.utils.tasks.periodic.get_redis_client", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.reviewer = User.objects.create_user(
+            username="reviewer", email="reviewer@example.com"
+        )
+        self.dataset = SpecialMembershipDataset.objects.create(
+            bitmap_position=9,
+            title="Periodic Dataset",
+            metadata={"revokeAfterDays": 3},
+            reviewer=self.reviewer,
+        )
+        self.created_users = 0
+
+    def _create_request(self, status: str, **kwargs) -> UserSpecialMembershipRequest:
+        self.created_users += 1
+        user = User.objects.create_user(
+            username=f"user-{self.created_users}",
+            email=f"user-{self.created_users}@example.com",
+        )
+        return UserSpecialMembershipRequest.objects.create(
+            user=user, subscription=self.dataset, status=status, **kwargs
+        )
+
+    def test_revokes_expired_memberships_once(self) -> None:
+        expired_temporary = self._create_request(
+            UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+            temporary_expires_at=timezone.now() - timedelta(hours=1),
+        )
+        expired_approved = self._create_request(
+            UserSpecialMembershipRequest.STATUS_APPROVED
+        )
+        UserSpecialMembershipRequest.objects.filter(pk=expired_approved.pk).update(
+            revoke_at=timezone.now() - timedelta(minutes=1)
+        )
+        active = self._create_request(UserSpecialMembershipRequest.STATUS_APPROVED)
+        mail.outbox = []
+
+        result = periodic_revoke_expired_memberships.delay().get()
+
+        self.assertEqual(result["revoked"], 2)
+        self.assertIsNone(result["since"])
+        self.assertEqual(len(mail.outbox), 2)
+        for req, status in (
+            (expired_temporary, UserSpecialMembershipRequest.STATUS_REVOKED),
+            (expired_approved, UserSpecialMembershipRequest.STATUS_REVOKED),
+            (active, UserSpecialMembershipRequest.STATUS_APPROVED),
+        ):
+            req.refresh_from_db()
+            self.assertEqual(req.status, status)
+        watermark = get_watermark("revoke_expired_memberships")
+        assert watermark is not None
+        self.assertEqual(watermark.isoformat(), result["until"])
+        # the lock is released
+        self.assertEqual(self.redis.keys(f"{LOCK_KEY_PREFIX}*"), [])
+
+        # the next run only sees what expired in between: nothing
+        result = periodic_revoke_expired_memberships.delay().get()
+        self.assertEqual(result["revoked"], 0)
+        self.assertIsNotNone(result["since"])
+
+    def test_skips_when_another_run_holds_the_lock(self) -> None:
+        expired_temporary = self._create_request(
+            UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+            temporary_expires_at=timezone.now() - timedelta(hours=1),
+        )
+        with singleton_lock("revoke_expired_memberships") as acquired:
+            self.assertTrue(acquired)
+            result = periodic_revoke_expired_memberships.delay().get()
+        self.assertEqual(result, {"skipped": True})
+        expired_temporary.refresh_from_db()
+        self.assertEqual(
+            expired_temporary.status,
+            UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+        )
+        self.assertIsNone(get_watermark("revoke_expired_memberships"))
+
+    def test_lock_and_watermark_with_bytes_responses(self) -> None:
+        client = fakeredis.FakeRedis()
+        with singleton_lock("gc", client=client) as acquired:
+            self.assertTrue(acquired)
+        self.assertEqual(client.keys(f"{LOCK_KEY_PREFIX}*"), [])
+        now = timezone.now()
+        set_watermark("gc", now, client=client)
+        self.assertEqual(get_watermark("gc", client=client), now)
+
+    def test_review_reminders_only_cover_new_requests(self) -> None:
+        self._create_request(UserSpecialMembershipRequest.STATUS_PENDING)
+        mail.outbox = []
+
+        periodic_send_review_reminders.delay()
+        self.assertEqual(
+            [m.to for m in mail.outbox if "Pending" in m.subject],
+            [["reviewer@example.com"]],
+        )
+
+        mail.outbox = []
+        periodic_send_review_reminders.delay()
+        self.assertEqual(len(mail.outbox), 0)
+
+        self._create_request(UserSpecialMembershipRequest.STATUS_PENDING)
+        mail.outbox = []
+        periodic_send_review_reminders.delay()
+        self.assertEqual(
+            [m.to for m in mail.outbox if "Pending" in m.subject],
+            [["reviewer@example.com"]],
+        )
+
+    def test_reconciles_collection_count_items(self) -> None:
+        collection = Collection.objects.create(
+            id="local-reviewer-abc", name="Collection", creator=self.reviewer
+        )
+        CollectableItem.objects.create(
+            item_id="item-1",
+            content_type=CollectableItem.ARTICLE,
+            collection=collection,
+        )
+        result = periodic_reconcile_collection_count_items.delay().get()
+        self.assertEqual(result, {"skipped": False, "fixed": 1})
+        collection.refresh_from_db()
+        self.assertEqual(collection.count_items, 1)
+
+    def test_gc_orphan_collection_ids(self) -> None:
+        user = User.objects.create_user(username="collector")
+        Collection.objects.create(id="local-kept", name="Kept", creator=user)
+        docs = [
+            {"id": "a", "ucoll_ss": ["local-kept", "local-gone"]},
+            {"id": "b", "ucoll_ss": ["local-gone"]},
+            {"id": "c", "ucoll_ss": ["local-gone", "local-removed"]},
+        ]
+        with patch(
+            "impresso.utils.tasks.collection.get_facet_counts",
+            return_value={"local-gone": 3, "local-kept": 1, "local-removed": 1},
+        ), patch(
+            "impresso.utils.tasks.collection.iter_all",
+            side_effect=lambda **kwargs: iter(docs),
+        ) as iter_all, patch(
+            "impresso.utils.tasks.collection.update"
+        ) as update, self.settings(
+            IMPRESSO_UCOLL_GC_BATCH_SIZE=2,
+            IMPRESSO_UCOLL_GC_SLEEP=0,
+            IMPRESSO_UCOLL_GC_MAX_DOCS=0,
+        ):
+            result = periodic_gc_orphan_collection_ids.delay().get()
+        summary = {"orphans": 2, "updated": 3}
+        self.assertEqual(
+            result, {"skipped": False, "articles": summary, "tr_passages": summary}
+        )
+        self.assertEqual(
+            iter_all.call_args.kwargs["q"], 'ucoll_ss:("local-gone" OR "local-removed")'
+        )
+        # two update requests per core, existing collections are kept
+        self.assertEqual(update.call_count, 4)
+        self.assertEqual(
+            update.call_args_list[0].kwargs["todos"],
+            [
+                {"id": "a", "ucoll_ss": {"remove": ["local-gone"]}},
+                {"id": "b", "ucoll_ss": {"remove": ["local-gone"]}},
+            ],
+        )
+        self.assertEqual(
+            update.call_args_list[1].kwargs["todos"],
+            [{"id": "c", "ucoll_ss": {"remove": ["local-gone", "local-removed"]}}],
+        )
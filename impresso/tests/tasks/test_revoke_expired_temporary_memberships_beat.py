@@ -1,13 +1,24 @@
 from datetime import timedelta
 
 from django.contrib.auth.models import User
+from django.core import mail
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from impresso.models import SpecialMembershipDataset, UserSpecialMembershipRequest
+from impresso.models import (
+    SpecialMembershipDataset,
+    UserBitmap,
+    UserSpecialMembershipRequest,
+)
 from impresso.tasks.userSpecialMembershipRequest_tasks import (
     revoke_expired_temporary_memberships,
 )
+from impresso.utils.tasks.email import EmailDispatcher
+from impresso.utils.tasks.userSpecialMembershipRequest import (
+    revoke_special_membership_requests_in_batch,
+)
 
 
 class TestRevokeExpiredTemporaryMembershipsBeat(TestCase):
@@ -64,3 +75,80 @@ class TestRevokeExpiredTemporaryMembershipsBeat(TestCase):
         )
         self.assertEqual(self.expired_user.bitmap.subscriptions.count(), 0)
         self.assertEqual(self.active_user.bitmap.subscriptions.count(), 1)
+
+    def test_batch_revocation_is_a_single_pass(self) -> None:
+        def create_expired_requests(count: int) -> list[UserSpecialMembershipRequest]:
+            requests = []
+            for i in range(count):
+                user = User.objects.create_user(
+                    username=f"batch-{count}-{i}",
+                    email=f"batch-{count}-{i}@example.com",
+                )
+                requests.append(
+                    UserSpecialMembershipRequest.objects.create(
+                        user=user,
+                        subscription=self.dataset,
+                        status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+                        temporary_expires_at=timezone.now() - timedelta(days=1),
+                    )
+                )
+            return requests
+
+        def revoke_in_batch() -> int:
+            mail.outbox = []
+            with CaptureQueriesContext(connection) as context:
+                revoke_expired_temporary_memberships.delay(batch=True)
+            return len(context.captured_queries)
+
+        create_expired_requests(2)
+        queries_with_few_requests = revoke_in_batch()
+        self.assertEqual(len(mail.outbox), 2)
+
+        requests = create_expired_requests(12)
+        self.assertEqual(revoke_in_batch(), queries_with_few_requests)
+        self.assertEqual(len(mail.outbox), 12)
+        for req in requests:
+            req.refresh_from_db()
+            self.assertEqual(req.status, UserSpecialMembershipRequest.STATUS_REVOKED)
+            self.assertEqual(
+                req.changelog[-1]["status"], UserSpecialMembershipRequest.STATUS_REVOKED
+            )
+            self.assertEqual(req.user.bitmap.subscriptions.count(), 0)
+            self.assertEqual(
+                req.user.bitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_GUEST
+            )
+
+    def test_batch_revocation_skips_requests_reviewed_meanwhile(self) -> None:
+        requests = [
+            UserSpecialMembershipRequest.objects.create(
+                user=user,
+                subscription=self.dataset,
+                status=UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+                temporary_expires_at=timezone.now() - timedelta(days=1),
+            )
+            for user in (self.expired_user, self.active_user)
+        ]
+        # reviewed after the requests were selected
+        UserSpecialMembershipRequest.objects.filter(pk=requests[1].pk).update(
+            status=UserSpecialMembershipRequest.STATUS_REJECTED
+        )
+        mail.outbox = []
+        with EmailDispatcher() as dispatcher:
+            revoked = revoke_special_membership_requests_in_batch(
+                requests=requests, dispatcher=dispatcher
+            )
+        self.assertEqual(revoked, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        for req in requests:
+            req.refresh_from_db()
+        self.assertEqual(
+            requests[0].status, UserSpecialMembershipRequest.STATUS_REVOKED
+        )
+        self.assertEqual(
+            requests[1].status, UserSpecialMembershipRequest.STATUS_REJECTED
+        )
+        # left to the review: no revocation changelog entry
+        self.assertNotEqual(
+            requests[1].changelog[-1]["status"],
+            UserSpecialMembershipRequest.STATUS_REVOKED,
+        )
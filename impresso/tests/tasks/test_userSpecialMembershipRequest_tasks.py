@@ -88,12 +88,14 @@ class TestAfterSpecialMembershipRequestCreatedTask(TestCase):
         )
 
         # this will trigger post_save_user_special_membership_request signal which will call after_special_membership_request_created task
-        UserSpecialMembershipRequest.objects.create(
-            user=self.johndoe_user,
-            reviewer=self.reviewer_user,
-            subscription=self.auto_accept_dataset,
-            status=UserSpecialMembershipRequest.STATUS_PENDING_TEMPORARY,
-        )
+        # bitmap changes are written on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSpecialMembershipRequest.objects.create(
+                user=self.johndoe_user,
+                reviewer=self.reviewer_user,
+                subscription=self.auto_accept_dataset,
+                status=UserSpecialMembershipRequest.STATUS_PENDING_TEMPORARY,
+            )
         self.assertEqual(
             len(mail.outbox),
             1,
@@ -0,0 +1,186 @@
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from impresso.models import (
+    Collection,
+    Job,
+    Profile,
+    SpecialMembershipDataset,
+    UserBitmap,
+    UserSpecialMembershipRequest,
+)
+
+
+class TestAdminChangelistQueries(TestCase):
+    """
+    The number of queries of the admin changelists must not depend on the
+    number of rows displayed.
+
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.test_admin
+    """
+
+    def setUp(self) -> None:
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="x"
+        )
+        self.client.force_login(self.admin_user)
+        self.group = Group.objects.create(
+            name=settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER
+        )
+        self.dataset = SpecialMembershipDataset.objects.create(
+            bitmap_position=6, title="Dataset Admin"
+        )
+        self.created_users = 0
+
+    def _create_rows(self, count: int) -> None:
+        for _ in range(count):
+            self.created_users += 1
+            user = User.objects.create_user(
+                username=f"user-{self.created_users}", password="x"
+            )
+            Profile.objects.create(user=user, uid=f"local-user-{self.created_users}")
+            user_bitmap = UserBitmap.objects.create(user=user)
+            user_bitmap.date_accepted_terms = timezone.now()
+            user_bitmap.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                user.groups.add(self.group)
+                user_bitmap.subscriptions.add(self.dataset)
+            Job.objects.create(creator=user, type=Job.EXPORT_QUERY_AS_CSV)
+            Collection.objects.create(
+                id=f"collection-{self.created_users}", name="c", creator=user
+            )
+            UserSpecialMembershipRequest(
+                user=user, reviewer=self.admin_user, subscription=self.dataset
+            ).save_without_signals()
+
+    def _count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_changelists_run_a_constant_number_of_queries(self) -> None:
+        urls = [
+            reverse("admin:auth_user_changelist"),
+            reverse("admin:impresso_userbitmap_changelist"),
+            reverse("admin:impresso_job_changelist"),
+            reverse("admin:impresso_collection_changelist"),
+            reverse("admin:impresso_userspecialmembershiprequest_changelist"),
+        ]
+        self._create_rows(2)
+        queries_with_few_rows = {url: self._count_queries(url) for url in urls}
+        self._create_rows(7)
+        for url in urls:
+            self.assertEqual(
+                self._count_queries(url),
+                queries_with_few_rows[url],
+                f"Number of queries for {url} depends on the number of rows",
+            )
+
+
+class TestAdminBulkActions(TestCase):
+    """
+    Admin bulk actions run set-based queries whatever the number of
+    selected users.
+
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.test_admin
+    """
+
+    def setUp(self) -> None:
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="x"
+        )
+        self.client.force_login(self.admin_user)
+        self.researcher_group = Group.objects.create(
+            name=settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER
+        )
+        self.created_users = 0
+
+    def _create_users(self, count: int) -> list[User]:
+        users = []
+        for _ in range(count):
+            self.created_users += 1
+            user = User.objects.create_user(
+                username=f"user-{self.created_users}", password="x"
+            )
+            UserBitmap.objects.create(user=user)
+            users.append(user)
+        return users
+
+    def _post_action(self, url: str, action: str, pks: list[int]) -> int:
+        with CaptureQueriesContext(connection) as context:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    url, {"action": action, "_selected_action": pks}
+                )
+        self.assertEqual(response.status_code, 302)
+        return len(context.captured_queries)
+
+    def test_group_actions_run_a_constant_number_of_queries(self) -> None:
+        url = reverse("admin:auth_user_changelist")
+        few = [u.pk for u in self._create_users(2)]
+        many = [u.pk for u in self._create_users(20)]
+        no_redaction_group = Group.objects.create(
+            name=settings.IMPRESSO_GROUP_USER_PLAN_NO_REDACTION
+        )
+        for action in (
+            "add_to_group__no_redaction",
+            "remove_from_group__no_redaction",
+        ):
+            queries_with_few_users = self._post_action(url, action, few)
+            self.assertEqual(
+                self._post_action(url, action, many),
+                queries_with_few_users,
+                f"Number of queries for {action} depends on the number of users",
+            )
+        self.assertEqual(no_redaction_group.user_set.count(), 0)
+
+    def test_group_change_rebuilds_bitmaps_in_bulk(self) -> None:
+        users = self._create_users(3)
+        UserBitmap.objects.filter(user__in=users).update(
+            date_accepted_terms=timezone.now()
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.researcher_group.user_set.add(*users)
+        for user_bitmap in UserBitmap.objects.filter(user__in=users):
+            self.assertEqual(
+                user_bitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_RESEARCHER
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.researcher_group.user_set.clear()
+        for user_bitmap in UserBitmap.objects.filter(user__in=users):
+            self.assertEqual(
+                user_bitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_AUTH_USER
+            )
+
+    def test_set_terms_accepted_date_runs_a_constant_number_of_queries(
+        self,
+    ) -> None:
+        url = reverse("admin:impresso_userbitmap_changelist")
+        few = self._create_users(2)
+        many = self._create_users(20)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.researcher_group.user_set.add(*many)
+        queries_with_few_users = self._post_action(
+            url,
+            "set_terms_accepted_date",
+            [u.bitmap.pk for u in few],
+        )
+        self.assertEqual(
+            self._post_action(
+                url, "set_terms_accepted_date", [u.bitmap.pk for u in many]
+            ),
+            queries_with_few_users,
+        )
+        for user_bitmap in UserBitmap.objects.filter(user__in=many):
+            self.assertIsNotNone(user_bitmap.date_accepted_terms)
+            self.assertEqual(
+                user_bitmap.get_bitmap_as_int(), UserBitmap.USER_PLAN_RESEARCHER
+            )
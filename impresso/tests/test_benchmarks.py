@@ -0,0 +1,116 @@
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from benchmarks.fake_solr import FakeSolr, FakeSolrServer, VersionConflict
+from benchmarks.run import compare
+from benchmarks.scenarios import COLLECTION_ID, store_collection
+from impresso.models import CollectableItem, Collection
+
+DOCS: list[dict[str, Any]] = [
+    {"id": "a", "ci_id_s": "x", "ucoll_ss": ["local-1"], "meta_year_i": 1900},
+    {"id": "b", "ci_id_s": "x", "meta_year_i": 1910},
+    {"id": "c\\:1", "ci_id_s": "y", "ucoll_ss": ["local-1", "local-2"]},
+]
+
+
+class TestFakeSolr(TestCase):
+    """
+    Test the fake Solr of the benchmark suite.
+
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.test_benchmarks
+    """
+
+    def setUp(self) -> None:
+        self.fake = FakeSolr()
+        self.fake.add_core("articles", DOCS)
+        self.fake.add_core("passages", [{"id": "p1", "ci_id_s": "a"}])
+
+    def _ids(self, core: str = "articles", **params: str) -> list[str]:
+        select_params = {k: [v] for k, v in params.items()}
+        select_params.setdefault("rows", ["10"])
+        response = self.fake.select(core, select_params)["response"]
+        return [d["id"] for d in response["docs"]]
+
+    def test_queries(self) -> None:
+        self.assertEqual(self._ids(q="*:*"), ["a", "b", "c\\:1"])
+        self.assertEqual(self._ids(q="ucoll_ss:local-1 AND -ucoll_ss:\"local-2\""), ["a"])
+        self.assertEqual(self._ids(q='ucoll_ss:("local-2" OR "local-3")'), ["c\\:1"])
+        self.assertEqual(self._ids(q="id:c\\\\:1 OR id:b"), ["b", "c\\:1"])
+        self.assertEqual(self._ids(q="meta_year_i:[1905 TO *]"), ["b"])
+        self.assertEqual(self._ids(q="*:*", fq="{!collapse field=ci_id_s}"), ["a", "c\\:1"])
+        self.assertEqual(self._ids(q="*:*", sort="id desc", rows="1"), ["c\\:1"])
+        self.assertEqual(
+            self._ids(
+                "passages",
+                q="{!join fromIndex=articles from=id to=ci_id_s}ucoll_ss:local-1",
+            ),
+            ["p1"],
+        )
+
+    def test_cursor_mark(self) -> None:
+        ids: list[str] = []
+        cursor_mark = "*"
+        while True:
+            res = self.fake.select(
+                "articles",
+                {"q": ["*:*"], "rows": ["2"], "cursorMark": [cursor_mark]},
+            )
+            ids.extend(d["id"] for d in res["response"]["docs"])
+            if res["nextCursorMark"] == cursor_mark:
+                break
+            cursor_mark = res["nextCursorMark"]
+        self.assertEqual(ids, ["a", "b", "c\\:1"])
+
+    def test_atomic_updates_and_versions(self) -> None:
+        version = self.fake.cores["articles"]["a"]["_version_"]
+        self.fake.update(
+            "articles",
+            [
+                {"id": "a", "_version_": version, "ucoll_ss": {"add-distinct": "local-1"}},
+                {"id": "b", "ucoll_ss": {"add": ["local-3"]}},
+            ],
+        )
+        self.assertEqual(self.fake.cores["articles"]["a"]["ucoll_ss"], ["local-1"])
+        self.assertEqual(self.fake.cores["articles"]["b"]["ucoll_ss"], ["local-3"])
+        self.assertEqual(self.fake.cores["articles"]["b"]["meta_year_i"], 1910)
+        with self.assertRaises(VersionConflict):
+            self.fake.update(
+                "articles",
+                [{"id": "a", "_version_": version, "ucoll_ss": {"set": []}}],
+            )
+        self.assertEqual(self.fake.counters["articles.conflicts"], 1)
+
+    def test_compare_baseline(self) -> None:
+        baseline = {"results": {"s": {"docs_per_s": 100.0, "requests": 10}}}
+        self.assertEqual(
+            compare({"s": {"docs_per_s": 90.0, "requests": 10}}, baseline, 0.2), []
+        )
+        self.assertEqual(
+            len(compare({"s": {"docs_per_s": 70.0, "requests": 11}}, baseline, 0.2)), 2
+        )
+
+    def test_store_collection_end_to_end(self) -> None:
+        self.fake.add_core("articles", [{"id": f"d{i}"} for i in range(5)])
+        with FakeSolrServer(self.fake, {"/solr/articles": "articles"}) as server:
+            url = f"{server.url}/solr/articles"
+            with override_settings(
+                IMPRESSO_SOLR_URL_SELECT=f"{url}/select",
+                IMPRESSO_SOLR_URL_UPDATE=f"{url}/update",
+            ):
+                docs = store_collection(self.fake, "articles", "passages", limit=2)
+        self.assertEqual(docs, 5)
+        self.assertTrue(
+            all(
+                d["ucoll_ss"] == [COLLECTION_ID]
+                for d in self.fake.cores["articles"].values()
+            )
+        )
+        self.assertEqual(
+            CollectableItem.objects.filter(collection_id=COLLECTION_ID).count(), 5
+        )
+        self.assertEqual(Collection.objects.get(pk=COLLECTION_ID).count_items, 5)
+        self.assertEqual(self.fake.counters["articles.select"], 3)
+        self.assertTrue(User.objects.filter(username="benchmark").exists())
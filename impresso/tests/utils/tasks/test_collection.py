@@ -0,0 +1,195 @@
+from typing import Optional
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from requests.exceptions import HTTPError
+
+from impresso.models import CollectableItem, Collection, Job, Profile
+from impresso.solr import SolrStreamingError
+from impresso.tasks.collection_tasks import store_collection_from_query
+from impresso.utils.tasks.collection import (
+    build_add_collection_expression,
+    store_collection_with_streaming_expression,
+)
+from impresso.utils.tasks.textreuse import (
+    add_collection_to_tr_passages_with_join,
+    get_tr_passages_join_query,
+)
+
+COLLECTION_ID = "local-testuser-abc"
+
+
+def page_of(docs: list, next_cursor_mark: str, total: Optional[int] = None) -> dict:
+    return {
+        "response": {"numFound": len(docs) if total is None else total, "docs": docs},
+        "nextCursorMark": next_cursor_mark,
+    }
+
+
+@patch("impresso.utils.tasks.collection.find_all")
+class TestStoreCollection(TestCase):
+    """
+    Test the streaming expression and paged engines of store_collection_from_query.
+
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.tasks.test_collection
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="testuser")
+        Profile.objects.create(user=self.user, uid="local-testuser", max_loops_allowed=2)
+        self.collection = Collection.objects.create(
+            id=COLLECTION_ID, name="Collection", creator=self.user
+        )
+
+    def _run(self, streaming: bool = True, atomic_chain: bool = True) -> dict:
+        with self.settings(
+            IMPRESSO_SOLR_STREAMING_UPDATE=streaming,
+            IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN=atomic_chain,
+            IMPRESSO_SOLR_STREAMING_BATCH_SIZE=2,
+            IMPRESSO_SOLR_EXEC_LIMIT=100,
+        ), patch.object(store_collection_from_query, "update_state"):
+            return store_collection_from_query.delay(
+                collection_id=COLLECTION_ID, user_id=self.user.pk, query="lg_s:fr"
+            ).get()
+
+    def test_build_add_collection_expression(self, _find_all) -> None:
+        expr = build_add_collection_expression(
+            "impresso", 'title:"a b"', COLLECTION_ID, batch_size=500
+        )
+        self.assertTrue(expr.startswith("commit(impresso, batchSize=0, update("))
+        self.assertIn(
+            f'q="(title:\\"a b\\") AND -ucoll_ss:\\"{COLLECTION_ID}\\""', expr
+        )
+        self.assertIn('qt="/export"', expr)
+        self.assertIn(f'val("{COLLECTION_ID}") as ucoll_ss', expr)
+
+    def test_streaming_engine(self, find_all) -> None:
+        find_all.return_value = {"response": {"numFound": 3}}
+        with patch(
+            "impresso.utils.tasks.collection.stream",
+            return_value=[{"batchIndexed": 2}, {"batchIndexed": 1}],
+        ) as stream, patch(
+            "impresso.utils.tasks.collection.iter_all",
+            return_value=iter([{"id": i, "score": 1.0} for i in ("a", "b", "c")]),
+        ), patch(
+            "impresso.utils.tasks.collection.get_store_collection_job"
+        ) as paged:
+            result = self._run()
+        self.assertEqual(
+            result, {"engine": "streaming", "total": 3, "indexed": 3, "stored": 3}
+        )
+        self.assertIn("batchSize=2", stream.call_args.kwargs["expr"])
+        paged.assert_not_called()
+        self.assertEqual(
+            CollectableItem.objects.filter(collection=self.collection).count(), 3
+        )
+        self.collection.refresh_from_db()
+        self.assertEqual(self.collection.count_items, 3)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_falls_back_to_paged_engine(self, find_all) -> None:
+        find_all.return_value = {"response": {"numFound": 3}}
+        docs = [{"id": i, "score": 1.0, "_version_": 1} for i in ("a", "b", "c")]
+        for error in (HTTPError("404"), SolrStreamingError("unknown function")):
+            with patch(
+                "impresso.utils.tasks.collection.stream", side_effect=error
+            ), patch(
+                "impresso.utils.tasks.engine.find_all",
+                side_effect=lambda **kwargs: page_of(docs, "c1"),
+            ) as paged, patch(
+                "impresso.utils.tasks.engine.update", return_value={}
+            ) as update:
+                self.assertEqual(
+                    self._run(),
+                    {"engine": "paged", "pages": 1, "docs": 3, "stopped": False},
+                )
+            paged.assert_called_once()
+            self.assertEqual(
+                [todo["ucoll_ss"] for todo in update.call_args.kwargs["todos"]],
+                [{"set": [COLLECTION_ID]}] * 3,
+            )
+        self.assertEqual(
+            CollectableItem.objects.filter(collection=self.collection).count(), 3
+        )
+
+    def test_streaming_requires_the_atomic_update_chain(self, find_all) -> None:
+        find_all.return_value = {"response": {"numFound": 3}}
+        docs = [{"id": i, "score": 1.0, "_version_": 1} for i in ("a", "b", "c")]
+        with patch("impresso.utils.tasks.collection.stream") as stream, patch(
+            "impresso.utils.tasks.engine.find_all",
+            side_effect=lambda **kwargs: page_of(docs, "c1"),
+        ), patch("impresso.utils.tasks.engine.update", return_value={}):
+            self.assertEqual(
+                self._run(atomic_chain=False),
+                {"engine": "paged", "pages": 1, "docs": 3, "stopped": False},
+            )
+        stream.assert_not_called()
+        with self.settings(IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN=False):
+            with self.assertRaises(ImproperlyConfigured):
+                store_collection_with_streaming_expression(
+                    collection_id=COLLECTION_ID,
+                    query="lg_s:fr",
+                    content_type=CollectableItem.ARTICLE,
+                )
+
+    def test_paged_engine_over_allowed_items(self, find_all) -> None:
+        # 2 loops of 100 items allowed
+        find_all.return_value = {"response": {"numFound": 201}}
+        docs = [{"id": f"doc-{i:03d}", "score": 1.0} for i in range(201)]
+        with patch("impresso.utils.tasks.collection.stream") as stream, patch(
+            "impresso.utils.tasks.engine.find_all",
+            side_effect=[
+                page_of(docs[:100], "c1", total=201),
+                page_of(docs[100:200], "c2", total=201),
+            ],
+        ) as paged, patch("impresso.utils.tasks.engine.update", return_value={}):
+            self.assertEqual(
+                self._run(),
+                {"engine": "paged", "pages": 2, "docs": 200, "stopped": False},
+            )
+        stream.assert_not_called()
+        self.assertEqual(
+            [c.kwargs["cursor_mark"] for c in paged.call_args_list], ["*", "c1"]
+        )
+        self.assertEqual(
+            CollectableItem.objects.filter(collection=self.collection).count(), 200
+        )
+
+
+@patch("impresso.utils.tasks.textreuse.update")
+class TestTrPassagesJoin(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.tasks.test_collection
+    """
+
+    def test_add_collection_to_tr_passages_with_join(self, update) -> None:
+        with patch(
+            "impresso.utils.tasks.textreuse.iter_all",
+            return_value=iter([{"id": i} for i in ("a-1", "a-2", "c-1")]),
+        ) as iter_all:
+            updated = add_collection_to_tr_passages_with_join(
+                COLLECTION_ID, batch_size=2
+            )
+        self.assertEqual(updated, 3)
+        kwargs = iter_all.call_args.kwargs
+        self.assertEqual(
+            kwargs["q"],
+            get_tr_passages_join_query(COLLECTION_ID),
+        )
+        self.assertEqual(kwargs["fq"], f'-ucoll_ss:"{COLLECTION_ID}"')
+        self.assertEqual(kwargs["url"], settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT)
+        self.assertEqual(
+            [c.kwargs["todos"] for c in update.call_args_list],
+            [
+                [
+                    {"id": "a-1", "ucoll_ss": {"add-distinct": COLLECTION_ID}},
+                    {"id": "a-2", "ucoll_ss": {"add-distinct": COLLECTION_ID}},
+                ],
+                [{"id": "c-1", "ucoll_ss": {"add-distinct": COLLECTION_ID}}],
+            ],
+        )
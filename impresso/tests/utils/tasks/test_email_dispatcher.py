@@ -0,0 +1,148 @@
+import os
+import smtplib
+import tempfile
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+
+from impresso.utils.tasks.email import EmailDispatcher
+
+
+class FlakyEmailBackend(EmailBackend):
+    """
+    locmem backend failing the first `failures` calls to send_messages.
+    """
+
+    failures = 0
+    calls = 0
+
+    def send_messages(self, messages):
+        FlakyEmailBackend.calls += 1
+        if FlakyEmailBackend.calls <= FlakyEmailBackend.failures:
+            raise ConnectionError("SMTP server went away")
+        return super().send_messages(messages)
+
+
+class PartialEmailBackend(EmailBackend):
+    """
+    locmem backend delivering messages one by one like the SMTP backend, and
+    failing once when it reaches the message to `fail_to`.
+    """
+
+    fail_to: list[str] = []
+
+    def send_messages(self, messages):
+        sent = 0
+        for message in messages:
+            if message.to == PartialEmailBackend.fail_to:
+                PartialEmailBackend.fail_to = []
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            sent += super().send_messages([message])
+        return sent
+
+
+FLAKY_BACKEND = f"{__name__}.FlakyEmailBackend"
+PARTIAL_BACKEND = f"{__name__}.PartialEmailBackend"
+
+
+class TestEmailDispatcher(TestCase):
+    """
+    Test the batched email dispatcher.
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.tasks.test_email_dispatcher
+    """
+
+    def setUp(self) -> None:
+        mail.outbox = []
+        FlakyEmailBackend.failures = 0
+        FlakyEmailBackend.calls = 0
+        PartialEmailBackend.fail_to = []
+
+    def _message(self, idx: int) -> EmailMultiAlternatives:
+        return EmailMultiAlternatives(
+            subject=f"Subject {idx}",
+            body="Body",
+            from_email="from@example.com",
+            to=[f"user{idx}@example.com"],
+        )
+
+    def test_sends_messages_in_batches_over_one_connection(self) -> None:
+        with patch(
+            "impresso.utils.tasks.email.get_connection",
+            wraps=mail.get_connection,
+        ) as get_connection:
+            with EmailDispatcher(batch_size=2) as dispatcher:
+                for idx in range(5):
+                    dispatcher.add(self._message(idx))
+                # two full batches are sent as soon as they are complete
+                self.assertEqual(len(mail.outbox), 4)
+
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(dispatcher.sent, 5)
+        self.assertEqual(dispatcher.failed, 0)
+        self.assertEqual(dispatcher.batches, 3)
+
+    def test_failed_batch_is_retried(self) -> None:
+        FlakyEmailBackend.failures = 1
+        with EmailDispatcher(batch_size=3, backend=FLAKY_BACKEND) as dispatcher:
+            for idx in range(3):
+                dispatcher.add(self._message(idx))
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(dispatcher.sent, 3)
+        self.assertEqual(dispatcher.failed, 0)
+
+    def test_gives_up_after_max_retries(self) -> None:
+        FlakyEmailBackend.failures = 100
+        with EmailDispatcher(
+            batch_size=2, max_retries=2, backend=FLAKY_BACKEND
+        ) as dispatcher:
+            dispatcher.add(self._message(0))
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(dispatcher.sent, 0)
+        self.assertEqual(dispatcher.failed, 1)
+        # one batch attempt, then two retries
+        self.assertEqual(FlakyEmailBackend.calls, 3)
+
+    def test_retry_queue_is_bounded(self) -> None:
+        FlakyEmailBackend.failures = 3
+        with EmailDispatcher(
+            batch_size=4, retry_queue_size=2, backend=FLAKY_BACKEND
+        ) as dispatcher:
+            for idx in range(4):
+                dispatcher.add(self._message(idx))
+
+        self.assertEqual(dispatcher.sent, 3)
+        self.assertEqual(dispatcher.failed, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_failure_midway_through_a_batch_sends_no_duplicates(self) -> None:
+        PartialEmailBackend.fail_to = ["user2@example.com"]
+        with EmailDispatcher(batch_size=4, backend=PARTIAL_BACKEND) as dispatcher:
+            for idx in range(4):
+                dispatcher.add(self._message(idx))
+
+        self.assertEqual(
+            [m.to for m in mail.outbox],
+            [[f"user{idx}@example.com"] for idx in (0, 1, 3, 2)],
+        )
+        self.assertEqual(dispatcher.sent, 4)
+        self.assertEqual(dispatcher.failed, 0)
+
+    def test_file_backend(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.settings(
+                EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend",
+                EMAIL_FILE_PATH=tmpdir,
+            ):
+                with EmailDispatcher(batch_size=10) as dispatcher:
+                    for idx in range(3):
+                        dispatcher.add(self._message(idx))
+            self.assertEqual(dispatcher.sent, 3)
+            # a single connection writes a single file
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
@@ -0,0 +1,175 @@
+import io
+import json
+import logging
+from typing import Any, Optional
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from pythonjsonlogger.json import JsonFormatter
+
+from impresso.models import CollectableItem, Collection, Job, Profile
+from impresso.utils.metrics import render_metrics, reset_metrics
+from impresso.utils.tasks.engine import (
+    PagedSolrJob,
+    SolrSource,
+    collectable_items_sink,
+)
+
+DOCS = [{"id": f"doc-{i:03d}"} for i in range(25)]
+
+
+def fake_find_all(
+    skip: int = 0, limit: int = 100, cursor_mark: Optional[str] = None, **kwargs: Any
+) -> dict:
+    # cursor marks are the offsets of the next page
+    start = skip if cursor_mark is None else int(cursor_mark.strip("*") or 0)
+    response: dict[str, Any] = {
+        "response": {"numFound": len(DOCS), "docs": DOCS[start : start + limit]}
+    }
+    if cursor_mark is not None:
+        response["nextCursorMark"] = str(min(start + limit, len(DOCS)))
+    return response
+
+
+@patch("impresso.utils.tasks.engine.find_all", side_effect=fake_find_all)
+class TestPagedSolrJob(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.tasks.test_engine
+    """
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="testuser")
+        Profile.objects.create(
+            user=self.user, uid="local-testuser", max_loops_allowed=100
+        )
+        self.job = Job.objects.create(type=Job.TEST, creator=self.user)
+        self.task = MagicMock()
+        self.task.name = "impresso.tasks.test"
+        self.seen: list[str] = []
+
+    def get_job(self, sinks: Optional[list] = None) -> PagedSolrJob:
+        return PagedSolrJob(
+            job=self.job,
+            source=SolrSource(q="*:*", url="http://localhost:8983/solr/a/select"),
+            transform=lambda batch: [doc["id"] for doc in batch.docs],
+            sinks=sinks or [lambda batch, ids: self.seen.extend(ids)],
+            limit=10,
+            task=self.task,
+        )
+
+    def test_run_page(self, find_all) -> None:
+        batch = self.get_job().run_page(skip=20)
+        self.assertEqual((batch.page, batch.loops, batch.total), (3, 3, 25))
+        self.assertEqual(self.seen, [doc["id"] for doc in DOCS[20:]])
+        self.assertEqual(find_all.call_args.kwargs["limit"], 10)
+        self.assertIsNone(find_all.call_args.kwargs["cursor_mark"])
+
+    def test_run_page_phases(self, find_all) -> None:
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+        self.get_job().run_page()
+        output = render_metrics()
+        for phase in ("fetch", "transform", "write"):
+            self.assertIn(
+                f'impresso_job_phase_seconds_count{{job_type="{Job.TEST}",'
+                f'phase="{phase}"}} 1',
+                output,
+            )
+
+    def test_run(self, find_all) -> None:
+        for prefetch in (True, False):
+            self.seen = []
+            with self.settings(IMPRESSO_JOB_PREFETCH=prefetch):
+                result = self.get_job().run()
+            self.assertEqual(result, {"pages": 3, "docs": 25, "stopped": False})
+            self.assertEqual(self.seen, [doc["id"] for doc in DOCS])
+        self.assertEqual(
+            [c.kwargs["cursor_mark"] for c in find_all.call_args_list[-3:]],
+            ["*", "10", "20"],
+        )
+        # progress is coalesced: none within the default interval
+        self.task.update_state.assert_not_called()
+
+    def test_run_max_loops(self, find_all) -> None:
+        self.user.profile.max_loops_allowed = 2
+        self.user.profile.save()
+        self.assertEqual(
+            self.get_job().run(), {"pages": 2, "docs": 20, "stopped": False}
+        )
+
+    def test_run_stopped(self, find_all) -> None:
+        def stop(batch, ids) -> None:
+            Job.objects.filter(pk=self.job.pk).update(status=Job.STOP)
+
+        result = self.get_job(sinks=[stop]).run()
+        self.assertEqual(result, {"pages": 1, "docs": 10, "stopped": True})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.RIP)
+
+    def test_run_resume(self, find_all) -> None:
+        def fail(batch, ids) -> None:
+            if batch.page == 3:
+                raise RuntimeError("worker lost")
+
+        with self.settings(IMPRESSO_JOB_PROGRESS_INTERVAL=0):
+            with self.assertRaises(RuntimeError):
+                self.get_job(sinks=[fail]).run()
+            self.assertEqual(
+                json.loads(self.job.extra)["checkpoint"],
+                {"cursor_mark": "20", "pages": 2, "docs": 20},
+            )
+            self.assertEqual(self.task.update_state.call_count, 2)
+            result = self.get_job().run(resume=True)
+        self.assertEqual(result, {"pages": 3, "docs": 25, "stopped": False})
+        self.assertEqual(self.seen, [doc["id"] for doc in DOCS[20:]])
+
+    def test_run_shrinking_source(self, find_all) -> None:
+        # the sinks remove the documents: numFound counts the remaining ones
+        remaining = list(DOCS)
+
+        def find_remaining(
+            limit: int = 100, cursor_mark: Optional[str] = None, **kwargs: Any
+        ) -> dict:
+            cursor = cursor_mark or "*"
+            docs = [d for d in remaining if cursor == "*" or d["id"] > cursor]
+            return {
+                "response": {"numFound": len(remaining), "docs": docs[:limit]},
+                "nextCursorMark": docs[:limit][-1]["id"] if docs else cursor_mark,
+            }
+
+        def remove(batch, ids) -> None:
+            remaining[:] = [d for d in remaining if d["id"] not in ids]
+
+        find_all.side_effect = find_remaining
+        job = self.get_job(sinks=[remove])
+        job.ignore_max_loops = True
+        self.assertEqual(job.run(), {"pages": 3, "docs": 25, "stopped": False})
+        self.assertEqual(remaining, [])
+
+    def test_run_page_logs_at_info(self, find_all) -> None:
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter("%(levelname)s %(message)s"))
+        logger = logging.getLogger("impresso.tests.engine")
+        logger.handlers = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self.addCleanup(setattr, logger, "handlers", [])
+        collection = Collection.objects.create(
+            id="local-testuser-abc", name="Collection", creator=self.user
+        )
+        PagedSolrJob(
+            job=self.job,
+            source=SolrSource(q="*:*", url="http://localhost:8983/solr/a/select"),
+            sinks=[collectable_items_sink(collection.pk, logger=logger)],
+            limit=10,
+            logger=logger,
+        ).run_page()
+        self.assertEqual(
+            CollectableItem.objects.filter(collection=collection).count(), 10
+        )
+        summary = json.loads(stream.getvalue().splitlines()[-1])
+        self.assertEqual(summary["items_created"], 10)
+        self.assertEqual(summary["job_id"], self.job.pk)
@@ -1,5 +1,5 @@
 import unittest
-from impresso.utils.bitmask import BitMask64, is_access_allowed
+from impresso.utils.bitmask import BitMask, BitMask64, is_access_allowed
 
 
 def multiple_assert_equal(
@@ -116,3 +116,40 @@ class TestBitMask64(unittest.TestCase):
                 (0b1000000000000000000000111, 64, False),
             ],
         )
+
+
+class TestBitMask(unittest.TestCase):
+    def test_positions_beyond_64_bits(self):
+        user_bitmask = BitMask((1 << 80) | 0b1011)
+        self.assertEqual(user_bitmask.width, 81)
+        self.assertEqual(user_bitmask.popcount(), 4)
+        self.assertEqual(len(str(user_bitmask)), 128)
+        self.assertTrue(is_access_allowed(user_bitmask, BitMask(1 << 80)))
+        self.assertFalse(is_access_allowed(user_bitmask, BitMask(1 << 79)))
+        with self.assertRaises(ValueError):
+            BitMask64("1" * 65)
+        self.assertEqual(BitMask("1" * 65).popcount(), 65)
+
+    def test_init_with_bytes_and_operators(self):
+        bitmask = BitMask(b"\x01\x00\x00\x00\x00\x00\x00\x00\x03")
+        self.assertEqual(int(bitmask), (1 << 64) | 0b11)
+        self.assertEqual(bitmask.to_bytes(), b"\x01\x00\x00\x00\x00\x00\x00\x00\x03")
+        self.assertEqual(bitmask & 0b10, BitMask(0b10))
+        self.assertEqual(int(BitMask(0b100) | BitMask(0b1)), 0b101)
+        self.assertFalse(BitMask(None))
+        # works with the 64-bit flavour too
+        self.assertEqual(BitMask(BitMask64(10)), 10)
+
+    def test_solr_long_conversion(self):
+        self.assertEqual(BitMask(0b1011).to_solr_long(), 0b1011)
+        # bit 63 is the sign bit of a Solr long
+        self.assertEqual(BitMask(1 << 63).to_solr_long(), -(1 << 63))
+        self.assertEqual(int(BitMask(-(1 << 63))), 1 << 63)
+
+        wide = BitMask((1 << 70) | 0b11)
+        with self.assertRaises(OverflowError):
+            wide.to_solr_long()
+        self.assertEqual(wide.to_solr_long(overflow="truncate"), 0b11)
+        self.assertEqual(wide.to_solr_longs(), [0b11, 1 << 6])
+        self.assertEqual(BitMask.from_solr_longs(wide.to_solr_longs()), wide)
+        self.assertEqual(BitMask(0).to_solr_longs(), [0])
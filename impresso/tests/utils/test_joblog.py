@@ -0,0 +1,80 @@
+import io
+import json
+import logging
+
+from django.test import SimpleTestCase
+from pythonjsonlogger.json import JsonFormatter
+
+from impresso.utils.joblog import JobLogger, Truncated, render_truncated
+
+
+class Unformattable:
+    def __str__(self) -> str:
+        raise AssertionError("formatted")
+
+
+class TestJobLogger(SimpleTestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.test_joblog
+    """
+
+    def setUp(self) -> None:
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(JsonFormatter("%(levelname)s %(message)s"))
+        self.logger = logging.getLogger("impresso.tests.joblog")
+        self.logger.handlers = [handler]
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, "handlers", [])
+
+    def records(self) -> list[dict]:
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_render_truncated(self) -> None:
+        self.assertEqual(render_truncated(["a", "b"], 100), '["a", "b"]')
+        self.assertEqual(render_truncated("x" * 12, 10), "xxxxxxxxxx... (+2 chars)")
+        self.assertEqual(
+            render_truncated([f"id-{i}" for i in range(1000)], 20),
+            '["id-0", "id-1", ... 998 more]',
+        )
+
+    def test_sample_and_summary(self) -> None:
+        log = JobLogger(self.logger, sample_every=10, job_id=1)
+        for i in range(25):
+            log.sample("doc", "doc %s", i)
+            log.count("docs")
+        log.summary("page done", page=3, query=log.truncate("q" * 2000))
+        records = self.records()
+        self.assertEqual(
+            [r["message"] for r in records[:3]],
+            ["doc 0 (#1)", "doc 9 (#10)", "doc 19 (#20)"],
+        )
+        summary = records[-1]
+        self.assertTrue(summary["message"].startswith("page done page=3"))
+        self.assertEqual(summary["job_id"], 1)
+        self.assertEqual(summary["docs"], 25)
+        self.assertEqual(summary["sampled_doc"], 25)
+        self.assertLess(len(summary["query"]), 1100)
+        # counters start over on the next page
+        log.summary("page done")
+        self.assertNotIn("docs", self.records()[-1])
+
+    def test_fields_named_like_log_record_attributes(self) -> None:
+        self.logger.setLevel(logging.INFO)
+        log = JobLogger(self.logger, name="job")
+        log.count("created", 2)
+        log.summary("page done", module="collection")
+        summary = self.records()[-1]
+        self.assertEqual(summary["field_created"], 2)
+        self.assertEqual(summary["field_name"], "job")
+        self.assertEqual(summary["field_module"], "collection")
+        self.assertIn("created=2", summary["message"])
+
+    def test_formats_nothing_below_level(self) -> None:
+        self.logger.setLevel(logging.INFO)
+        log = JobLogger(self.logger)
+        log.sample("doc", "doc %s", Unformattable())
+        log.debug("payload %s", Truncated(Unformattable()))
+        self.assertEqual(self.stream.getvalue(), "")
@@ -0,0 +1,117 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from impresso.utils.metrics import (
+    measure_job_page,
+    measure_phase,
+    record_solr_request,
+    remove_metrics_textfile_on_process_shutdown,
+    render_metrics,
+    reset_metrics,
+    write_metrics_textfile,
+    write_metrics_textfile_on_task_postrun,
+)
+
+SOLR_URL = "http://localhost:8983/solr/impresso_dev/select"
+
+
+class TestMetrics(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.test_metrics
+    """
+
+    def setUp(self) -> None:
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def test_record_solr_request(self) -> None:
+        response = SimpleNamespace(
+            status_code=200,
+            content=b'{"responseHeader":{"status":0,"QTime":12},"response":{}}',
+        )
+        record_solr_request("find_all", SOLR_URL, 0.05, response=response)
+        error = SimpleNamespace(status_code=503, content=b"")
+        record_solr_request("find_all", SOLR_URL, 0.5, response=error)
+        output = render_metrics()
+        labels = 'core="impresso_dev",handler="select",operation="find_all"'
+        self.assertIn("# TYPE impresso_solr_request_seconds summary", output)
+        self.assertIn(f"impresso_solr_request_seconds_count{{{labels}}} 2", output)
+        self.assertIn(f"impresso_solr_request_seconds_sum{{{labels}}} 0.55", output)
+        self.assertIn(f"impresso_solr_qtime_seconds_count{{{labels}}} 1", output)
+        self.assertIn(f"impresso_solr_qtime_seconds_sum{{{labels}}} 0.012", output)
+        self.assertIn(f'impresso_solr_errors_total{{{labels},status="503"}} 1', output)
+
+    def test_measure_job_page(self) -> None:
+        @measure_job_page
+        def helper(collection_id: str, job, limit: int = 100) -> int:
+            with measure_phase(job.type, "progress"):
+                return User.objects.count() + User.objects.count()
+
+        helper("local-abc", SimpleNamespace(type="BCQ"), limit=10)
+        output = render_metrics()
+        self.assertIn('impresso_job_page_db_queries_count{job_type="BCQ"} 1', output)
+        self.assertIn('impresso_job_page_db_queries_sum{job_type="BCQ"} 2', output)
+        self.assertIn(
+            'impresso_job_phase_seconds_count{job_type="BCQ",phase="page"} 1', output
+        )
+        self.assertIn(
+            'impresso_job_phase_seconds_count{job_type="BCQ",phase="progress"} 1',
+            output,
+        )
+
+    def test_write_metrics_textfile(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            record_solr_request("update", SOLR_URL, 0.1, batch_size=50)
+            path = write_metrics_textfile(directory, name="worker")
+            self.assertEqual(path, os.path.join(directory, "worker.prom"))
+            with open(path) as f:
+                self.assertIn(
+                    "impresso_solr_update_batch_size_sum{core=\"impresso_dev\","
+                    f'handler="select",operation="update",pid="{os.getpid()}"}} 50',
+                    f.read(),
+                )
+            self.assertEqual(os.listdir(directory), ["worker.prom"])
+
+            with override_settings(
+                IMPRESSO_METRICS_TEXTFILE_DIR=directory,
+                IMPRESSO_METRICS_TEXTFILE_INTERVAL=3600,
+            ):
+                write_metrics_textfile_on_task_postrun()
+                os.remove(os.path.join(directory, f"impresso-{os.getpid()}.prom"))
+                # throttled
+                write_metrics_textfile_on_task_postrun()
+                self.assertEqual(os.listdir(directory), ["worker.prom"])
+
+                reset_metrics()
+                write_metrics_textfile_on_task_postrun()
+                self.assertEqual(len(os.listdir(directory)), 2)
+                remove_metrics_textfile_on_process_shutdown()
+                self.assertEqual(os.listdir(directory), ["worker.prom"])
+
+    @override_settings(IMPRESSO_METRICS_ENABLED=True, IMPRESSO_METRICS_TOKEN="secret")
+    def test_metrics_view(self) -> None:
+        record_solr_request("find_all", SOLR_URL, 0.05)
+        self.assertEqual(self.client.get("/metrics/").status_code, 401)
+        response = self.client.get(
+            "/metrics/", headers={"Authorization": "Bearer secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        self.assertIn(b"impresso_solr_request_seconds_count", response.content)
+        with override_settings(IMPRESSO_METRICS_ENABLED=False):
+            response = self.client.get(
+                "/metrics/", headers={"Authorization": "Bearer secret"}
+            )
+            self.assertEqual(response.status_code, 404)
+
+    @override_settings(IMPRESSO_METRICS_ENABLED=True, IMPRESSO_METRICS_TOKEN="")
+    def test_metrics_view_requires_a_token(self) -> None:
+        record_solr_request("find_all", SOLR_URL, 0.05)
+        self.assertEqual(self.client.get("/metrics/").status_code, 404)
@@ -0,0 +1,82 @@
+import tempfile
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from impresso.admin import JobAdmin
+from impresso.models import Job
+from impresso.utils.profiling import (
+    SamplingProfiler,
+    format_folded,
+    get_hot_functions,
+    parse_folded,
+    profile_job,
+    read_job_profile,
+)
+
+
+def busy_loop(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.test_profiling
+    """
+
+    def setUp(self) -> None:
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(
+            MEDIA_ROOT=media_root.name, IMPRESSO_PROFILER_INTERVAL=0.001
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(username="testuser")
+
+    def test_sampling_profiler(self) -> None:
+        with SamplingProfiler(interval=0.001) as profiler:
+            busy_loop(0.1)
+        self.assertTrue(profiler.samples)
+        hottest, own, total = get_hot_functions(profiler.samples, limit=1)[0]
+        self.assertEqual(hottest, f"{__name__}.busy_loop")
+        self.assertLessEqual(own, total)
+        self.assertEqual(
+            parse_folded(format_folded(profiler.samples)), profiler.samples
+        )
+
+    def test_get_hot_functions(self) -> None:
+        samples = Counter({"a;b": 3, "a;c": 2, "a;b;c": 1, "a": 1})
+        self.assertEqual(
+            get_hot_functions(samples, limit=3),
+            [("b", 3, 4), ("c", 3, 3), ("a", 1, 7)],
+        )
+
+    def test_profile_job_merges_tasks(self) -> None:
+        job = Job.objects.create(type=Job.TEST, creator=self.user, profile=True)
+        counts = []
+        # one page task after the other, each loading the job
+        for _ in range(2):
+            job = Job.objects.get(pk=job.pk)
+            with profile_job(job):
+                busy_loop(0.05)
+            counts.append(sum(read_job_profile(job).values()))
+        job.refresh_from_db()
+        self.assertTrue(job.profile_output.name.endswith(f"job-{job.pk}.folded"))
+        self.assertGreater(counts[1], counts[0])
+        self.assertIn(
+            f"{__name__}.busy_loop", JobAdmin(Job, None).profile_hot_functions(job)
+        )
+
+    def test_profile_job_disabled(self) -> None:
+        job = Job.objects.create(type=Job.TEST, creator=self.user)
+        with profile_job(job):
+            busy_loop(0.01)
+        job.refresh_from_db()
+        self.assertFalse(job.profile_output)
+        self.assertEqual(JobAdmin(Job, None).profile_hot_functions(job), "-")
@@ -0,0 +1,66 @@
+import json
+import socket
+import unittest
+from unittest.mock import patch
+
+from impresso.utils import proxy
+from impresso.utils.proxy import (
+    clear_proxy_cache,
+    get_proxy_for_host_or_url,
+    get_session_for_host_or_url,
+    resolve_host,
+)
+
+PROXY_CONFIG = json.dumps(
+    {"host": "proxy.example.com", "port": 1080, "domains": ["solr.example.com"]}
+)
+
+
+class TestProxyResolution(unittest.TestCase):
+    """
+    Run with:
+    ENV=test pipenv run ./manage.py test impresso.tests.utils.test_proxy
+    """
+
+    def setUp(self) -> None:
+        clear_proxy_cache()
+        self.addCleanup(clear_proxy_cache)
+        patcher = patch.object(
+            proxy,
+            "get_env_variable",
+            side_effect=lambda name, default=None: (
+                PROXY_CONFIG if name == "IMPRESSO_SOCKS_PROXY_CONFIG" else default
+            ),
+        )
+        self.get_env_variable = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_settings_are_parsed_once(self) -> None:
+        for _ in range(3):
+            self.assertEqual(
+                get_proxy_for_host_or_url("https://solr.example.com/solr/select"),
+                ("proxy.example.com", 1080),
+            )
+            self.assertIsNone(get_proxy_for_host_or_url("other.example.com"))
+        self.assertEqual(self.get_env_variable.call_count, 1)
+
+    def test_sessions_are_shared_per_proxy(self) -> None:
+        session = get_session_for_host_or_url("https://solr.example.com/a")
+        self.assertIs(session, get_session_for_host_or_url("solr.example.com/b"))
+        self.assertEqual(session.proxies["https"], "socks4://proxy.example.com:1080")
+        direct_session = get_session_for_host_or_url("https://other.example.com")
+        self.assertIsNot(direct_session, session)
+        self.assertEqual(direct_session.proxies, {})
+
+    def test_resolve_host_caches_until_ttl(self) -> None:
+        with patch.object(
+            socket, "gethostbyname", return_value="10.0.0.1"
+        ) as gethostbyname, patch.object(proxy.time, "monotonic") as monotonic:
+            monotonic.return_value = 100.0
+            self.assertEqual(resolve_host("proxy.example.com", ttl=60), "10.0.0.1")
+            monotonic.return_value = 159.0
+            resolve_host("proxy.example.com", ttl=60)
+            self.assertEqual(gethostbyname.call_count, 1)
+            monotonic.return_value = 161.0
+            resolve_host("proxy.example.com", ttl=60)
+            self.assertEqual(gethostbyname.call_count, 2)
@@ -20,6 +20,8 @@ from django.urls import path
 from django.utils.safestring import mark_safe
 from django.conf import settings
 
+from impresso.views.metrics import metrics
+
 admin.site.site_header = mark_safe(
     '<b style="color:white">Impresso</b>'
     f" &middot {settings.IMPRESSO_GIT_TAG}"
@@ -29,4 +31,5 @@ admin.site.site_header = mark_safe(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", metrics, name="metrics"),
 ]
@@ -1,4 +1,152 @@
-class BitMask64:
+import logging
+
+default_logger = logging.getLogger(__name__)
+
+# Solr `_l` fields are signed 64-bit longs
+SOLR_LONG_BITS = 64
+SOLR_LONG_MASK = (1 << SOLR_LONG_BITS) - 1
+
+OVERFLOW_RAISE = "raise"
+OVERFLOW_TRUNCATE = "truncate"
+
+
+class BitMask:
+    """
+    Variable-width bitmask backed by a Python int, so that any
+    SpecialMembershipDataset.bitmap_position fits, including positions past 63.
+    AND, OR and popcount are plain int operations, so building one per row
+    is cheap.
+
+    Accepts a string of bits ('1011'), an int, big-endian bytes (as stored in
+    UserBitmap.bitmap) or another BitMask. Negative ints are read as signed
+    64-bit Solr longs (two's complement).
+    """
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value: "str | int | bytes | BitMask | None" = 0):
+        if isinstance(value, int):
+            self._value = value & SOLR_LONG_MASK if value < 0 else value
+        elif isinstance(value, BitMask):
+            self._value = value._value
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            self._value = int.from_bytes(value, byteorder="big")
+        elif isinstance(value, str):
+            if not value or not all(c in "01" for c in value):
+                raise ValueError("String must contain only '0' and '1'")
+            self._value = int(value, 2)
+        elif value is None:
+            self._value = 0
+        else:
+            raise TypeError(
+                "Value must be a string of bits, an integer or bytes. Type:",
+                type(value),
+            )
+
+    def __int__(self) -> int:
+        return self._value
+
+    def __index__(self) -> int:
+        return self._value
+
+    def __bool__(self) -> bool:
+        return self._value != 0
+
+    def __and__(self, other: "BitMask | int") -> "BitMask":
+        return BitMask(self._value & int(other))
+
+    def __or__(self, other: "BitMask | int") -> "BitMask":
+        return BitMask(self._value | int(other))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (BitMask, int)):
+            return self._value == int(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._value)
+
+    def __str__(self) -> str:
+        # pad to the next multiple of 64 bits, i.e. 64 chars for most users
+        width = max(SOLR_LONG_BITS, -(-self._value.bit_length() // 64) * 64)
+        return bin(self._value)[2:].zfill(width)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({bin(self._value)})"
+
+    @property
+    def width(self) -> int:
+        """Number of significant bits."""
+        return self._value.bit_length()
+
+    def popcount(self) -> int:
+        """Number of bits set."""
+        return self._value.bit_count()
+
+    def to_bytes(self) -> bytes:
+        """Big-endian bytes, as stored in UserBitmap.bitmap."""
+        return int_to_bytes(self._value)
+
+    def to_solr_long(
+        self, overflow: str = OVERFLOW_RAISE, logger: logging.Logger = default_logger
+    ) -> int:
+        """
+        Convert to a value for a Solr `_l` (signed 64-bit long) field.
+
+        Args:
+            overflow: What to do when bits past position 63 are set:
+                'raise' (default) raises OverflowError; 'truncate' keeps the low
+                64 bits and logs a warning. Use `to_solr_longs()` to keep all bits.
+            logger: Logger used to report truncation.
+
+        Returns:
+            int: The signed 64-bit value.
+
+        Raises:
+            OverflowError: If the mask is wider than 64 bits and overflow='raise'.
+        """
+        value = self._value
+        if value > SOLR_LONG_MASK:
+            if overflow != OVERFLOW_TRUNCATE:
+                raise OverflowError(
+                    f"Bitmask is {self.width} bits wide, a Solr long holds {SOLR_LONG_BITS}"
+                )
+            logger.warning(
+                f"Truncating {self.width} bits wide bitmask to {SOLR_LONG_BITS} bits"
+            )
+            value &= SOLR_LONG_MASK
+        return value - (1 << SOLR_LONG_BITS) if value >> 63 else value
+
+    def to_solr_longs(self) -> list[int]:
+        """
+        Split into signed 64-bit words, lowest bits first, e.g. to be stored in
+        `rights_bm_get_tr_l`, `rights_bm_get_tr_1_l`, ... Always returns at
+        least one word.
+        """
+        words = []
+        value = self._value
+        while True:
+            words.append(BitMask(value & SOLR_LONG_MASK).to_solr_long())
+            value >>= SOLR_LONG_BITS
+            if not value:
+                return words
+
+    @classmethod
+    def from_solr_longs(cls, words: list[int]) -> "BitMask":
+        """Inverse of `to_solr_longs()`."""
+        value = 0
+        for idx, word in enumerate(words):
+            value |= (word & SOLR_LONG_MASK) << (idx * SOLR_LONG_BITS)
+        return cls(value)
+
+
+class BitMask64(BitMask):
+    """
+    BitMask limited to 64 bits, kept for backward compatibility. Prefer BitMask.
+    """
+
+    __slots__ = ()
+
     def __init__(self, value: str | int | bytes = 0, reverse: bool = False):
         if isinstance(value, str):
             if not all(c in "01" for c in value):
@@ -12,23 +160,18 @@ class BitMask64:
             if len(value) > 8:
                 raise ValueError("Bytes must contain maximum 8 bytes")
             self._value = int.from_bytes(value, byteorder="big")
-        elif isinstance(value, BitMask64):
+        elif isinstance(value, BitMask):
             self._value = value._value
         else:
             raise TypeError(
                 "Value must be a string of bits or an integer. Type:", type(value)
             )
-        # Ensure the value is within the 64-bit range and pad if necessary
-        # self._value &= 0xFFFFFFFFFFFFFFFF
-
-    def __int__(self):
-        return self._value
 
     def __str__(self):
         return bin(self._value)[2:].zfill(64)
 
 
-def is_access_allowed(accessor: BitMask64, content: BitMask64) -> bool:
+def is_access_allowed(accessor: BitMask | int, content: BitMask | int) -> bool:
     """
     Check if access is allowed based on the provided bit masks.
 
@@ -37,9 +180,8 @@ def is_access_allowed(accessor: BitMask64, content: BitMask64) -> bool:
     result of the bitwise AND operation is greater than 0, access is allowed.
 
     Args:
-        accessor (BitMask64): The bit mask representing the accessor's permissions.
-        content (BitMask64): The bit mask representing the content's required permissions.
-                             If an integer is provided, it will be reversed.
+        accessor (BitMask | int): The bit mask representing the accessor's permissions.
+        content (BitMask | int): The bit mask representing the content's required permissions.
 
     Returns:
         bool: True if access is allowed, False otherwise.
@@ -0,0 +1,42 @@
+import threading
+from collections import defaultdict
+
+# Connection metrics of the current process. Kept free of Django imports:
+# impresso.utils.proxy records proxied connections from settings.py.
+_connection_stats: defaultdict[str, float] = defaultdict(float)
+_connection_stats_lock = threading.Lock()
+
+
+def record_connection_created(sender, connection, **kwargs) -> None:
+    """
+    `connection_created` signal receiver counting new database connections
+    per alias. With persistent connections (CONN_MAX_AGE) this number stays
+    close to the number of workers; if it follows the number of requests or
+    tasks, connections are not reused.
+    """
+    with _connection_stats_lock:
+        _connection_stats["connections_opened"] += 1
+        _connection_stats[f"connections_opened.{connection.alias}"] += 1
+
+
+def record_proxied_connection(seconds: float) -> None:
+    """
+    Record a MySQL connection opened through the SOCKS proxy and the time spent
+    on DNS, SOCKS5 and MySQL handshakes.
+    """
+    with _connection_stats_lock:
+        _connection_stats["proxied_connections_opened"] += 1
+        _connection_stats["proxied_connect_seconds"] += seconds
+
+
+def get_connection_stats() -> dict[str, float]:
+    """
+    Return a copy of the connection metrics of the current process.
+    """
+    with _connection_stats_lock:
+        return dict(_connection_stats)
+
+
+def reset_connection_stats() -> None:
+    with _connection_stats_lock:
+        _connection_stats.clear()
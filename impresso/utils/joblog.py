@@ -0,0 +1,198 @@
+"""
+Logging facade for the hot loops of jobs: messages are formatted only when
+emitted (%-style arguments, lazy `Truncated` values), per-item messages are
+sampled, payloads are capped, and a page ends with one structured summary
+carrying its counters. Job fields (job_id, user_id, job_type) are passed as
+`extra`, which pythonjsonlogger renders as JSON keys.
+"""
+
+import json
+import logging
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Optional
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from ..models import Job
+
+
+# attributes of every LogRecord: `extra` may not overwrite them
+RESERVED_FIELDS = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", (), None))
+) | {"message", "asctime"}
+
+
+def get_safe_fields(fields: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return the fields to pass as `extra`, with the names of LogRecord
+    attributes prefixed: `created` becomes `field_created`.
+    """
+    return {
+        f"field_{key}" if key in RESERVED_FIELDS else key: value
+        for key, value in fields.items()
+    }
+
+
+def _cap(text: str, max_chars: int) -> str:
+    if len(text) > max_chars:
+        return f"{text[:max_chars]}... (+{len(text) - max_chars} chars)"
+    return text
+
+
+def render_truncated(value: Any, max_chars: int) -> str:
+    """
+    Render a value for a log message, in at most about `max_chars`
+    characters. Lists stop being serialized once the cap is reached, and
+    tell how many items were left out.
+    """
+    if isinstance(value, str):
+        return _cap(value, max_chars)
+    if not isinstance(value, (list, tuple)):
+        return _cap(json.dumps(value, default=str), max_chars)
+    parts: list[str] = []
+    size = 0
+    for item in value:
+        if isinstance(item, (list, tuple)):
+            part = render_truncated(item, max_chars)
+        else:
+            part = _cap(json.dumps(item, default=str), max_chars)
+        # at least one item
+        if parts and size + len(part) > max_chars:
+            break
+        parts.append(part)
+        size += len(part) + 2
+    more = len(value) - len(parts)
+    return "[" + ", ".join(parts) + (f", ... {more} more]" if more else "]")
+
+
+class Truncated:
+    """
+    A value rendered with `render_truncated` when (and only when) the log
+    record is formatted: `logger.info("payload: %s", Truncated(todos))`.
+    """
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: Optional[int] = None):
+        self.value = value
+        self.max_chars = (
+            settings.IMPRESSO_LOG_MAX_CHARS if max_chars is None else max_chars
+        )
+
+    def __str__(self) -> str:
+        return render_truncated(self.value, self.max_chars)
+
+
+class _Fields:
+    # lazy `key=value ...` rendering of the summary
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.fields.items())
+
+
+class JobLogger:
+    """
+    Wrap a logger for the pages of a job.
+
+    Usage:
+
+        log = JobLogger(logger, job=job)
+        for doc in docs:
+            log.sample("doc", "doc %s ucoll_ss=%s", doc["id"], doc["ucoll_ss"])
+            log.count("docs")
+        log.summary("remove_collection_from_tr_passages", page=page)
+
+    Args:
+        logger (logging.Logger): The wrapped logger.
+        job (Job, optional): Adds job_id, user_id and job_type to every record.
+        sample_every (int, optional): `sample` emits the first message of a
+            key, then one every `sample_every`.
+            Defaults to settings.IMPRESSO_LOG_SAMPLE_EVERY.
+        max_chars (int, optional): Cap of `truncate`.
+            Defaults to settings.IMPRESSO_LOG_MAX_CHARS.
+        **fields: Added to every record. Fields, counters included, named
+            like a LogRecord attribute are prefixed (see get_safe_fields).
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        job: Optional["Job"] = None,
+        sample_every: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        **fields: Any,
+    ):
+        self.logger = logger
+        self.fields: dict[str, Any] = (
+            {"job_id": job.pk, "user_id": job.creator_id, "job_type": job.type}
+            if job is not None
+            else {}
+        )
+        self.fields.update(fields)
+        self.sample_every = max(1, sample_every or settings.IMPRESSO_LOG_SAMPLE_EVERY)
+        self.max_chars = (
+            settings.IMPRESSO_LOG_MAX_CHARS if max_chars is None else max_chars
+        )
+        self.counters: Counter[str] = Counter()
+        self.sampled: Counter[str] = Counter()
+        self.start = time.perf_counter()
+
+    def log(self, level: int, msg: str, *args: Any, **fields: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            # stacklevel: the caller of debug/info/sample/summary
+            self.logger.log(
+                level,
+                msg,
+                *args,
+                extra=get_safe_fields({**self.fields, **fields}),
+                stacklevel=3,
+            )
+
+    def debug(self, msg: str, *args: Any, **fields: Any) -> None:
+        self.log(logging.DEBUG, msg, *args, **fields)
+
+    def info(self, msg: str, *args: Any, **fields: Any) -> None:
+        self.log(logging.INFO, msg, *args, **fields)
+
+    def warning(self, msg: str, *args: Any, **fields: Any) -> None:
+        self.log(logging.WARNING, msg, *args, **fields)
+
+    def sample(
+        self, key: str, msg: str, *args: Any, level: int = logging.DEBUG
+    ) -> None:
+        """
+        Log a per-item message: the first one of `key`, then one every
+        `sample_every`. The summary reports how many were seen.
+        """
+        self.sampled[key] += 1
+        seen = self.sampled[key]
+        if seen == 1 or seen % self.sample_every == 0:
+            self.log(level, f"{msg} (#%d)", *args, seen)
+
+    def truncate(self, value: Any) -> Truncated:
+        return Truncated(value, self.max_chars)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def summary(self, msg: str, **fields: Any) -> None:
+        """
+        Emit one structured record for the page: counters, number of sampled
+        messages per key, elapsed seconds and `fields`; then start a new page.
+        """
+        page = {
+            **fields,
+            **self.counters,
+            **{f"sampled_{key}": seen for key, seen in self.sampled.items()},
+            "seconds": round(time.perf_counter() - self.start, 3),
+        }
+        self.log(logging.INFO, "%s %s", msg, _Fields(page), **page)
+        self.counters.clear()
+        self.sampled.clear()
+        self.start = time.perf_counter()
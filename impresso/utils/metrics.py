@@ -0,0 +1,301 @@
+"""
+Hot-path metrics of the current process (Solr requests, database queries,
+job phases), rendered in the Prometheus text format: served by the
+`metrics/` view in the web process and written as a textfile (for the
+node_exporter textfile collector or a pushgateway) by celery workers.
+
+Metrics are summaries without quantiles (`_count` and `_sum`) and counters:
+cheap to record, enough to compare where jobs spend their time. Kept free
+of Django imports at module level, like impresso.utils.db.
+"""
+
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+from urllib.parse import urlparse
+
+from .db import get_connection_stats
+
+COUNTER = "counter"
+SUMMARY = "summary"
+
+METRICS: dict[str, tuple[str, str]] = {
+    "impresso_solr_request_seconds": (
+        SUMMARY,
+        "Wall time of Solr requests, seen from the client.",
+    ),
+    "impresso_solr_qtime_seconds": (
+        SUMMARY,
+        "Solr QTime of the requests: "
+        "wall time minus QTime is network and serialization.",
+    ),
+    "impresso_solr_response_bytes": (SUMMARY, "Size of Solr responses."),
+    "impresso_solr_update_batch_size": (
+        SUMMARY,
+        "Number of documents per Solr update request.",
+    ),
+    "impresso_solr_errors_total": (COUNTER, "Solr requests with an error status."),
+    "impresso_job_phase_seconds": (
+        SUMMARY,
+        "Time per job type and phase: page (a helper page), fetch (Solr "
+        "page), transform, write (sinks) or progress (job save and task state).",
+    ),
+    "impresso_job_page_db_queries": (SUMMARY, "Database queries per job page."),
+    "impresso_job_page_db_seconds": (SUMMARY, "Database time per job page."),
+    "impresso_db_connections_opened_total": (
+        COUNTER,
+        "Database connections opened by the process.",
+    ),
+}
+
+# (name, sorted labels) -> [count, sum] for summaries, [unused, value] for counters
+_values: dict[tuple[str, tuple[tuple[str, str], ...]], list[float]] = defaultdict(
+    lambda: [0.0, 0.0]
+)
+_lock = threading.Lock()
+_last_textfile_write = 0.0
+_QTIME = re.compile(rb'"QTime"\s*:\s*(\d+)')
+
+
+def _key(name: str, labels: dict[str, Any]) -> tuple[str, tuple[tuple[str, str], ...]]:
+    if name not in METRICS:
+        raise KeyError(f"unknown metric {name}")
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels: Any) -> None:
+    """
+    Increment a counter.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _values[key][1] += value
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """
+    Add an observation to a summary.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _values[key][0] += 1
+        _values[key][1] += value
+
+
+@contextmanager
+def measure_phase(job_type: str, phase: str) -> Iterator[None]:
+    """
+    Time a phase of a job page, e.g. `with measure_phase(job.type, "fetch"):`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(
+            "impresso_job_phase_seconds",
+            time.perf_counter() - start,
+            job_type=job_type,
+            phase=phase,
+        )
+
+
+@contextmanager
+def measure_page_db(job_type: str) -> Iterator[None]:
+    """
+    Count the database queries of a job page and their time, with an
+    execute wrapper on the default connection.
+    """
+    from django.db import connection
+
+    stats = {"queries": 0, "seconds": 0.0}
+
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats["queries"] += 1
+            stats["seconds"] += time.perf_counter() - start
+
+    with connection.execute_wrapper(wrapper):
+        yield
+    observe("impresso_job_page_db_queries", stats["queries"], job_type=job_type)
+    observe("impresso_job_page_db_seconds", stats["seconds"], job_type=job_type)
+
+
+def measure_job_page(func: Callable) -> Callable:
+    """
+    Decorate a job helper processing one page: record its time (phase
+    "page") and its database queries, labelled with the type of its `job`
+    argument. Phases inside the page are measured with `measure_phase`.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        job = signature.bind_partial(*args, **kwargs).arguments.get("job")
+        job_type = getattr(job, "type", "unknown")
+        with measure_page_db(job_type), measure_phase(job_type, "page"):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_solr_request(
+    operation: str,
+    url: str,
+    seconds: float,
+    response: Optional[Any] = None,
+    batch_size: Optional[int] = None,
+) -> None:
+    """
+    Record a Solr request: wall time, QTime and response size per core,
+    handler and operation (the impresso.solr function), and the batch size
+    of updates.
+
+    Args:
+        operation (str): The impresso.solr function, e.g. "find_all".
+        url (str): The Solr URL, e.g. http://localhost:8983/solr/impresso/select.
+        seconds (float): The wall time of the request.
+        response (requests.Response, optional): The response. Defaults to None.
+        batch_size (int, optional): Number of documents sent. Defaults to None.
+    """
+    core_path, _, handler = urlparse(url).path.rstrip("/").rpartition("/")
+    labels = {
+        "core": core_path.rpartition("/")[2],
+        "handler": handler,
+        "operation": operation,
+    }
+    observe("impresso_solr_request_seconds", seconds, **labels)
+    if batch_size is not None:
+        observe("impresso_solr_update_batch_size", batch_size, **labels)
+    if response is None:
+        return
+    observe("impresso_solr_response_bytes", len(response.content), **labels)
+    if response.status_code >= 400:
+        error_labels = {**labels, "status": str(response.status_code)}
+        inc("impresso_solr_errors_total", 1, **error_labels)
+        return
+    # the responseHeader comes first: no second parse of large responses
+    qtime = _QTIME.search(response.content[:256])
+    if qtime is not None:
+        observe("impresso_solr_qtime_seconds", int(qtime.group(1)) / 1000, **labels)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def render_metrics(**extra_labels: Any) -> str:
+    """
+    Render the metrics of the process in the Prometheus text format, with
+    `extra_labels` added to every series.
+    """
+    with _lock:
+        values = {key: list(value) for key, value in _values.items()}
+    connections = get_connection_stats()
+    for alias_key, count in connections.items():
+        if alias_key.startswith("connections_opened."):
+            key = _key(
+                "impresso_db_connections_opened_total",
+                {"alias": alias_key.partition(".")[2]},
+            )
+            values[key] = [0.0, count]
+    if extra_labels:
+        values = {
+            (name, tuple(sorted(labels + _key(name, extra_labels)[1]))): value
+            for (name, labels), value in values.items()
+        }
+    lines = []
+    for name, (kind, help) in METRICS.items():
+        series = sorted((k, v) for k, v in values.items() if k[0] == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), (count, total) in series:
+            if kind == SUMMARY:
+                lines.append(f"{name}_count{_format_labels(labels)} {count:g}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6g}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {total:g}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def get_metrics_textfile_path(directory: str, name: Optional[str] = None) -> str:
+    return os.path.join(directory, f"{name or f'impresso-{os.getpid()}'}.prom")
+
+
+def write_metrics_textfile(directory: str, name: Optional[str] = None) -> str:
+    """
+    Write the metrics of the process to `<directory>/<name>.prom`, atomically
+    (the collector never reads a partial file). Every series has a `pid`
+    label: the files of the prefork children of a worker have distinct
+    series, as the textfile collector requires.
+
+    Args:
+        directory (str): The textfile collector directory.
+        name (str, optional): The file name. Defaults to impresso-<pid>.
+
+    Returns:
+        str: The path of the file.
+    """
+    path = get_metrics_textfile_path(directory, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_metrics(pid=os.getpid()))
+    os.replace(tmp, path)
+    return path
+
+
+def remove_metrics_textfile_on_process_shutdown(**kwargs: Any) -> None:
+    """
+    Celery `worker_process_shutdown` receiver removing the metrics textfile
+    of the worker process: the series of recycled children do not pile up.
+    """
+    from django.conf import settings
+
+    directory = settings.IMPRESSO_METRICS_TEXTFILE_DIR
+    if not directory:
+        return
+    try:
+        os.remove(get_metrics_textfile_path(directory))
+    except FileNotFoundError:
+        pass
+
+
+def write_metrics_textfile_on_task_postrun(**kwargs: Any) -> None:
+    """
+    Celery `task_postrun` receiver writing the metrics textfile of the worker
+    process, at most every settings.IMPRESSO_METRICS_TEXTFILE_INTERVAL seconds.
+    """
+    global _last_textfile_write
+    from django.conf import settings
+
+    directory = settings.IMPRESSO_METRICS_TEXTFILE_DIR
+    if not directory:
+        return
+    now = time.monotonic()
+    if now - _last_textfile_write < settings.IMPRESSO_METRICS_TEXTFILE_INTERVAL:
+        return
+    _last_textfile_write = now
+    write_metrics_textfile(directory)
+
+
+def reset_metrics() -> None:
+    global _last_textfile_write
+    with _lock:
+        _values.clear()
+    _last_textfile_write = 0.0
@@ -0,0 +1,187 @@
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Collate
+
+from impresso.models.collectableItem import CollectableItem
+from impresso.models.collection import Collection
+
+
+def add_collectable_items(
+    collection_id: str, items: Iterable[CollectableItem]
+) -> int:
+    """
+    Store the collectable items of a collection, skipping the items already in
+    it, and add the number of created rows to `Collection.count_items`.
+
+    `bulk_create(ignore_conflicts=True)` does not tell how many rows were
+    inserted, so the existing item ids are read first (one indexed query on
+    the unique (item_id, collection) pair). Concurrent writers may skew the
+    count: `reconcile_collection_count_items` fixes it.
+
+    Args:
+        collection_id (str): The collection the items belong to.
+        items (Iterable[CollectableItem]): Unsaved items of this collection.
+
+    Returns:
+        int: The number of created items.
+    """
+    items_by_id = {item.item_id: item for item in items}
+    if not items_by_id:
+        return 0
+    existing_ids = set(
+        CollectableItem.objects.filter(
+            collection_id=collection_id, item_id__in=items_by_id.keys()
+        ).values_list("item_id", flat=True)
+    )
+    new_items = [
+        item for item_id, item in items_by_id.items() if item_id not in existing_ids
+    ]
+    if not new_items:
+        return 0
+    with transaction.atomic():
+        CollectableItem.objects.bulk_create(new_items, ignore_conflicts=True)
+        Collection.increment_count_items(collection_id, len(new_items))
+    return len(new_items)
+
+
+def remove_collectable_items(collection_id: str, items_ids: Iterable[str]) -> int:
+    """
+    Delete the given items from a collection and subtract the number of
+    deleted rows from `Collection.count_items`.
+
+    Returns:
+        int: The number of deleted items.
+    """
+    with transaction.atomic():
+        _, deleted_by_model = CollectableItem.objects.filter(
+            collection_id=collection_id, item_id__in=list(items_ids)
+        ).delete()
+        deleted = deleted_by_model.get(CollectableItem._meta.label, 0)
+        Collection.increment_count_items(collection_id, -deleted)
+    return deleted
+
+
+def reconcile_collection_count_items(
+    collection_ids: Optional[Iterable[str]] = None, batch_size: int = 1000
+) -> int:
+    """
+    Set `Collection.count_items` to the number of collectable items in the db,
+    for the collections whose cached count drifted. One grouped count over
+    collectable_items and one bulk update: Solr is not queried.
+
+    Args:
+        collection_ids (Iterable[str], optional): Restrict the reconciliation
+            to these collections. Defaults to None (all collections).
+        batch_size (int): Number of collections per UPDATE. Defaults to 1000.
+
+    Returns:
+        int: The number of collections whose count_items was fixed.
+    """
+    collections = Collection.objects.all()
+    items = CollectableItem.objects.all()
+    if collection_ids is not None:
+        collection_ids = list(collection_ids)
+        collections = collections.filter(pk__in=collection_ids)
+        items = items.filter(collection_id__in=collection_ids)
+    counts = dict(
+        items.order_by()
+        .values("collection_id")
+        .annotate(total=Count("id"))
+        .values_list("collection_id", "total")
+    )
+    drifted = []
+    for pk, count_items in collections.values_list("pk", "count_items").iterator():
+        expected = counts.get(pk, 0)
+        if count_items != expected:
+            drifted.append(Collection(pk=pk, count_items=expected))
+    Collection.objects.bulk_update(drifted, ["count_items"], batch_size=batch_size)
+    return len(drifted)
+
+
+# collations comparing strings by code point, like Python and Solr string
+# fields. The default MySQL collation is case-insensitive: "excelsior-..."
+# would sort before "GDL-...".
+BINARY_COLLATIONS = {"mysql": "utf8mb4_bin", "sqlite": "BINARY", "postgresql": "C"}
+
+
+def iter_collectable_item_ids(
+    collection_id: str, chunk_size: int = 5000
+) -> Iterator[str]:
+    """
+    Iterate over the item ids of a collection in ascending code point order
+    (see BINARY_COLLATIONS), with keyset pagination: each chunk starts after
+    the last id of the previous one, and the (collection, item_id) index
+    limits every query to the rows of the collection.
+
+    Args:
+        collection_id (str): The collection id.
+        chunk_size (int): Number of ids fetched per query. Defaults to 5000.
+
+    Yields:
+        str: The item ids.
+    """
+    items = CollectableItem.objects.filter(collection_id=collection_id).alias(
+        item_id_bin=Collate("item_id", BINARY_COLLATIONS[connection.vendor])
+    )
+    last_item_id = None
+    while True:
+        chunk_items = items
+        if last_item_id is not None:
+            chunk_items = items.filter(item_id_bin__gt=last_item_id)
+        chunk = list(
+            chunk_items.order_by("item_id_bin").values_list("item_id", flat=True)[
+                :chunk_size
+            ]
+        )
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_item_id = chunk[-1]
+
+
+def _ascending_unique(ids: Iterable[str], source: int) -> Iterator[tuple[str, int]]:
+    previous = None
+    for item_id in ids:
+        if previous is not None:
+            if item_id == previous:
+                continue
+            if item_id < previous:
+                raise ValueError(
+                    f"ids of source {source} are not sorted: "
+                    f"{item_id!r} after {previous!r}"
+                )
+        previous = item_id
+        yield item_id, source
+
+
+def merge_sorted_ids(
+    *streams: Iterable[str],
+) -> Iterator[tuple[str, tuple[bool, ...]]]:
+    """
+    Merge-join streams of ascending ids (e.g. from the db and from Solr
+    indexes) in constant memory. Consecutive duplicates in a stream are
+    skipped; a stream going backwards raises a ValueError, as the result would
+    be wrong.
+
+    Args:
+        *streams (Iterable[str]): Streams of ids sorted in ascending string order.
+
+    Yields:
+        tuple[str, tuple[bool, ...]]: Every id found in any stream, in ascending
+        order, with its presence in each stream.
+
+    Example:
+    >>> list(merge_sorted_ids(["a", "b"], ["b", "c"]))
+    [('a', (True, False)), ('b', (True, True)), ('c', (False, True))]
+    """
+    merged = heapq.merge(
+        *(_ascending_unique(ids, source) for source, ids in enumerate(streams))
+    )
+    for item_id, group in groupby(merged, key=itemgetter(0)):
+        sources = {source for _, source in group}
+        yield item_id, tuple(source in sources for source in range(len(streams)))
@@ -51,12 +51,11 @@ def get_plan_from_user_groups(user: User) -> Tuple[str, Optional[str]]:
       Tuple[str, Optional[str]]: A tuple containing the plan label and the plan group name.
                      If the user does not belong to any group, the group name is None.
     """
-    if not user.groups.exists():
+    # Retrieve the names of the user's groups, using prefetched groups if any
+    user_groups_names = [group.name for group in user.groups.all()]
+    if not user_groups_names:
         return (settings.IMPRESSO_GROUP_USER_PLAN_NONE_LABEL, None)
 
-    # Retrieve the names of the user's groups
-    user_groups_names = [n for n in user.groups.values_list("name", flat=True)]
-
     # Default to the basic plan
     plan_group = settings.IMPRESSO_GROUP_USER_PLAN_BASIC
     plan_label = settings.IMPRESSO_GROUP_USER_PLAN_BASIC_LABEL
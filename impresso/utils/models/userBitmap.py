@@ -0,0 +1,121 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from impresso.models.userBitmap import UserBitmap
+from impresso.models.userBitmapSubscription import UserBitmapSubscription
+from impresso.utils.bitmask import int_to_bytes
+
+
+def compute_user_bitmaps(
+    user_bitmap_ids: Optional[Iterable[int]] = None,
+    user_ids: Optional[Iterable[int]] = None,
+) -> dict[int, int]:
+    """
+    Compute the up-to-date bitmap of many users at once, with set-based queries
+    instead of calling `UserBitmap.get_up_to_date_bitmap()` for each user:
+    one pass over the bitmaps, one over the plan group memberships and one over
+    the subscriptions. The bits are aggregated in Python following the same
+    rules as `UserBitmap.get_up_to_date_bitmap()`.
+
+    Args:
+        user_bitmap_ids (Iterable[int], optional): Restrict the computation to
+            these UserBitmap ids. Defaults to None (all bitmaps).
+        user_ids (Iterable[int], optional): Restrict the computation to the
+            bitmaps of these users. Defaults to None (all users).
+
+    Returns:
+        dict[int, int]: The expected bitmap as an integer, per UserBitmap id.
+    """
+    bitmaps = UserBitmap.objects.all()
+    restricted = user_bitmap_ids is not None or user_ids is not None
+    if user_bitmap_ids is not None:
+        bitmaps = bitmaps.filter(pk__in=list(user_bitmap_ids))
+    if user_ids is not None:
+        bitmaps = bitmaps.filter(user_id__in=list(user_ids))
+    rows = list(bitmaps.values_list("pk", "user_id", "date_accepted_terms"))
+
+    plan_by_group_name = {
+        settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER: UserBitmap.USER_PLAN_RESEARCHER,
+        settings.IMPRESSO_GROUP_USER_PLAN_EDUCATIONAL: UserBitmap.USER_PLAN_EDUCATIONAL,
+    }
+    memberships = User.groups.through.objects.filter(
+        group__name__in=plan_by_group_name.keys()
+    ).values_list("user_id", "group__name")
+    if restricted:
+        memberships = memberships.filter(user_id__in=[r[1] for r in rows])
+    user_groups: dict[int, set[str]] = defaultdict(set)
+    for user_id, group_name in memberships:
+        user_groups[user_id].add(group_name)
+
+    subscriptions = UserBitmapSubscription.objects.values_list(
+        "userbitmap_id", "specialmembershipdataset__bitmap_position"
+    )
+    if restricted:
+        subscriptions = subscriptions.filter(userbitmap_id__in=[r[0] for r in rows])
+    subscription_bits: dict[int, int] = defaultdict(int)
+    for user_bitmap_id, bitmap_position in subscriptions:
+        subscription_bits[user_bitmap_id] |= 1 << bitmap_position
+
+    result: dict[int, int] = {}
+    for pk, user_id, date_accepted_terms in rows:
+        if not date_accepted_terms:
+            result[pk] = UserBitmap.USER_PLAN_GUEST
+            continue
+        groups = user_groups.get(user_id, set())
+        if settings.IMPRESSO_GROUP_USER_PLAN_RESEARCHER in groups:
+            value = UserBitmap.USER_PLAN_RESEARCHER
+        elif settings.IMPRESSO_GROUP_USER_PLAN_EDUCATIONAL in groups:
+            value = UserBitmap.USER_PLAN_EDUCATIONAL
+        else:
+            value = UserBitmap.USER_PLAN_AUTH_USER
+        result[pk] = value | subscription_bits.get(pk, 0)
+    return result
+
+
+def rebuild_user_bitmaps(
+    user_ids: Iterable[int],
+    create_missing: bool = True,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Recompute and store the bitmaps of the given users in bulk: a few
+    set-based queries (see `compute_user_bitmaps`) and a chunked
+    `bulk_update` of the bitmaps that actually changed. Used instead of
+    calling `UserBitmap.save()` for each user.
+
+    Args:
+        user_ids (Iterable[int]): The ids of the users whose bitmap must be rebuilt.
+        create_missing (bool, optional): Create the missing UserBitmap rows with
+            a single bulk insert. Defaults to True.
+        batch_size (int, optional): Number of rows per bulk query. Defaults to 1000.
+
+    Returns:
+        int: The number of bitmaps written.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    if create_missing:
+        existing = set(
+            UserBitmap.objects.filter(user_id__in=user_ids).values_list(
+                "user_id", flat=True
+            )
+        )
+        UserBitmap.objects.bulk_create(
+            [UserBitmap(user_id=user_id) for user_id in user_ids - existing],
+            batch_size=batch_size,
+        )
+    expected_bitmaps = compute_user_bitmaps(user_ids=user_ids)
+    changed = []
+    for user_bitmap in UserBitmap.objects.filter(pk__in=expected_bitmaps).only(
+        "pk", "bitmap"
+    ):
+        bitmap = int_to_bytes(expected_bitmaps[user_bitmap.pk])
+        if user_bitmap.bitmap is None or bytes(user_bitmap.bitmap) != bitmap:
+            user_bitmap.bitmap = bitmap
+            changed.append(user_bitmap)
+    UserBitmap.objects.bulk_update(changed, ["bitmap"], batch_size=batch_size)
+    return len(changed)
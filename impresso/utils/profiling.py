@@ -0,0 +1,176 @@
+"""
+Opt-in sampling profiler for jobs. When `Job.profile` is set, every task of
+the job runs under `profile_job`: a thread samples the stack of the task
+thread every settings.IMPRESSO_PROFILER_INTERVAL seconds, and the samples
+are merged into `Job.profile_output`, in the folded stacks format read by
+flamegraph.pl and speedscope (https://www.speedscope.app). Jobs without the
+flag pay one attribute lookup per task.
+"""
+
+import logging
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from types import FrameType
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from ..models import Job
+
+default_logger = logging.getLogger(__name__)
+
+# deepest frames kept per sample, from the root of the stack
+MAX_STACK_DEPTH = 128
+
+
+def get_frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+def fold_stack(frame: Optional[FrameType]) -> str:
+    """
+    Return the stack of a frame as a single folded line, root first:
+    `module.func;module.Class.method;...`.
+    """
+    names = []
+    while frame is not None:
+        names.append(get_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names[-MAX_STACK_DEPTH:]))
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (by default the calling thread) from a
+    daemon thread. Use as a context manager; `samples` counts the folded
+    stacks.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self, thread_id: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                self.samples[fold_stack(frame)] += 1
+
+    def start(self) -> None:
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self.thread_id,),
+            name="impresso-profiler",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def parse_folded(text: str) -> Counter[str]:
+    """
+    Parse folded stacks (`stack count` per line) into a Counter.
+    """
+    samples: Counter[str] = Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            samples[stack] += int(count)
+    return samples
+
+
+def format_folded(samples: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+def get_hot_functions(
+    samples: Counter[str], limit: int = 10
+) -> list[tuple[str, int, int]]:
+    """
+    Return the functions with the most samples on top of the stack.
+
+    Args:
+        samples (Counter): Folded stacks and their counts.
+        limit (int, optional): Number of functions. Defaults to 10.
+
+    Returns:
+        list: (function, self samples, total samples), hottest first; total
+            counts the samples where the function is anywhere in the stack.
+    """
+    own: Counter[str] = Counter()
+    total: Counter[str] = Counter()
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for name in set(frames):
+            total[name] += count
+    return [(name, count, total[name]) for name, count in own.most_common(limit)]
+
+
+def read_job_profile(job: Job) -> Counter[str]:
+    if not job.profile_output:
+        return Counter()
+    with job.profile_output.open("rb") as f:
+        return parse_folded(f.read().decode("utf-8"))
+
+
+def save_job_profile(job: Job, samples: Counter[str]) -> None:
+    """
+    Merge samples into the job profile. The tasks of a job run one after
+    the other, so read-merge-write does not race.
+    """
+    merged = read_job_profile(job)
+    merged.update(samples)
+    if job.profile_output:
+        job.profile_output.delete(save=False)
+    job.profile_output.save(
+        f"job-{job.pk}.folded",
+        ContentFile(format_folded(merged).encode("utf-8")),
+        save=False,
+    )
+    Job.objects.filter(pk=job.pk).update(profile_output=job.profile_output.name)
+
+
+@contextmanager
+def profile_job(job: Job, logger: logging.Logger = default_logger) -> Iterator[None]:
+    """
+    Profile the block when `job.profile` is set, e.g. the body of a page task:
+
+        with profile_job(job):
+            helper_export_query_as_csv_progress(job=job, ...)
+    """
+    if not job.profile:
+        yield
+        return
+    profiler = SamplingProfiler(interval=settings.IMPRESSO_PROFILER_INTERVAL)
+    profiler.start()
+    try:
+        yield
+    finally:
+        # failing tasks are profiled too
+        profiler.stop()
+        try:
+            save_job_profile(job, profiler.samples)
+        except Exception as e:
+            # never fail a job because of its profile
+            logger.exception(f"[job:{job.pk}] profile not saved: {e}")
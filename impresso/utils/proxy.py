@@ -2,14 +2,27 @@ import ipaddress
 import json
 import logging
 import socket
-from typing import TypedDict
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, TypedDict
 from urllib.parse import urlparse
-import sockslib
 
 from impresso.base import get_env_variable
+from impresso.utils.db import record_proxied_connection
+
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
+# seconds a resolved proxy IP is reused before asking the resolver again.
+# Read from the env directly: this module is imported by settings.py
+PROXY_DNS_TTL = float(get_env_variable("IMPRESSO_PROXY_DNS_TTL", 300))
+
+_dns_cache: dict[str, tuple[str, float]] = {}
+_dns_cache_lock = threading.Lock()
+
 
 class ImpressoProxySettings(TypedDict):
     host: str
@@ -27,8 +40,8 @@ def proxy_interceptor(proxy_settings: ImpressoProxySettings | None = None):
             host, port = kwargs["host"], kwargs["port"]
 
             if proxy_settings is not None and host in proxy_settings["domains"]:
-
-                proxy_ip = socket.gethostbyname(proxy_settings["host"])
+                start = time.perf_counter()
+                proxy_ip = resolve_host(proxy_settings["host"])
 
                 logger.info(
                     "Establishing MySQL connection to %s through SOCKS proxy (%s:%d with IP: %s).",
@@ -45,12 +58,9 @@ def proxy_interceptor(proxy_settings: ImpressoProxySettings | None = None):
                     *args, **{**kwargs, "defer_connect": True}
                 )
 
-                # Check if the proxy IP is IPv6 or IPv4
-                address_family = (
-                    socket.AF_INET6
-                    if isinstance(ipaddress.ip_address(proxy_ip), ipaddress.IPv6Address)
-                    else socket.AF_INET
-                )
+                import sockslib
+
+                address_family = get_address_family(proxy_ip)
 
                 sockslib.set_default_proxy(
                     (proxy_settings["host"], proxy_settings["port"]),
@@ -62,6 +72,7 @@ def proxy_interceptor(proxy_settings: ImpressoProxySettings | None = None):
                 s.connect((host, port))
 
                 connection.connect(sock=s)
+                record_proxied_connection(time.perf_counter() - start)
 
                 logger.info(
                     "MySQL connection established to %s through SOCKS proxy (%s:%d with IP: %s).",
@@ -95,11 +106,68 @@ def load_proxy_settings() -> ImpressoProxySettings | None:
         return None
 
 
+@lru_cache(maxsize=1)
+def get_proxy_settings() -> ImpressoProxySettings | None:
+    """
+    Same as `load_proxy_settings`, parsed once per process.
+    Call `clear_proxy_cache` to reload them.
+    """
+    return load_proxy_settings()
+
+
+def clear_proxy_cache() -> None:
+    """
+    Forget the parsed proxy settings, the per host decisions, the proxied
+    sessions and the resolved proxy IPs.
+    """
+    get_proxy_settings.cache_clear()
+    _get_proxy_for_hostname.cache_clear()
+    _get_session_for_proxy.cache_clear()
+    with _dns_cache_lock:
+        _dns_cache.clear()
+
+
+def resolve_host(host: str, ttl: float | None = None) -> str:
+    """
+    Resolve a hostname to an IP address, caching the result for `ttl` seconds.
+
+    Args:
+        host (str): The hostname to resolve.
+        ttl (float | None): Cache duration in seconds. Defaults to PROXY_DNS_TTL.
+
+    Returns:
+        str: The IP address of the host.
+
+    Raises:
+        socket.gaierror: If the host cannot be resolved.
+    """
+    ttl = PROXY_DNS_TTL if ttl is None else ttl
+    now = time.monotonic()
+    with _dns_cache_lock:
+        cached = _dns_cache.get(host)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    ip = socket.gethostbyname(host)
+    with _dns_cache_lock:
+        _dns_cache[host] = (ip, now + ttl)
+    return ip
+
+
+@lru_cache(maxsize=64)
+def get_address_family(ip: str) -> socket.AddressFamily:
+    """
+    Return AF_INET6 for an IPv6 address, AF_INET otherwise.
+    """
+    if isinstance(ipaddress.ip_address(ip), ipaddress.IPv6Address):
+        return socket.AF_INET6
+    return socket.AF_INET
+
+
 def with_optional_proxy(original_connect):
     """
     Decorator to apply the proxy interceptor if proxy settings are provided.
     """
-    proxy_settings = load_proxy_settings()
+    proxy_settings = get_proxy_settings()
 
     if proxy_settings:
         return proxy_interceptor(proxy_settings)(original_connect)
@@ -107,25 +175,52 @@ def with_optional_proxy(original_connect):
         return original_connect
 
 
+def _get_hostname(host_or_url: str) -> str:
+    # get domain from host_or_url using standard library
+    if "://" in host_or_url:
+        # If it's a URL, parse it and extract the hostname
+        return urlparse(host_or_url).netloc
+    # If it's just a host, use it as is
+    return host_or_url.split("/")[0]
+
+
+@lru_cache(maxsize=256)
+def _get_proxy_for_hostname(hostname: str) -> tuple[str, int] | None:
+    proxy_settings = get_proxy_settings()
+    if proxy_settings and hostname in proxy_settings["domains"]:
+        return (proxy_settings["host"], proxy_settings["port"])
+    return None
+
+
 def get_proxy_for_host_or_url(host_or_url: str) -> tuple[str, int] | None:
     """
     Get the proxy settings for a given host or URL.
     Returns a tuple of (host, port) if proxy is configured for the host,
-    otherwise returns None.
+    otherwise returns None. Settings are parsed once and the decision is
+    cached per hostname.
     """
-    proxy_settings = load_proxy_settings()
-    if not proxy_settings:
-        return None
+    return _get_proxy_for_hostname(_get_hostname(host_or_url))
 
-    # get domain from host_or_url using standard library
-    if "://" in host_or_url:
-        # If it's a URL, parse it and extract the hostname
-        hostname = urlparse(host_or_url).netloc
-    else:
-        # If it's just a host, use it as is
-        hostname = host_or_url.split("/")[0]
 
-    if hostname in proxy_settings["domains"]:
-        return (proxy_settings["host"], proxy_settings["port"])
+@lru_cache(maxsize=8)
+def _get_session_for_proxy(proxy: tuple[str, int] | None) -> "requests.Session":
+    import requests
 
-    return None
+    session = requests.Session()
+    if proxy:
+        session.proxies = {
+            "http": f"socks4://{proxy[0]}:{proxy[1]}",
+            "https": f"socks4://{proxy[0]}:{proxy[1]}",
+        }
+    return session
+
+
+def get_session_for_host_or_url(host_or_url: str) -> "requests.Session":
+    """
+    Get a `requests.Session` for the given host or URL, going through the
+    SOCKS proxy if one is configured for the host.
+
+    Sessions are shared per proxy, so keep-alive connections are reused
+    across requests to the same Solr instance.
+    """
+    return _get_session_for_proxy(get_proxy_for_host_or_url(host_or_url))
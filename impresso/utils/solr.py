@@ -1,6 +1,6 @@
 from typing import Dict, Any
 from django.conf import settings
-from .bitmask import is_access_allowed, BitMask64
+from .bitmask import is_access_allowed, BitMask
 
 
 def serialize_solr_doc_content_item_to_plain_dict(
@@ -31,7 +31,7 @@ def serialize_solr_doc_content_item_to_plain_dict(
     return result
 
 
-def mapper_doc_redact_contents(doc: dict, user_bitmask: BitMask64) -> dict:
+def mapper_doc_redact_contents(doc: dict, user_bitmask: BitMask) -> dict:
     """
     Redacts the content of a document based on its bitmap key (_bm_get_tr_s)
     or its availability and year.
@@ -43,7 +43,7 @@ def mapper_doc_redact_contents(doc: dict, user_bitmask: BitMask64) -> dict:
     Args:
         doc (dict): A dictionary representing the document obtained via the serializer function .
             to be considered valid, tt must contain the key "year".
-        user_bitmask (BitMask64): The user's bitmap key, as BitMask64 instance.
+        user_bitmask (BitMask): The user's bitmap key, as BitMask instance.
 
     Returns:
         dict: The modified document dictionary with redacted content if applicable.
@@ -63,7 +63,7 @@ def mapper_doc_redact_contents(doc: dict, user_bitmask: BitMask64) -> dict:
     if content_bitmask is not None:
         is_transcript_available = is_access_allowed(
             accessor=user_bitmask,
-            content=BitMask64(content_bitmask),
+            content=BitMask(content_bitmask),
         )
     # Previous check
     # if doc.get("_bm_get_tr_i", None) is not None:
@@ -4,6 +4,7 @@ import json
 from typing import Tuple, Any, Dict, Optional
 from django.conf import settings
 from ...models import Job
+from ..metrics import measure_phase
 
 
 TASKSTATE_INIT = "INIT"
@@ -101,22 +102,24 @@ def update_job_progress(
             f"type={job.type} status={job.status} taskstate={taskstate} "
             f"progress={progress * 100:.2f}% - message: '{message}'"
         )
-    job.save()
-    task.update_state(
-        state=taskstate,
-        meta={
-            "job": {
-                "id": job.pk,
-                "type": job.type,
-                "status": job.status,
-                "date_created": job.date_created.isoformat(),
-                "date_last_modified": job.date_last_modified.isoformat(),
-                "creator": job.creator.id,
-                "description": job.description,
+    # the job row and the celery result backend, once per page
+    with measure_phase(job.type, "progress"):
+        job.save()
+        task.update_state(
+            state=taskstate,
+            meta={
+                "job": {
+                    "id": job.pk,
+                    "type": job.type,
+                    "status": job.status,
+                    "date_created": job.date_created.isoformat(),
+                    "date_last_modified": job.date_last_modified.isoformat(),
+                    "creator": job.creator.id,
+                    "description": job.description,
+                },
+                **job_current_extra,
             },
-            **job_current_extra,
-        },
-    )
+        )
 
 
 def update_job_completed(
@@ -4,11 +4,13 @@ from logging import Logger
 from django.core import mail
 from django.contrib.auth.models import User, Group
 
-from impresso.utils.tasks.email import send_templated_email_with_context
+from impresso.utils.tasks.email import (
+    get_emails_rendered_contents,
+    send_templated_email_with_context,
+)
 from ...models import UserChangePlanRequest
 from django_registration.backends.activation.views import RegistrationView
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.urls import reverse
 
@@ -26,9 +28,7 @@ def getEmailsContents(prefix: str, context: dict) -> tuple[str, str]:
     Returns:
         tuple[str, str]: A tuple containing the rendered text content and HTML content.
     """
-    txt_content = render_to_string(f"emails/{prefix}.txt", context=context)
-    html_content = render_to_string(f"emails/{prefix}.html", context=context)
-    return txt_content, html_content
+    return get_emails_rendered_contents(prefix=prefix, context=context)
 
 
 def send_emails_after_user_registration(user_id: int, logger=default_logger):
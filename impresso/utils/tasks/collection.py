@@ -1,11 +1,32 @@
 import logging
 import time
-from typing import Tuple, Any, Optional, cast
+from typing import Tuple, Any, Iterable, Optional
 from django.conf import settings
-from django.db.utils import IntegrityError
-from . import get_pagination, is_task_stopped, get_list_diff
-from ...solr import find_all, update
+from django.core.exceptions import ImproperlyConfigured
+from requests.exceptions import RequestException
+from . import get_pagination, get_list_diff
+from ...solr import (
+    SolrStreamingError,
+    find_all,
+    get_core_from_url,
+    get_facet_counts,
+    iter_all,
+    quote_streaming_value,
+    stream,
+    update,
+)
 from ...models import Job, Collection, CollectableItem
+from ..metrics import measure_job_page
+from ..models.collection import add_collectable_items
+from .engine import (
+    PagedSolrJob,
+    SolrSource,
+    collectable_items_sink,
+    remove_collectable_items_sink,
+    solr_update_sink,
+    ucoll_updates,
+)
+from .textreuse import add_collection_to_tr_passages_with_join
 
 default_logger = logging.getLogger(__name__)
 
@@ -24,65 +45,68 @@ def update_collections_in_tr_passages(
     items_ids = [doc["id"] for doc in solr_content_items]
     # 3. get collection per content item as a dict
     items_dict = {doc["id"]: doc.get("ucoll_ss", []) for doc in solr_content_items}
-    # 3. get current collection and _version_ from
-    #    IMPRESSO_SOLR_PASSAGES_URL_SELECT endpoint
-    tr_passages = find_all(
-        q=" OR ".join(map(lambda id: f"ci_id_s:{id}", items_ids)),
-        url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
-        fl="id,ucoll_ss,_version_,ci_id_s",
-        skip=skip,
-        limit=limit,
-        logger=None,
-    )
-    total_tr_passages = tr_passages["response"]["numFound"]
-    logger.info(
-        f"update_collections_in_tr_passages q=<tr_passages for given ci ids> total={total_tr_passages} "
-        f"skip={skip} limit={limit}"
-    )
-    # No passages (or no more passages) present, exit.
-    if total_tr_passages == 0:
-        return
-    # this list will contain solr items for the update endpoint
-    solr_updates_needed = []
-    # loop through all tr passages
-    for tr_passage in tr_passages["response"]["docs"]:
-        # get list of collection in TR ucoll_ss field
-        tr_ucolls = tr_passage.get("ucoll_ss", [])
-        # get list of collections in related content items
-        ci_ucolls = items_dict[tr_passage["ci_id_s"]]
-        # get differences between the items collection and the current TR
-        missing_ucolls = get_list_diff(tr_ucolls, ci_ucolls)
-        if missing_ucolls:
-            solr_updates_needed.append(
-                {
-                    "id": tr_passage.get("id"),
-                    "_version_": tr_passage.get("_version_"),
-                    "ucoll_ss": {"set": ci_ucolls},
-                }
-            )
-    logger.info(f"(update) solr updates needed for TR: {len(solr_updates_needed)}")
-
-    if solr_updates_needed:
-        result = update(
-            url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
-            todos=solr_updates_needed,
-            logger=logger,
+    while True:
+        # 3. get current collection and _version_ from
+        #    IMPRESSO_SOLR_PASSAGES_URL_SELECT endpoint
+        tr_passages = find_all(
+            q=" OR ".join(map(lambda id: f"ci_id_s:{id}", items_ids)),
+            url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+            fl="id,ucoll_ss,_version_,ci_id_s",
+            skip=skip,
+            limit=limit,
+            logger=None,
         )
-        result_response_header = result.get("responseHeader")
-        result_adds = len(result.get("adds", []))
+        total_tr_passages = tr_passages["response"]["numFound"]
         logger.info(
-            f"(update) solr updates response={result_response_header}, "
-            f"adds={result_adds}"
+            "update_collections_in_tr_passages q=<tr_passages for given ci ids> "
+            "total=%s skip=%s limit=%s",
+            total_tr_passages,
+            skip,
+            limit,
         )
+        # No passages (or no more passages) present, exit.
+        if total_tr_passages == 0:
+            return
+        # this list will contain solr items for the update endpoint
+        solr_updates_needed = []
+        # loop through all tr passages
+        for tr_passage in tr_passages["response"]["docs"]:
+            # get list of collection in TR ucoll_ss field
+            tr_ucolls = tr_passage.get("ucoll_ss", [])
+            # get list of collections in related content items
+            ci_ucolls = items_dict[tr_passage["ci_id_s"]]
+            # get differences between the items collection and the current TR
+            missing_ucolls = get_list_diff(tr_ucolls, ci_ucolls)
+            if missing_ucolls:
+                solr_updates_needed.append(
+                    {
+                        "id": tr_passage.get("id"),
+                        "_version_": tr_passage.get("_version_"),
+                        "ucoll_ss": {"set": ci_ucolls},
+                    }
+                )
+        logger.info("(update) solr updates needed for TR: %s", len(solr_updates_needed))
+
+        if solr_updates_needed:
+            result = update(
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+                todos=solr_updates_needed,
+                logger=logger,
+            )
+            logger.info(
+                "(update) solr updates response=%s, adds=%s",
+                result.get("responseHeader"),
+                len(result.get("adds", [])),
+            )
 
-    # check whether it is done
-    if total_tr_passages > skip + limit:
+        # check whether it is done
+        if total_tr_passages <= skip + limit:
+            return
         time.sleep(1.0)
-        update_collections_in_tr_passages(
-            solr_content_items=solr_content_items, skip=skip + limit, limit=limit
-        )
+        skip += limit
 
 
+@measure_job_page
 def helper_update_collections_in_tr_passages_progress(
     collection_id: str, job: Job, skip: int = 0, limit: int = 100, logger=default_logger
 ) -> Tuple[int, int, float]:
@@ -98,43 +122,42 @@ def helper_update_collections_in_tr_passages_progress(
     Returns:
         Tuple[int, int, float]: A tuple containing the current page, total number of loops, and progress percentage.
     """
-    query = (
-        f"ucoll_ss:{collection_id} AND cluster_id_ss:[* TO *]"
-        if collection_id
-        else "ucoll_ss:* AND cluster_id_ss:[* TO *]"
-    )
+    if collection_id and settings.IMPRESSO_SOLR_TR_JOIN:
+        # one server-side join instead of pages of content item ids
+        add_collection_to_tr_passages_with_join(
+            collection_id=collection_id, batch_size=limit, logger=logger
+        )
+        return (1, 1, 1.0)
     # 1. get all content items having at least a collection AND a cluster
-    content_items = find_all(
-        q=query,
-        url=settings.IMPRESSO_SOLR_URL_SELECT,
-        fl="id,ucoll_ss",
-        skip=skip,
+    # we use the Search solr pagination because we don't know how many items
+    # we have to process in the TR passages
+    batch = PagedSolrJob(
+        job=job,
+        source=SolrSource(
+            q=(
+                f"ucoll_ss:{collection_id} AND cluster_id_ss:[* TO *]"
+                if collection_id
+                else "ucoll_ss:* AND cluster_id_ss:[* TO *]"
+            ),
+            url=settings.IMPRESSO_SOLR_URL_SELECT,
+            fl="id,ucoll_ss",
+        ),
+        # delegate updates to a specific function.
+        sinks=[
+            lambda batch, docs: update_collections_in_tr_passages(
+                solr_content_items=docs, limit=limit, logger=logger
+            )
+        ],
         limit=limit,
+        name="helper_update_collections_in_tr_passages_progress",
         logger=logger,
-    )
-    total_content_items = content_items["response"]["numFound"]
-    qTime = content_items["responseHeader"]["QTime"]
-
-    # we use the Search solr pagination because we don't know how many items we have to process in the TR passages
-    page, loops, progress, max_loops = get_pagination(
-        skip=skip, limit=limit, total=total_content_items, job=job
-    )
-    logger.info(
-        f"[job:{job.pk}, user:{job.creator.pk}] q:{query} - "
-        f"total:{total_content_items} in {qTime}ms - loops={loops} - max_loops:{max_loops}"
-        f"page:{page} - progress:{progress * 100:.2f}%"
-    )
-    # delegate updates to a specific function.
-    # Maybe we should delegate this to a celery task.
-    update_collections_in_tr_passages(
-        solr_content_items=content_items["response"]["docs"]
-    )
-    # save all items there!
-    return (page, loops, progress)
+    ).run_page(skip=skip)
+    return (batch.page, batch.loops, batch.progress)
 
 
+@measure_job_page
 def helper_remove_collection_progress(
-    collection_id: int,
+    collection_id: str,
     job: Job,
     limit: int = 100,
     logger: logging.Logger = default_logger,
@@ -142,8 +165,12 @@ def helper_remove_collection_progress(
     """
     Deletes a collection in chuncks of `limit` content items from the database and SOLR.
 
+    Every call removes the first page of the content items still tagged, so
+    the tasks calling it page with skip=0. `PagedSolrJob.run` does the same
+    with a cursor, in a single task.
+
     Args:
-        collection_id (int): The ID of the collection to be deleted.
+        collection_id (str): The ID of the collection to be deleted.
         job (Any): The job instance for tracking progress.
         limit (int, optional): The maximum number of items to process in one batch. Defaults to 100.
         logger (Any, optional): The logger instance for logging information. Defaults to default_logger.
@@ -151,95 +178,85 @@ def helper_remove_collection_progress(
     Returns:
         Tuple[int, int, float]: A tuple containing the current page, number of loops, and progress percentage.
     """
-    try:
-        collection = Collection.objects.get(pk=collection_id)
-        query = f"ucoll_ss:{collection.pk}"
-    except Collection.DoesNotExist:
-        query = f"ucoll_ss:{collection_id}"
-    logger.info(f"[job:{job.pk} user:{job.creator.pk}] delete_collection q={query}")
-    # 1. get all collection related content items
-    content_items = find_all(
-        q=query,
-        url=settings.IMPRESSO_SOLR_URL_SELECT,
-        fl="id,ucoll_ss,_version_",
-        skip=0,
+    batch = get_remove_collection_job(
+        collection_id=collection_id, job=job, limit=limit, logger=logger
+    ).run_page(skip=0)
+    # the collection id is removed from text passages by
+    # periodic_gc_orphan_collection_ids, once the collection is deleted.
+    return (batch.page, batch.loops, batch.progress)
+
+
+def get_remove_collection_job(
+    collection_id: str,
+    job: Job,
+    limit: int = 100,
+    task: Any = None,
+    logger: logging.Logger = default_logger,
+) -> PagedSolrJob:
+    """
+    The job removing a collection from the articles index and the db.
+    """
+    return PagedSolrJob(
+        job=job,
+        source=SolrSource(
+            q=f"ucoll_ss:{collection_id}",
+            url=settings.IMPRESSO_SOLR_URL_SELECT,
+            fl="id,ucoll_ss,_version_",
+        ),
+        transform=ucoll_updates(collection_id, add=False),
+        sinks=[
+            solr_update_sink(url=settings.IMPRESSO_SOLR_URL_UPDATE, logger=logger),
+            remove_collectable_items_sink(collection_id),
+        ],
         limit=limit,
+        ignore_max_loops=True,
+        task=task,
+        name="delete_collection",
         logger=logger,
     )
-    total_content_items = content_items["response"]["numFound"]
-    qtime = content_items["responseHeader"]["QTime"]
-    page, loops, progress, max_loops = get_pagination(
-        skip=0, limit=limit, total=total_content_items, job=job, ignore_max_loops=True
-    )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] delete_collection"
-        f" total:{total_content_items} in {qtime} -"
-        f" loops:{loops} - max_loops:{max_loops} -"
-        f" page:{page} - progress:{progress} -"
-    )
-    solr_updates_needed = []
-    solr_content_items = content_items.get("response", {}).get("docs", [])
-    for doc in solr_content_items:
-        # get list of collection in ucoll_ss field
-        ucoll_list = doc.get("ucoll_ss", [])
-        if collection_id not in ucoll_list:
-            continue
-        ucoll_list.remove(collection_id)
-        solr_updates_needed.append(
-            {
-                "id": doc.get("id"),
-                "_version_": doc.get("_version_"),
-                "ucoll_ss": {"set": ucoll_list},
-            }
-        )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] delete_collection "
-        f"n. of solr updates needed: {len(solr_updates_needed)}"
-    )
 
-    if solr_updates_needed:
-        result = update(
-            url=settings.IMPRESSO_SOLR_URL_UPDATE,
-            todos=solr_updates_needed,
-            logger=logger,
-        )
-        result_response_header = result.get("responseHeader")
-        result_adds = len(result.get("adds", []))
-        logger.info(
-            f"[job:{job.pk} user:{job.creator.pk}] delete_collection "
-            f"(update) solr updates response={result_response_header}, "
-            f"adds={result_adds}"
+
+def get_store_collection_job(
+    job: Job,
+    query: str,
+    collection_id: str,
+    content_type: str,
+    method: str = METHOD_ADD_TO_INDEX,
+    limit: int = 100,
+    task: Any = None,
+    logger: logging.Logger = default_logger,
+) -> PagedSolrJob:
+    """
+    The job adding (METHOD_ADD_TO_INDEX, in the db and in Solr) or removing
+    (METHOD_DEL_FROM_INDEX, in Solr) the results of a query to a collection,
+    best scoring first.
+    """
+    sinks = [solr_update_sink(url=settings.IMPRESSO_SOLR_URL_UPDATE, logger=logger)]
+    if method == METHOD_ADD_TO_INDEX:
+        sinks.insert(
+            0,
+            collectable_items_sink(
+                collection_id=collection_id, content_type=content_type, logger=logger
+            ),
         )
-    # remove collectable items from db
-    items_ids = [doc["id"] for doc in solr_content_items]
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] delete_collection "
-        f"(db) db CollectableItem to delete={len(items_ids)}"
-    )
-    db_removal = (
-        CollectableItem.objects.filter(collection_id=collection_id)
-        .filter(item_id__in=items_ids)
-        .delete()
-    )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] delete_collection "
-        f"(db) db CollectableItem deleted={db_removal}"
+    return PagedSolrJob(
+        job=job,
+        source=SolrSource(
+            q=query,
+            url=settings.IMPRESSO_SOLR_URL_SELECT,
+            fl="id,ucoll_ss,_version_,score",
+            sort="score DESC,id ASC",
+        ),
+        transform=ucoll_updates(collection_id, add=method == METHOD_ADD_TO_INDEX),
+        sinks=sinks,
+        limit=limit,
+        task=task,
+        name="helper_store_collection_progress",
+        logger=logger,
     )
-    # remove collections from text passages
-    # updated_content_items = find_all(
-    #     q=" OR ".join(map(lambda id: f"id:{id}", items_ids)),
-    #     url=settings.IMPRESSO_SOLR_URL_SELECT,
-    #     fl="id,ucoll_ss,_version_",
-    #     skip=0,
-    #     limit=limit,
-    #     logger=logger,
-    # )
-    # update_collections_in_tr_passages(
-    #     solr_content_items=updated_content_items.get("response").get("docs"), limit=50
-    # )
-    return (page, loops, progress)
 
 
+@measure_job_page
 def helper_store_collection_progress(
     job: Job,
     query: str,
@@ -266,83 +283,303 @@ def helper_store_collection_progress(
         - loops (int): The number of loops allowed.
         - progress (float): The progress percentage.
     """
-    content_items = find_all(
-        q=query,
-        url=settings.IMPRESSO_SOLR_URL_SELECT,
-        fl="id,ucoll_ss,_version_,score",
-        skip=skip,
+    batch = get_store_collection_job(
+        job=job,
+        query=query,
+        collection_id=collection_id,
+        content_type=content_type,
+        method=method,
         limit=limit,
-        sort="score DESC,id ASC",
         logger=logger,
-    )
-    total_content_items = content_items["response"]["numFound"]
+    ).run_page(skip=skip)
+    return (batch.page, batch.loops, batch.progress)
+
+
+def build_add_collection_expression(
+    core: str, query: str, collection_id: str, batch_size: int = 1000
+) -> str:
+    """
+    Build the streaming expression that adds a collection id to the ucoll_ss
+    field of the documents matching a query, inside Solr: ids are exported
+    (sorted, no scoring), paired with the collection id and sent to the
+    update handler in batches, then committed once.
+
+    The /update chain of the core must turn the plain ucoll_ss value into an
+    atomic add (AtomicUpdateProcessorFactory, `atomic.ucoll_ss=add`),
+    otherwise the documents would be replaced: see
+    settings.IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN. Documents already tagged
+    are skipped.
 
-    page, loops, progress, max_loops = get_pagination(
-        skip=skip, limit=limit, total=total_content_items, job=job
+    >>> build_add_collection_expression("impresso", "*:*", "local-abc", 500)
+    'commit(impresso, batchSize=0, update(impresso, batchSize=500, select(search(impresso, q="(*:*) AND -ucoll_ss:\\\\"local-abc\\\\"", fl="id", sort="id asc", qt="/export"), id, val("local-abc") as ucoll_ss)))'
+    """
+    q = quote_streaming_value(f'({query}) AND -ucoll_ss:"{collection_id}"')
+    search = f'search({core}, q={q}, fl="id", sort="id asc", qt="/export")'
+    select = (
+        f"select({search}, id, val({quote_streaming_value(collection_id)}) as ucoll_ss)"
+    )
+    return (
+        f"commit({core}, batchSize=0, "
+        f"update({core}, batchSize={batch_size}, {select}))"
     )
 
-    solr_content_items = content_items.get("response", {}).get("docs", [])
-    qtime = content_items.get("responseHeader", {}).get("QTime")
+
+def store_collection_with_streaming_expression(
+    collection_id: str,
+    query: str,
+    content_type: str,
+    url: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    batch_size: int = 1000,
+    logger: logging.Logger = default_logger,
+) -> dict[str, int]:
+    """
+    Add all the documents matching a query to a collection, tagging them in
+    Solr with a streaming expression (see `build_add_collection_expression`):
+    document ids do not go through the worker for the Solr update, only the
+    indexed counts come back. The db is then filled from a cursorMark stream
+    of ids and scores, `batch_size` items at a time.
+
+    Args:
+        collection_id (str): The collection id.
+        query (str): The Solr query.
+        content_type (str): The CollectableItem content type.
+        url (str): The Solr select URL of the core. Defaults to settings.IMPRESSO_SOLR_URL_SELECT.
+        batch_size (int): Documents per Solr update batch and items per db insert. Defaults to 1000.
+        logger (logging.Logger): The logger. Defaults to default_logger.
+
+    Returns:
+        dict[str, int]: The number of documents tagged in Solr ("indexed")
+        and of items added to the db ("stored").
+
+    Raises:
+        ImproperlyConfigured: If settings.IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN
+            is not set: the expression would replace the documents.
+        requests.exceptions.RequestException: If the /stream handler is not available.
+        SolrStreamingError: If the expression failed in Solr.
+    """
+    if not settings.IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN:
+        raise ImproperlyConfigured(
+            "Streaming updates require an /update chain turning ucoll_ss into an "
+            "atomic add: set IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN=True once "
+            "it is configured."
+        )
+    core, _ = get_core_from_url(url)
+    tuples = stream(
+        expr=build_add_collection_expression(
+            core=core, query=query, collection_id=collection_id, batch_size=batch_size
+        ),
+        url=url,
+        logger=logger,
+    )
+    # commit() forwards the update() tuples, one per batch
+    indexed = sum(t.get("batchIndexed", 0) for t in tuples)
+    stored = 0
+    items: list[CollectableItem] = []
+    for doc in iter_all(q=query, url=url, fl="id,score", rows=batch_size):
+        items.append(
+            CollectableItem(
+                item_id=doc["id"],
+                content_type=content_type,
+                collection_id=collection_id,
+                search_query_score=doc.get("score"),
+            )
+        )
+        if len(items) >= batch_size:
+            stored += add_collectable_items(collection_id=collection_id, items=items)
+            items = []
+    stored += add_collectable_items(collection_id=collection_id, items=items)
     logger.info(
-        f"[job:{job.pk}, user:{job.creator.pk}] helper_store_collection_progress "
-        f" total:{total_content_items} in {qtime}ms -"
-        f" loops:{loops} - max_loops:{max_loops} -"
-        f" page:{page} - progress:{progress} -"
+        f"store_collection_with_streaming_expression collection={collection_id} "
+        f"indexed={indexed} stored={stored}"
     )
+    return {"indexed": indexed, "stored": stored}
 
-    if method == METHOD_ADD_TO_INDEX:
-        try:
-            CollectableItem.objects.bulk_create(
-                map(
-                    lambda doc: CollectableItem(
-                        item_id=doc.get("id"),
-                        content_type=content_type,
-                        collection_id=collection_id,
-                        search_query_score=doc.get("score"),
-                    ),
-                    solr_content_items,
-                ),
-                ignore_conflicts=True,
+
+def helper_store_collection(
+    task: Any,
+    collection_id: str,
+    job: Job,
+    query: str,
+    content_type: str,
+    streaming: Optional[bool] = None,
+    logger: logging.Logger = default_logger,
+) -> dict[str, Any]:
+    """
+    Add the results of a query to a collection, in the db and in Solr.
+
+    With streaming expressions (settings.IMPRESSO_SOLR_STREAMING_UPDATE),
+    Solr tags the documents itself, in a single request. The paged engine
+    (`get_store_collection_job`, one round trip of ids per page) is
+    used instead when streaming is disabled or fails, when the atomic
+    /update chain is not declared (settings.IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN),
+    and when the query matches more documents than the user is allowed to
+    collect: the paged engine keeps the best scoring ones.
+
+    Args:
+        task: The task running the job, for progress updates.
+        collection_id (str): The collection id.
+        job (Job): The job.
+        query (str): The Solr query.
+        content_type (str): The CollectableItem content type.
+        streaming (bool, optional): Force or disable streaming expressions.
+            Defaults to None (settings.IMPRESSO_SOLR_STREAMING_UPDATE).
+        logger (logging.Logger): The logger. Defaults to default_logger.
+
+    Returns:
+        dict: The engine used ("streaming" or "paged"), with its counts.
+    """
+    if streaming is None:
+        streaming = settings.IMPRESSO_SOLR_STREAMING_UPDATE
+    if streaming and not settings.IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN:
+        logger.warning(
+            f"[job:{job.pk} user:{job.creator.pk}] streaming updates require "
+            f"IMPRESSO_SOLR_ATOMIC_UCOLL_UPDATE_CHAIN, using the paged engine"
+        )
+        streaming = False
+    limit = settings.IMPRESSO_SOLR_EXEC_LIMIT
+    if streaming:
+        total = find_all(q=query, limit=0, logger=logger)["response"]["numFound"]
+        _, _, _, max_loops = get_pagination(skip=0, limit=limit, total=total, job=job)
+        if total > max_loops * limit:
+            logger.info(
+                f"[job:{job.pk} user:{job.creator.pk}] total:{total} over the "
+                f"allowed number of items, using the paged engine"
             )
-        except IntegrityError as e:
-            logger.exception(e)
-    # add collection id to solr items.
-    # collection.add_items_to_index(items_ids=items_ids, logger=logger)
-    solr_updates_needed = []
-    for doc in solr_content_items:
-        # get list of collection in ucoll_ss field
-        ucoll_list = doc.get("ucoll_ss", [])
-        if method == METHOD_ADD_TO_INDEX:
-            if collection_id in ucoll_list:
-                continue
-            ucoll_list.append(collection_id)
-        elif method == METHOD_DEL_FROM_INDEX:
-            if collection_id not in ucoll_list:
-                continue
-            ucoll_list.remove(collection_id)
-        solr_updates_needed.append(
-            {
-                "id": doc.get("id"),
-                "_version_": doc.get("_version_"),
-                "ucoll_ss": {"set": ucoll_list},
-            }
+        else:
+            try:
+                counts = store_collection_with_streaming_expression(
+                    collection_id=collection_id,
+                    query=query,
+                    content_type=content_type,
+                    batch_size=settings.IMPRESSO_SOLR_STREAMING_BATCH_SIZE,
+                    logger=logger,
+                )
+                return {"engine": "streaming", "total": total, **counts}
+            except (RequestException, SolrStreamingError) as e:
+                logger.warning(
+                    f"[job:{job.pk} user:{job.creator.pk}] streaming expression "
+                    f"failed, using the paged engine: {e}"
+                )
+    result = get_store_collection_job(
+        job=job,
+        query=query,
+        collection_id=collection_id,
+        content_type=content_type,
+        limit=limit,
+        task=task,
+        logger=logger,
+    ).run()
+    return {"engine": "paged", **result}
+
+
+def find_orphan_collection_ids(
+    url: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    batch_size: int = 1000,
+    logger: logging.Logger = default_logger,
+) -> list[str]:
+    """
+    Return the ucoll_ss values of a Solr core that are not the id of a
+    collection in the db, e.g. collections deleted with their user.
+    One facet request, then one db query per `batch_size` ids.
+
+    Args:
+        url (str): The Solr select URL. Defaults to settings.IMPRESSO_SOLR_URL_SELECT.
+        batch_size (int): Number of ids checked per db query. Defaults to 1000.
+        logger (logging.Logger): The logger. Defaults to default_logger.
+
+    Returns:
+        list[str]: The orphan collection ids, sorted.
+    """
+    solr_ids = sorted(get_facet_counts(field="ucoll_ss", url=url, logger=logger))
+    orphans: list[str] = []
+    for i in range(0, len(solr_ids), batch_size):
+        chunk = solr_ids[i : i + batch_size]
+        existing = set(
+            Collection.objects.filter(pk__in=chunk).values_list("pk", flat=True)
         )
-    logger.info(f"(update) solr updates needed: {len(solr_updates_needed)}")
-    # more than one
-    if solr_updates_needed:
-        result = update(
-            url=settings.IMPRESSO_SOLR_URL_UPDATE,
-            todos=solr_updates_needed,
+        orphans.extend(pk for pk in chunk if pk not in existing)
+    logger.info(
+        f"find_orphan_collection_ids url={url} "
+        f"ucoll_ss={len(solr_ids)} orphans={len(orphans)}"
+    )
+    return orphans
+
+
+def strip_collection_ids_from_index(
+    collection_ids: Iterable[str],
+    url_select: str = settings.IMPRESSO_SOLR_URL_SELECT,
+    url_update: str = settings.IMPRESSO_SOLR_URL_UPDATE,
+    batch_size: int = 500,
+    sleep: float = 0.0,
+    max_docs: Optional[int] = None,
+    commit_within_ms: int = 10000,
+    logger: logging.Logger = default_logger,
+) -> int:
+    """
+    Remove the given collection ids from the ucoll_ss field of every document
+    of a Solr core, with atomic `remove` updates of `batch_size` documents.
+    `remove` does not need the document _version_ and is idempotent, so a
+    run can be interrupted and resumed. Commits are grouped with commitWithin.
+
+    Args:
+        collection_ids (Iterable[str]): The collection ids to remove.
+        url_select (str): The Solr select URL of the core.
+        url_update (str): The Solr update URL of the core.
+        batch_size (int): Number of documents per update request. Defaults to 500.
+        sleep (float): Seconds to wait after each update request, to throttle
+            the load on Solr during the day. Defaults to 0.
+        max_docs (int, optional): Stop after updating this many documents.
+            Defaults to None (no limit).
+        commit_within_ms (int): Solr commitWithin, in milliseconds. Defaults to 10000.
+        logger (logging.Logger): The logger. Defaults to default_logger.
+
+    Returns:
+        int: The number of updated documents.
+    """
+    collection_ids = sorted(set(collection_ids))
+    updated = 0
+    todos: list[dict[str, Any]] = []
+
+    def flush() -> None:
+        nonlocal updated, todos
+        if not todos:
+            return
+        update(
+            todos=todos,
+            url=url_update,
+            commit_within_ms=commit_within_ms,
             logger=logger,
         )
-        result_response_header = result.get("responseHeader")
-        result_adds = len(cast(list, result.get("adds")) or [])
-        logger.info(
-            f"(update) solr updates response={result_response_header}, "
-            f"adds={result_adds}"
-        )
-    return (
-        page,
-        loops,
-        progress,
+        updated += len(todos)
+        todos = []
+        if sleep:
+            time.sleep(sleep)
+
+    # a few ids per query, to keep the boolean query small
+    for i in range(0, len(collection_ids), 50):
+        chunk = set(collection_ids[i : i + 50])
+        query = " OR ".join(f'"{pk}"' for pk in sorted(chunk))
+        for doc in iter_all(
+            q=f"ucoll_ss:({query})",
+            url=url_select,
+            fl="id,ucoll_ss",
+            rows=batch_size,
+        ):
+            remove = sorted(chunk.intersection(doc.get("ucoll_ss", [])))
+            if not remove:
+                continue
+            todos.append({"id": doc["id"], "ucoll_ss": {"remove": remove}})
+            if len(todos) >= batch_size:
+                flush()
+                if max_docs is not None and updated >= max_docs:
+                    logger.info(
+                        f"strip_collection_ids_from_index url={url_update} "
+                        f"stopped after max_docs={max_docs}"
+                    )
+                    return updated
+        flush()
+    logger.info(
+        f"strip_collection_ids_from_index url={url_update} "
+        f"collections={len(collection_ids)} updated={updated}"
     )
+    return updated
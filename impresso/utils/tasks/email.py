@@ -18,10 +18,12 @@ Example:
 
 import logging
 import smtplib
+from collections import deque
 from logging import Logger
-from typing import Optional
+from typing import Any, Optional
 
-from django.core.mail import EmailMultiAlternatives, BadHeaderError
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, BadHeaderError, get_connection
 from django.template.loader import render_to_string
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
@@ -106,6 +108,7 @@ def send_templated_email_with_context(
     template_dir: str = DEFAULT_TEMPLATE_DIR,
     logger: Logger = default_logger,
     fail_silently: bool = False,
+    dispatcher: Optional["EmailDispatcher"] = None,
 ) -> bool:
     """
     Renders and sends a templated email with both text and HTML versions.
@@ -113,6 +116,8 @@ def send_templated_email_with_context(
     This function loads email templates, renders them with the provided context,
     and sends the email using Django's EmailMultiAlternatives. It handles both
     plain text and HTML versions of the email.
+    When a `dispatcher` is given, the message is queued on it instead of being
+    sent immediately, so that it leaves together with the rest of the batch.
 
     Args:
         template: The template prefix/name (without extension). Templates should
@@ -131,10 +136,12 @@ def send_templated_email_with_context(
         logger: Logger instance to use for error logging. Defaults to module logger.
         fail_silently: If True, returns False on error instead of raising exception.
             Defaults to False.
+        dispatcher: Optional EmailDispatcher collecting messages to be sent in
+            batches. Defaults to None.
 
     Returns:
-        True if the email was sent successfully, False if an error occurred
-        and fail_silently is True.
+        True if the email was sent (or queued) successfully, False if an error
+        occurred and fail_silently is True.
 
     Raises:
         ValidationError: If any email address is invalid (when fail_silently=False).
@@ -214,6 +221,13 @@ def send_templated_email_with_context(
             for filename, content, mimetype in attachments:
                 email_message.attach(filename, content, mimetype)
 
+        if dispatcher is not None:
+            dispatcher.add(email_message)
+            logger.info(
+                f"Email queued for batch sending - Subject: '{subject}', To: {to}"
+            )
+            return True
+
         email_message.send(fail_silently=False)
 
         logger.info(
@@ -241,3 +255,152 @@ def send_templated_email_with_context(
         if fail_silently:
             return False
         raise
+
+
+class EmailDispatcher:
+    """
+    Collects outgoing email messages and sends them in batches over a single
+    pooled backend connection (`get_connection()` + `send_messages`), instead
+    of opening a fresh SMTP connection per message.
+
+    The messages of a batch are handed to the connection one at a time, so
+    that a failure midway through a batch only affects the failing message:
+    the ones delivered before it are not sent twice. A failing message is
+    moved to a bounded retry queue and sent again, on a fresh connection, up
+    to `max_retries` times. When the retry queue is full, further failing
+    messages are dropped and counted in `failed`.
+
+    Works with any Django email backend, including locmem and file backends
+    used in tests.
+
+    Example:
+        >>> with EmailDispatcher(batch_size=50) as dispatcher:
+        ...     for reviewer in reviewers:
+        ...         send_templated_email_with_context(
+        ...             template="pending_requests_summary_to_reviewer",
+        ...             subject="Pending requests",
+        ...             from_email=settings.DEFAULT_FROM_EMAIL,
+        ...             to=[reviewer.email],
+        ...             context={"reviewer": reviewer},
+        ...             dispatcher=dispatcher,
+        ...         )
+        >>> dispatcher.sent
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_queue_size: Optional[int] = None,
+        backend: Optional[str] = None,
+        logger: Logger = default_logger,
+    ) -> None:
+        self.batch_size = max(1, batch_size or settings.IMPRESSO_EMAIL_BATCH_SIZE)
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else settings.IMPRESSO_EMAIL_BATCH_MAX_RETRIES
+        )
+        self.retry_queue_size = (
+            retry_queue_size or settings.IMPRESSO_EMAIL_BATCH_RETRY_QUEUE_SIZE
+        )
+        self.backend = backend
+        self.logger = logger
+        self.connection: Any = None
+        self.pending: list[EmailMultiAlternatives] = []
+        # items are (message, attempts already made)
+        self.retry_queue: deque[tuple[EmailMultiAlternatives, int]] = deque()
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+
+    def __enter__(self) -> "EmailDispatcher":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.flush()
+        finally:
+            self.close()
+
+    def open(self) -> None:
+        if self.connection is None:
+            self.connection = get_connection(backend=self.backend, fail_silently=False)
+            self.connection.open()
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception as e:
+                self.logger.warning(f"Error closing email connection: {e}")
+            self.connection = None
+
+    def add(self, message: EmailMultiAlternatives) -> None:
+        """
+        Queue a message. The pending batch is sent as soon as it reaches
+        `batch_size` messages.
+        """
+        self.pending.append(message)
+        if len(self.pending) >= self.batch_size:
+            self._send_batch()
+
+    def flush(self) -> None:
+        """
+        Send any pending message, then drain the retry queue.
+        """
+        if self.pending:
+            self._send_batch()
+        self._drain_retry_queue()
+
+    def _send_batch(self) -> None:
+        batch, self.pending = self.pending, []
+        self.batches += 1
+        sent = 0
+        for message in batch:
+            try:
+                self.open()
+                sent += self.connection.send_messages([message]) or 0
+            except Exception as e:
+                self.logger.error(
+                    f"Error sending email to {message.to}, queueing for retry: {e}"
+                )
+                # the connection might be broken, get a fresh one next time
+                self.close()
+                self._enqueue_retry(message, attempts=1)
+        self.sent += sent
+        self.logger.info(
+            f"Email batch {self.batches} sent: {sent} of {len(batch)} message(s)"
+        )
+
+    def _enqueue_retry(self, message: EmailMultiAlternatives, attempts: int) -> None:
+        if attempts > self.max_retries:
+            self.failed += 1
+            self.logger.error(
+                f"Giving up on email to {message.to} after {attempts} attempt(s)"
+            )
+            return
+        if len(self.retry_queue) >= self.retry_queue_size:
+            self.failed += 1
+            self.logger.error(
+                f"Email retry queue is full ({self.retry_queue_size}), "
+                f"dropping email to {message.to}"
+            )
+            return
+        self.retry_queue.append((message, attempts))
+
+    def _drain_retry_queue(self) -> None:
+        while self.retry_queue:
+            message, attempts = self.retry_queue.popleft()
+            self.open()
+            try:
+                sent = self.connection.send_messages([message]) or 0
+            except Exception as e:
+                self.logger.warning(
+                    f"Retry {attempts} failed for email to {message.to}: {e}"
+                )
+                self.close()
+                self._enqueue_retry(message, attempts=attempts + 1)
+                continue
+            self.sent += sent
@@ -0,0 +1,356 @@
+"""
+The loop shared by the Solr-driven jobs (export, store and remove collection,
+TR passages add, remove and sync): documents from a Solr query, a transform
+per batch, then sinks (db, Solr updates, files). `PagedSolrJob.run_page` runs
+one page at a `skip` offset, for helpers called once per page;
+`PagedSolrJob.run` runs the whole job with a Solr cursor, fetching the next
+page while the sinks of the current one run, with stop checks, checkpoints
+in `Job.extra` and coalesced progress updates.
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence
+
+from django.conf import settings
+from django.db.utils import IntegrityError
+
+from ...models import CollectableItem, Job
+from ...solr import find_all, update
+from ..joblog import JobLogger
+from ..metrics import measure_phase
+from ..models.collection import add_collectable_items, remove_collectable_items
+from . import get_pagination, is_task_stopped, update_job_progress
+
+default_logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SolrSource:
+    """
+    The documents of a job. Cursor paging (`PagedSolrJob.run`) requires
+    `sort` to end with the uniqueKey field, e.g. "score DESC,id ASC".
+    """
+
+    q: str
+    url: str
+    fl: str = "id"
+    sort: str = "id ASC"
+    fq: str = ""
+
+
+@dataclass
+class Batch:
+    """
+    A page of documents, with the pagination of the job (see get_pagination)
+    and the page logger.
+    """
+
+    docs: list[dict[str, Any]]
+    page: int
+    loops: int
+    progress: float
+    total: int
+    max_loops: int
+    log: JobLogger = field(repr=False)
+
+
+# transform(batch) -> result, then sink(batch, result) for each sink
+Transform = Callable[[Batch], Any]
+Sink = Callable[[Batch, Any], Any]
+
+
+class PagedSolrJob:
+    """
+    Args:
+        job (Job): The job, for max_loops, stop checks and progress.
+        source (SolrSource): The Solr query.
+        transform (Transform, optional): Turns a batch into what the sinks
+            consume. Defaults to the documents of the batch.
+        sinks (Sequence[Sink], optional): Called in order with the batch and
+            the result of the transform. Defaults to none.
+        limit (int, optional): Documents per page, at most
+            settings.IMPRESSO_SOLR_EXEC_LIMIT. Defaults to 100.
+        ignore_max_loops (bool, optional): Page through all the documents,
+            not only the pages allowed to the user. Defaults to False.
+        task (optional): The celery task, required by `run`. Defaults to None.
+        name (str, optional): Name of the page summaries in the logs.
+        fields (dict, optional): Added to the log records of the job,
+            e.g. the collection id.
+        logger (logging.Logger, optional): Defaults to default_logger.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        source: SolrSource,
+        transform: Optional[Transform] = None,
+        sinks: Sequence[Sink] = (),
+        limit: int = 100,
+        ignore_max_loops: bool = False,
+        task: Any = None,
+        name: str = "paged_solr_job",
+        fields: Optional[dict[str, Any]] = None,
+        logger: logging.Logger = default_logger,
+    ):
+        self.job = job
+        self.source = source
+        self.transform = transform
+        self.sinks = sinks
+        self.limit = min(limit, settings.IMPRESSO_SOLR_EXEC_LIMIT)
+        self.ignore_max_loops = ignore_max_loops
+        self.task = task
+        self.name = name
+        self.logger = logger
+        self.log = JobLogger(logger, job=job, **(fields or {}))
+
+    def fetch(self, skip: int = 0, cursor_mark: Optional[str] = None) -> dict:
+        with measure_phase(self.job.type, "fetch"):
+            return find_all(
+                q=self.source.q,
+                url=self.source.url,
+                fl=self.source.fl,
+                sort=self.source.sort,
+                fq=self.source.fq,
+                skip=skip,
+                limit=self.limit,
+                cursor_mark=cursor_mark,
+            )
+
+    def get_batch(self, contents: dict, skip: int) -> Batch:
+        response = contents.get("response", {})
+        total = response.get("numFound", 0)
+        page, loops, progress, max_loops = get_pagination(
+            skip=skip,
+            limit=self.limit,
+            total=total,
+            job=self.job,
+            ignore_max_loops=self.ignore_max_loops,
+        )
+        return Batch(
+            docs=response.get("docs", []),
+            page=page,
+            loops=loops,
+            progress=progress,
+            total=total,
+            max_loops=max_loops,
+            log=self.log,
+        )
+
+    def process(self, batch: Batch) -> Any:
+        with measure_phase(self.job.type, "transform"):
+            result = self.transform(batch) if self.transform else batch.docs
+        for sink in self.sinks:
+            with measure_phase(self.job.type, "write"):
+                sink(batch, result)
+        self.log.summary(
+            self.name,
+            page=batch.page,
+            loops=batch.loops,
+            total=batch.total,
+            progress=batch.progress,
+            docs=len(batch.docs),
+        )
+        return result
+
+    def run_page(self, skip: int = 0) -> Batch:
+        """
+        Fetch and process the page at `skip`.
+        """
+        batch = self.get_batch(self.fetch(skip=skip), skip=skip)
+        self.process(batch)
+        return batch
+
+    def get_checkpoint(self) -> dict[str, Any]:
+        try:
+            return json.loads(self.job.extra).get("checkpoint") or {}
+        except (json.JSONDecodeError, TypeError):
+            return {}
+
+    def is_stopped(self, progress: float) -> bool:
+        # the job row is changed by the stopjob command or the admin
+        status = Job.objects.filter(pk=self.job.pk).values_list("status", flat=True)
+        self.job.status = status.first() or self.job.status
+        return is_task_stopped(
+            task=self.task, job=self.job, progress=progress, logger=self.logger
+        )
+
+    def has_next_page(
+        self, batch: Batch, cursor_mark: str, next_cursor_mark: Optional[str]
+    ) -> bool:
+        if not batch.docs or next_cursor_mark in (None, cursor_mark):
+            return False
+        if self.ignore_max_loops:
+            # numFound (and loops) may shrink while the sinks remove the
+            # documents from the source, e.g. when removing a collection:
+            # page until the cursor is exhausted.
+            return len(batch.docs) == self.limit
+        return batch.page < batch.loops
+
+    def run(self, resume: bool = False) -> dict[str, Any]:
+        """
+        Process all the pages, with a Solr cursor. The next page is fetched
+        while the sinks of the current one run (settings.IMPRESSO_JOB_PREFETCH);
+        the job is checked for stop requests after every page; progress and
+        the cursor checkpoint are saved at most every
+        settings.IMPRESSO_JOB_PROGRESS_INTERVAL seconds. With
+        `ignore_max_loops`, pages until the cursor is exhausted: the sinks
+        may remove the documents from the source.
+
+        Args:
+            resume (bool, optional): Start from the checkpoint saved in
+                Job.extra by an interrupted run. Defaults to False.
+
+        Returns:
+            dict: The number of pages and documents processed, and whether
+                the job was stopped.
+        """
+        checkpoint = self.get_checkpoint() if resume else {}
+        cursor_mark = checkpoint.get("cursor_mark", "*")
+        pages = checkpoint.get("pages", 0)
+        docs = checkpoint.get("docs", 0)
+        stopped = False
+        last_progress = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="paged-solr-job"
+        ) as executor:
+
+            def schedule(cursor: str) -> Callable[[], dict]:
+                if settings.IMPRESSO_JOB_PREFETCH:
+                    return executor.submit(self.fetch, cursor_mark=cursor).result
+                return lambda: self.fetch(cursor_mark=cursor)
+
+            next_page: Optional[Callable[[], dict]] = schedule(cursor_mark)
+            while next_page is not None:
+                contents = next_page()
+                batch = self.get_batch(contents, skip=pages * self.limit)
+                next_cursor_mark = contents.get("nextCursorMark")
+                next_page = None
+                if self.has_next_page(batch, cursor_mark, next_cursor_mark):
+                    assert next_cursor_mark is not None
+                    next_page = schedule(next_cursor_mark)
+                self.process(batch)
+                pages, docs = batch.page, docs + len(batch.docs)
+                cursor_mark = next_cursor_mark or cursor_mark
+                if self.is_stopped(batch.progress):
+                    stopped = True
+                    break
+                now = time.monotonic()
+                if (
+                    next_page is not None
+                    and now - last_progress >= settings.IMPRESSO_JOB_PROGRESS_INTERVAL
+                ):
+                    last_progress = now
+                    update_job_progress(
+                        task=self.task,
+                        job=self.job,
+                        # loops shrink with sources emptied by their sinks
+                        progress=min(batch.progress, 1.0),
+                        extra={
+                            "checkpoint": {
+                                "cursor_mark": cursor_mark,
+                                "pages": pages,
+                                "docs": docs,
+                            }
+                        },
+                        logger=self.logger,
+                    )
+        return {"pages": pages, "docs": docs, "stopped": stopped}
+
+
+def solr_update_sink(url: str, logger: Optional[logging.Logger] = None) -> Sink:
+    """
+    Send the result of the transform, a list of atomic updates, to Solr.
+    """
+
+    def sink(batch: Batch, todos: list[dict[str, Any]]) -> None:
+        if not todos:
+            return
+        result = update(url=url, todos=todos, logger=logger)
+        batch.log.count("updates", len(todos))
+        batch.log.count("adds", len(result.get("adds") or []))
+
+    return sink
+
+
+def collectable_items_sink(
+    collection_id: str,
+    content_type: str = CollectableItem.ARTICLE,
+    id_field: str = "id",
+    logger: logging.Logger = default_logger,
+) -> Sink:
+    """
+    Store the documents of the batch (their `id_field`) as items of a
+    collection, with their score.
+    """
+
+    def sink(batch: Batch, _result: Any) -> None:
+        try:
+            created = add_collectable_items(
+                collection_id=collection_id,
+                items=(
+                    CollectableItem(
+                        item_id=doc.get(id_field),
+                        content_type=content_type,
+                        collection_id=collection_id,
+                        search_query_score=doc.get("score"),
+                    )
+                    for doc in batch.docs
+                ),
+            )
+        except IntegrityError as e:
+            logger.exception(e)
+        else:
+            batch.log.count("items_created", created)
+
+    return sink
+
+
+def remove_collectable_items_sink(collection_id: str) -> Sink:
+    """
+    Delete the documents of the batch from the items of a collection.
+    """
+
+    def sink(batch: Batch, _result: Any) -> None:
+        batch.log.count(
+            "deleted",
+            remove_collectable_items(
+                collection_id=collection_id,
+                items_ids=[doc["id"] for doc in batch.docs],
+            ),
+        )
+
+    return sink
+
+
+def ucoll_updates(collection_id: str, add: bool = True) -> Transform:
+    """
+    Return the transform adding (or removing) a collection id to the
+    `ucoll_ss` field of the documents of a batch, as atomic updates guarded
+    by `_version_`. Documents already (or not) tagged are skipped.
+    """
+
+    def transform(batch: Batch) -> list[dict[str, Any]]:
+        todos = []
+        for doc in batch.docs:
+            ucoll_list = doc.get("ucoll_ss", [])
+            batch.log.sample("doc", "doc %s ucoll_ss=%s", doc.get("id"), ucoll_list)
+            if (collection_id in ucoll_list) == add:
+                continue
+            if add:
+                ucoll_list.append(collection_id)
+            else:
+                ucoll_list.remove(collection_id)
+            todos.append(
+                {
+                    "id": doc.get("id"),
+                    "_version_": doc.get("_version_"),
+                    "ucoll_ss": {"set": ucoll_list},
+                }
+            )
+        return todos
+
+    return transform
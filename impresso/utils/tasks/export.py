@@ -6,9 +6,9 @@ from os.path import basename
 from typing import Tuple
 from zipfile import ZipFile, ZIP_DEFLATED
 from ...models import Job
-from ...solr import find_all
-from ...utils.tasks import get_pagination
-from ...utils.bitmask import BitMask64
+from ...utils.bitmask import BitMask
+from ...utils.metrics import measure_job_page
+from ...utils.tasks.engine import Batch, PagedSolrJob, SolrSource
 from ...utils.solr import (
     mapper_doc_remove_private_collections,
     mapper_doc_redact_contents,
@@ -41,6 +41,7 @@ def get_results_message(total: int, max_loops: int, limit: int) -> str:
     return message
 
 
+@measure_job_page
 def helper_export_query_as_csv_progress(
     job: Job,
     query: str,
@@ -77,32 +78,6 @@ def helper_export_query_as_csv_progress(
         for field in settings.IMPRESSO_SOLR_FIELDS_AS_LIST
         if field not in ignore_fields
     ]
-    contents = find_all(q=query, fl=",".join(query_param_fl), skip=skip, logger=logger)
-    total = contents["response"]["numFound"]
-    qtime = contents["responseHeader"]["QTime"]
-    # generate extra from job stats
-    page, loops, progress, max_loops = get_pagination(
-        skip=skip, limit=limit, total=total, job=job
-    )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] "
-        f" total:{total} in {qtime} -"
-        f" loops:{loops} - max_loops:{max_loops} -"
-        f" page:{page} - progress:{progress} -"
-    )
-
-    if total == 0:
-        logger.info(f"[job:{job.pk} user:{job.creator.pk}] No results found, aborting.")
-        return (
-            page,
-            loops,
-            progress,
-        )
-    user_bitmask = BitMask64(user_bitmap_key)
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] Opening file in APPEND mode:"
-        f"{job.attachment.upload.path}"
-    )
     # remove fields starting with _ from the list of fields, see
     # settings.IMPRESSO_SOLR_ARTICLE_PROPS
     fieldnames = [
@@ -110,61 +85,31 @@ def helper_export_query_as_csv_progress(
         for field in settings.IMPRESSO_SOLR_ARTICLE_PROPS
         if not field.startswith("_") and field not in ignore_fields
     ]
-    # Sort fieldnames with 'uid' first, then the rest alphabetically
-    with open(
-        job.attachment.upload.path, mode="a", encoding="utf-8-sig", newline=""
-    ) as csvfile:
-        w = csv.DictWriter(
-            csvfile,
-            delimiter=";",
-            quoting=csv.QUOTE_MINIMAL,
-            fieldnames=fieldnames,
-        )
-
-        if page == 1:
-            logger.info(
-                f"[job:{job.pk} user:{job.creator.pk}] writing header: {fieldnames}"
-            )
-            # write custom header
-            w.writerow({fieldnames[0]: get_results_message(total, max_loops, limit)})
-            w.writerow(
-                {
-                    fieldnames[
-                        0
-                    ]: f"Explore the list of result: (https://impresso-project.ch/app/search?sq={query_hash})"
-                }
-            )
-            w.writerow(
-                {
-                    fieldnames[0]: settings.IMPRESSO_CONTENT_DOWNLOAD_DISCLAIMER,
-                }
-            )
-            # empty line
-            w.writerow({})
-            w.writeheader()
 
+    def to_csv_rows(batch: Batch) -> list[dict]:
         # filter out docs without proper metadata. We will warn about them in a moment
-        rows = [
-            doc
-            for doc in contents["response"]["docs"]
-            if doc.get("meta_journal_s", False)
-        ]
-
-        if len(rows) != len(contents["response"]["docs"]):
+        rows = [doc for doc in batch.docs if doc.get("meta_journal_s", False)]
+        if len(rows) != len(batch.docs):
             to_check = [
-                doc.get('id', 'no id??') for doc in contents['response']['docs'] if not doc.get('meta_journal_s', False)
+                doc.get("id", "no id??")
+                for doc in batch.docs
+                if not doc.get("meta_journal_s", False)
             ]
-            logger.warning(
-                f"[job:{job.pk} user:{job.creator.pk}] Warning: some docs do not have meta_journal_s field. Check: {to_check}"
+            batch.log.warning(
+                "some docs do not have meta_journal_s field. Check: %s",
+                batch.log.truncate(to_check),
             )
-
+        if not rows:
+            return []
+        user_bitmask = BitMask(user_bitmap_key)
         user_allow_temporarily_no_redaction = job.creator.groups.filter(
             name=settings.IMPRESSO_GROUP_USER_PLAN_NO_REDACTION
         ).exists()
-        logger.info(
-            f"[job:{job.pk} user:{job.creator.pk}] "
-            f"User allow temporarily no redaction: {user_allow_temporarily_no_redaction}"
+        batch.log.debug(
+            "User allow temporarily no redaction: %s",
+            user_allow_temporarily_no_redaction,
         )
+        content_items = []
         for row in rows:
             content_item = serialize_solr_doc_content_item_to_plain_dict(row)
             content_item = mapper_doc_remove_private_collections(
@@ -176,8 +121,71 @@ def helper_export_query_as_csv_progress(
                     user_bitmask=user_bitmask,
                 )
             # removed unwanted fields from the content_item
-            content_item = {k: v for k, v in content_item.items() if k in fieldnames}
-            w.writerow(content_item)
+            content_items.append(
+                {k: v for k, v in content_item.items() if k in fieldnames}
+            )
+        return content_items
+
+    def write_csv(batch: Batch, content_items: list[dict]) -> None:
+        if batch.total == 0:
+            return
+        with open(
+            job.attachment.upload.path, mode="a", encoding="utf-8-sig", newline=""
+        ) as csvfile:
+            w = csv.DictWriter(
+                csvfile,
+                delimiter=";",
+                quoting=csv.QUOTE_MINIMAL,
+                fieldnames=fieldnames,
+            )
+            if batch.page == 1:
+                batch.log.info("writing header: %s", fieldnames)
+                # write custom header
+                w.writerow(
+                    {
+                        fieldnames[0]: get_results_message(
+                            batch.total, batch.max_loops, limit
+                        )
+                    }
+                )
+                w.writerow(
+                    {
+                        fieldnames[
+                            0
+                        ]: f"Explore the list of result: (https://impresso-project.ch/app/search?sq={query_hash})"
+                    }
+                )
+                w.writerow(
+                    {
+                        fieldnames[0]: settings.IMPRESSO_CONTENT_DOWNLOAD_DISCLAIMER,
+                    }
+                )
+                # empty line
+                w.writerow({})
+                w.writeheader()
+            w.writerows(content_items)
+        batch.log.count("rows", len(content_items))
+
+    batch = PagedSolrJob(
+        job=job,
+        source=SolrSource(
+            q=query, url=settings.IMPRESSO_SOLR_URL_SELECT, fl=",".join(query_param_fl)
+        ),
+        transform=to_csv_rows,
+        sinks=[write_csv],
+        limit=limit,
+        name="helper_export_query_as_csv_progress",
+        logger=logger,
+    ).run_page(skip=skip)
+    page, loops, progress = batch.page, batch.loops, batch.progress
+
+    if batch.total == 0:
+        logger.info(f"[job:{job.pk} user:{job.creator.pk}] No results found, aborting.")
+        return (
+            page,
+            loops,
+            progress,
+        )
     if page < loops:
         return (
             page,
@@ -0,0 +1,120 @@
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+if TYPE_CHECKING:
+    import redis
+
+default_logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "impresso:lock:"
+WATERMARKS_KEY = "impresso:watermarks"
+
+
+@lru_cache(maxsize=1)
+def get_redis_client() -> "redis.Redis":
+    """
+    Returns the Redis client used for periodic task locks and watermarks,
+    connected to settings.IMPRESSO_REDIS_LOCK_URL. Responses are decoded to str.
+    """
+    import redis
+
+    return redis.Redis.from_url(
+        settings.IMPRESSO_REDIS_LOCK_URL, decode_responses=True
+    )
+
+
+def _as_str(value: Union[bytes, str]) -> str:
+    # clients created without decode_responses return bytes
+    return value.decode() if isinstance(value, bytes) else value
+
+
+@contextmanager
+def singleton_lock(
+    name: str,
+    timeout: Optional[int] = None,
+    client: Optional["redis.Redis"] = None,
+    logger: logging.Logger = default_logger,
+) -> Iterator[bool]:
+    """
+    Non-blocking, cluster-wide lock based on Redis `SET NX EX`. Yields True
+    when the lock was acquired, False when another run holds it. The lock
+    expires after `timeout` seconds, so that a crashed worker does not keep it
+    forever, and is only released by the run that acquired it.
+
+    Usage:
+        with singleton_lock("revoke_expired_memberships") as acquired:
+            if not acquired:
+                return
+
+    Args:
+        name (str): The name of the lock.
+        timeout (int, optional): Expiration of the lock in seconds. Defaults to
+            settings.IMPRESSO_PERIODIC_TASK_LOCK_TIMEOUT.
+        client (redis.Redis, optional): Redis client. Defaults to get_redis_client().
+        logger (logging.Logger, optional): The logger to use. Defaults to default_logger.
+    """
+    client = client or get_redis_client()
+    timeout = timeout or settings.IMPRESSO_PERIODIC_TASK_LOCK_TIMEOUT
+    key = f"{LOCK_KEY_PREFIX}{name}"
+    token = uuid.uuid4().hex
+    acquired = bool(client.set(key, token, nx=True, ex=timeout))
+    if not acquired:
+        logger.info(f"Lock {key} is held by another run, skipping.")
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _release_lock(client=client, key=key, token=token, logger=logger)
+
+
+def _release_lock(
+    client: "redis.Redis", key: str, token: str, logger: logging.Logger
+) -> None:
+    from redis import WatchError
+
+    # delete the key only if it still holds our token (compare-and-delete)
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            current_token = pipe.get(key)
+            if current_token is None or _as_str(current_token) != token:
+                pipe.unwatch()
+                logger.warning(
+                    f"Lock {key} expired before the end of the run, not releasing it."
+                )
+                return
+            pipe.multi()
+            pipe.delete(key)
+            pipe.execute()
+        except WatchError:
+            logger.warning(f"Lock {key} changed while releasing it.")
+
+
+def get_watermark(
+    name: str, client: Optional["redis.Redis"] = None
+) -> Optional[datetime]:
+    """
+    Returns the watermark (end of the last successful run) of a periodic task,
+    or None if the task never completed.
+    """
+    client = client or get_redis_client()
+    value = client.hget(WATERMARKS_KEY, name)
+    return parse_datetime(_as_str(value)) if value else None
+
+
+def set_watermark(
+    name: str, value: datetime, client: Optional["redis.Redis"] = None
+) -> None:
+    """
+    Records the watermark of a periodic task. Call it only once the run
+    succeeded, so that a failed run is processed again by the next one.
+    """
+    client = client or get_redis_client()
+    client.hset(WATERMARKS_KEY, name, value.isoformat())
@@ -1,10 +1,18 @@
 import logging
-from typing import Tuple
+from typing import Any, Tuple
 from django.conf import settings
-from django.db.utils import IntegrityError
 from . import get_pagination
-from ...solr import find_all, update
-from ...models import Collection, CollectableItem, Job
+from .engine import (
+    Batch,
+    PagedSolrJob,
+    SolrSource,
+    collectable_items_sink,
+    solr_update_sink,
+    ucoll_updates,
+)
+from ...solr import find_all, get_core_from_url, iter_all, update
+from ...models import Collection, Job
+from ..metrics import measure_job_page
 
 default_logger = logging.getLogger(__name__)
 
@@ -44,6 +52,79 @@ def get_indexed_tr_passages_by_items(
     return (page, loops, progress, total, res["response"]["docs"])
 
 
+def get_tr_passages_join_query(
+    collection_id: str, articles_url: str = settings.IMPRESSO_SOLR_URL_SELECT
+) -> str:
+    """
+    Return the query selecting, in the TR passages core, the passages of the
+    content items tagged with a collection in the articles core, with a
+    cross-core join. The articles core must be a single shard hosted on the
+    same Solr node as the passages core.
+
+    >>> get_tr_passages_join_query("local-abc", "http://localhost:8983/solr/impresso/select")
+    '{!join fromIndex=impresso from=id to=ci_id_s}ucoll_ss:"local-abc"'
+    """
+    core, _ = get_core_from_url(articles_url)
+    return f'{{!join fromIndex={core} from=id to=ci_id_s}}ucoll_ss:"{collection_id}"'
+
+
+def add_collection_to_tr_passages_with_join(
+    collection_id: str,
+    batch_size: int = 500,
+    commit_within_ms: int = 10000,
+    logger: logging.Logger = default_logger,
+) -> int:
+    """
+    Add a collection to the ucoll_ss field of the TR passages of its content
+    items, selecting them server-side with a cross-core join on the articles
+    core (see `get_tr_passages_join_query`) instead of OR-ing content item
+    ids into the query. Passages already tagged are filtered out, the others
+    are streamed with a cursorMark and updated with atomic `add-distinct`,
+    `batch_size` at a time: no _version_ is needed and a run can be resumed.
+
+    Args:
+        collection_id (str): The collection id, already set in the articles core.
+        batch_size (int): Number of passages per request. Defaults to 500.
+        commit_within_ms (int): Solr commitWithin, in milliseconds. Defaults to 10000.
+        logger (Logger, optional): Logger instance. Defaults to default_logger.
+
+    Returns:
+        int: The number of updated passages.
+    """
+    updated = 0
+    todos = []
+    for doc in iter_all(
+        q=get_tr_passages_join_query(collection_id),
+        fq=f'-ucoll_ss:"{collection_id}"',
+        url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+        fl="id",
+        rows=batch_size,
+    ):
+        todos.append({"id": doc["id"], "ucoll_ss": {"add-distinct": collection_id}})
+        if len(todos) >= batch_size:
+            update(
+                todos=todos,
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+                commit_within_ms=commit_within_ms,
+                logger=logger,
+            )
+            updated += len(todos)
+            todos = []
+    if todos:
+        update(
+            todos=todos,
+            url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+            commit_within_ms=commit_within_ms,
+            logger=logger,
+        )
+        updated += len(todos)
+    logger.info(
+        f"add_collection_to_tr_passages_with_join ucoll_ss={collection_id} "
+        f"updated={updated}"
+    )
+    return updated
+
+
 def remove_collection_from_tr_passages(
     collection_id: str,
     job: Job,
@@ -66,70 +147,31 @@ def remove_collection_from_tr_passages(
             - loops (int): The number of loops required to process all records.
             - progress (float): The progress percentage of the operation.
     """
-
-    query = f"ucoll_ss:{collection_id}"
-    # 1. get text reuse passages matching collection_id
-    tr_passages_request = find_all(
-        q=query,
-        url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
-        fl="id,ucoll_ss,_version_,ci_id_s",
-        skip=0,
+    batch = PagedSolrJob(
+        job=job,
+        # 1. get text reuse passages matching collection_id
+        source=SolrSource(
+            q=f"ucoll_ss:{collection_id}",
+            url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+            fl="id,ucoll_ss,_version_,ci_id_s",
+        ),
+        # 2. get update objects for text reuse index.
+        transform=ucoll_updates(collection_id, add=False),
+        sinks=[
+            solr_update_sink(
+                url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE, logger=logger
+            )
+        ],
         limit=limit,
+        ignore_max_loops=True,
+        name="remove_collection_from_tr_passages",
+        fields={"collection_id": collection_id},
         logger=logger,
-    )
-    total = tr_passages_request["response"]["numFound"]
-    qtime = tr_passages_request["responseHeader"]["QTime"]
-    page, loops, progress, max_loops = get_pagination(
-        skip=0, limit=limit, total=total, job=job, ignore_max_loops=True
-    )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] "
-        f" query = {query} -"
-        f" total:{total} in {qtime}ms -"
-        f" loops:{loops} - max_loops:{max_loops} -"
-        f" page:{page} - progress:{progress} -"
-    )
-    # 2. get update objects for text reuse index.
-    solr_tr_passages = tr_passages_request.get("response", {}).get("docs", [])
-    solr_updates_needed = []
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] " f"{tr_passages_request['response']}"
-    )
-    for doc in solr_tr_passages:
-        # get list of collection in ucoll_ss field
-        ucoll_list = doc.get("ucoll_ss", [])
-        logger.info(ucoll_list)
-        if collection_id not in ucoll_list:
-            continue
-        ucoll_list.remove(collection_id)
-        solr_updates_needed.append(
-            {
-                "id": doc.get("id"),
-                "_version_": doc.get("_version_"),
-                "ucoll_ss": {"set": ucoll_list},
-            }
-        )
-    logger.info(
-        f"[job:{job.pk} user:{job.creator.pk}] "
-        f"n. Solr updates needed in text_reuse: {len(solr_updates_needed)}"
-    )
-    # more than one
-    if solr_updates_needed:
-        result = update(
-            url=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
-            todos=solr_updates_needed,
-            logger=logger,
-        )
-        result_response_header = result.get("responseHeader")
-        result_adds = len(result.get("adds", []))
-        logger.info(
-            f"(update) solr updates response={result_response_header}, "
-            f"adds={result_adds}"
-        )
-    # save all items there!
-    return (page, loops, progress)
+    ).run_page(skip=0)
+    return (batch.page, batch.loops, batch.progress)
 
 
+@measure_job_page
 def add_tr_passages_query_results_to_collection(
     collection_id: str,
     job: Job,
@@ -157,102 +199,90 @@ def add_tr_passages_query_results_to_collection(
             - progress (float): The progress percentage of the operation.
     """
     collection = Collection.objects.get(pk=collection_id)
-    logger.info(
-        f"ucoll_ss={collection_id} " f"query={query} collection name={collection.name})"
-    )
 
-    content_items = find_all(
-        q=query,
-        url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
-        fl="id,ci_id_s,ucoll_ss,_version_,score",
-        skip=skip,
-        limit=limit,
-        sort="score DESC,id ASC",
-        fq="{!collapse field=ci_id_s}",
-        logger=logger,
-    )
-    total_content_items = content_items["response"]["numFound"]
-    # if Job is not none, we limit the number of loops to the value of job.creator.profile.max_allowed_loops
-    page, loops, progress, max_loops = get_pagination(
-        skip=skip, limit=limit, total=total_content_items, job=job
-    )
-    solr_content_items = content_items.get("response", {}).get("docs", [])
-    logger.info(
-        f"SOLR find_all success, numFound={total_content_items} "
-        f"max_loops={max_loops} page={page} loops={loops}"
-        f"skip={skip} limit={limit} ({progress * 100}% compl.)"
-    )
-    try:
-        CollectableItem.objects.bulk_create(
-            map(
-                lambda doc: CollectableItem(
-                    item_id=doc.get("ci_id_s"),
-                    content_type=CollectableItem.ARTICLE,
-                    collection_id=collection_id,
-                    search_query_score=doc.get("score"),
-                ),
-                solr_content_items,
-            ),
-            ignore_conflicts=True,
-        )
-    except IntegrityError as e:
-        logger.exception(e)
-    else:
-        logger.info(
-            f"DB bulk_create success, {total_content_items} items assigned to collection {collection.pk} "
-        )
-    items_ids = [doc.get("ci_id_s", None) for doc in solr_content_items]
-    # add collection to articles. fast.
-    collection.add_items_to_index(
-        items_ids=items_ids,
-        solr_url_select=settings.IMPRESSO_SOLR_URL_SELECT,
-        solr_url_update=settings.IMPRESSO_SOLR_URL_UPDATE,
-        solr_auth_select=settings.IMPRESSO_SOLR_AUTH,
-        solr_auth_update=settings.IMPRESSO_SOLR_AUTH_WRITE,
-    )
-    # add collection to tr passages
-    # Now lets add the collection to the tr passages
-    tr_page = 0
-    tr_loops = 1
-    # loop till we have all the tr passages
-    while tr_page < tr_loops:
-        (
-            tr_page,
-            tr_loops,
-            tr_progress,
-            total_tr_passages,
-            tr_passages,
-        ) = get_indexed_tr_passages_by_items(
-            items_ids=items_ids,
-            limit=limit,
-            skip=tr_page * limit,
-            job=job,
-            logger=logger,
-        )
-
-        logger.info(
-            f"SOLR tr_passages find_all success, numFound={total_tr_passages} "
-            f"page {tr_page} of {tr_loops} ({tr_progress * 100}% compl.)"
-        )
-        print([doc.get("id", None) for doc in tr_passages])
-        # add escaper for the identifiers in solr:
-        # https://lucene.apache.org/solr/guide/7_7/common-query-parameters.html#CommonQueryParameters-Theq%2Ffq%2Ffl%2Fsort%2FetcParameters
-        # https://lucene.apache.org/solr/guide/7_7/escaping-characters.html#EscapingCharacters-EscapeSequences
-        escaped_ids = [
-            doc.get("id", None).replace(":", "\\:").replace("/", "\\/")
-            for doc in tr_passages
-        ]
+    def add_to_articles(batch: Batch, _result: Any) -> None:
+        # add collection to articles. fast.
         collection.add_items_to_index(
-            items_ids=escaped_ids,
-            lookup_field="id",
-            solr_url_select=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
-            solr_url_update=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+            items_ids=[doc.get("ci_id_s", None) for doc in batch.docs],
+            solr_url_select=settings.IMPRESSO_SOLR_URL_SELECT,
+            solr_url_update=settings.IMPRESSO_SOLR_URL_UPDATE,
             solr_auth_select=settings.IMPRESSO_SOLR_AUTH,
             solr_auth_update=settings.IMPRESSO_SOLR_AUTH_WRITE,
         )
 
-    logger.info(
-        f"ucoll_ss={collection.pk} "
-        f"skip={skip} limit={limit} ({progress * 100}% compl.)"
-    )
-    return (page, loops, progress)
+    def add_to_tr_passages(batch: Batch, _result: Any) -> None:
+        if settings.IMPRESSO_SOLR_TR_JOIN:
+            # all pages are in the articles core: one join once the last is done
+            if batch.page >= batch.loops:
+                add_collection_to_tr_passages_with_join(
+                    collection_id=collection.pk, batch_size=limit, logger=logger
+                )
+            return
+        items_ids = [doc.get("ci_id_s", None) for doc in batch.docs]
+        # Now lets add the collection to the tr passages
+        tr_page = 0
+        tr_loops = 1
+        # loop till we have all the tr passages
+        while tr_page < tr_loops:
+            (
+                tr_page,
+                tr_loops,
+                tr_progress,
+                total_tr_passages,
+                tr_passages,
+            ) = get_indexed_tr_passages_by_items(
+                items_ids=items_ids,
+                limit=limit,
+                skip=tr_page * limit,
+                job=job,
+                logger=logger,
+            )
+
+            batch.log.count("tr_passages", len(tr_passages))
+            batch.log.sample(
+                "tr_page",
+                "tr_passages page %s of %s, numFound=%s, ids=%s",
+                tr_page,
+                tr_loops,
+                total_tr_passages,
+                batch.log.truncate([doc.get("id", None) for doc in tr_passages]),
+            )
+            # add escaper for the identifiers in solr:
+            # https://lucene.apache.org/solr/guide/7_7/common-query-parameters.html#CommonQueryParameters-Theq%2Ffq%2Ffl%2Fsort%2FetcParameters
+            # https://lucene.apache.org/solr/guide/7_7/escaping-characters.html#EscapingCharacters-EscapeSequences
+            escaped_ids = [
+                doc.get("id", None).replace(":", "\\:").replace("/", "\\/")
+                for doc in tr_passages
+            ]
+            collection.add_items_to_index(
+                items_ids=escaped_ids,
+                lookup_field="id",
+                solr_url_select=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+                solr_url_update=settings.IMPRESSO_SOLR_PASSAGES_URL_UPDATE,
+                solr_auth_select=settings.IMPRESSO_SOLR_AUTH,
+                solr_auth_update=settings.IMPRESSO_SOLR_AUTH_WRITE,
+            )
+
+    # if Job is not none, we limit the number of loops to the value of job.creator.profile.max_allowed_loops
+    batch = PagedSolrJob(
+        job=job,
+        source=SolrSource(
+            q=query,
+            url=settings.IMPRESSO_SOLR_PASSAGES_URL_SELECT,
+            fl="id,ci_id_s,ucoll_ss,_version_,score",
+            sort="score DESC,id ASC",
+            fq="{!collapse field=ci_id_s}",
+        ),
+        sinks=[
+            collectable_items_sink(
+                collection_id=collection_id, id_field="ci_id_s", logger=logger
+            ),
+            add_to_articles,
+            add_to_tr_passages,
+        ],
+        limit=limit,
+        name="add_tr_passages_query_results_to_collection",
+        fields={"collection_id": collection_id},
+        logger=logger,
+    ).run_page(skip=skip)
+    return (batch.page, batch.loops, batch.progress)
@@ -1,16 +1,32 @@
 import logging
+from collections import defaultdict
 from logging import Logger
+from typing import Iterable, Optional
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from impresso.models.userBitmap import UserBitmap
+from impresso.models.userBitmapSubscription import UserBitmapSubscription
+from impresso.utils.models.userBitmap import rebuild_user_bitmaps
 from impresso.utils.models.user import (
     get_number_of_special_memberships,
     get_plan_from_user_groups,
 )
-from impresso.utils.tasks.email import send_templated_email_with_context
+from impresso.utils.tasks.email import (
+    EmailDispatcher,
+    send_templated_email_with_context,
+)
 from impresso.models.userSpecialMembershipRequest import UserSpecialMembershipRequest
 
 default_logger = logging.getLogger(__name__)
 
+# statuses a batch revocation applies to
+REVOCABLE_STATUSES = (
+    UserSpecialMembershipRequest.STATUS_APPROVED,
+    UserSpecialMembershipRequest.STATUS_APPROVED_TEMPORARY,
+)
+
 
 def apply_special_membership_to_bitmap(
     instance: UserSpecialMembershipRequest,
@@ -63,6 +79,7 @@ def send_email_after_user_special_membership_request_updated(
     fail_silently: bool = False,
     is_modality_cc_reviewer_enabled: bool = False,
     logger: Logger = default_logger,
+    dispatcher: Optional[EmailDispatcher] = None,
 ) -> None:
     """
     Sends an email to the user after a special membership request has been created.
@@ -73,6 +90,8 @@ def send_email_after_user_special_membership_request_updated(
 
         is_modality_cc_reviewer_enabled (bool, optional): Whether the modality for CC reviewers is enabled. Defaults to False.
         logger (Logger, optional): The logger to use for logging information. Defaults to default_logger.
+        dispatcher (EmailDispatcher, optional): When given, the email is queued on the dispatcher
+            and sent with the rest of the batch. Defaults to None.
     Raises:
         Exception: If there is an error sending the email.
     """
@@ -151,9 +170,107 @@ def send_email_after_user_special_membership_request_updated(
         reply_to=reply_to,
         logger=logger,
         fail_silently=fail_silently,
+        dispatcher=dispatcher,
     )
 
 
+def revoke_special_membership_requests_in_batch(
+    requests: Iterable[UserSpecialMembershipRequest],
+    dispatcher: EmailDispatcher,
+    logger: Logger = default_logger,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Revokes the given special membership requests in one transactional pass,
+    without going through the post_save signal (one Celery task per request):
+    the rows still approved are locked (SELECT ... FOR UPDATE), the others are
+    skipped; the statuses are written with a single bulk update, the matching rows of
+    the bitmap subscriptions table are removed with a single grouped delete and
+    the bitmaps of the affected users are recomputed in bulk.
+    The revocation emails are then queued on the given dispatcher and sent in
+    batches over a single connection.
+
+    Args:
+        requests (Iterable[UserSpecialMembershipRequest]): The requests to revoke.
+            Select the related user, reviewer and subscription to avoid extra queries.
+        dispatcher (EmailDispatcher): The dispatcher collecting revocation emails.
+            The caller is responsible for flushing and closing it.
+        logger (Logger, optional): The logger to use for logging information. Defaults to default_logger.
+        batch_size (int, optional): Number of rows per bulk query. Defaults to 1000.
+    Returns:
+        int: The number of revoked requests.
+    """
+    requests = list(requests)
+    if not requests:
+        logger.info("No special membership request to revoke in batch mode")
+        return 0
+
+    with transaction.atomic():
+        # lock the rows and check their status again: a request reviewed
+        # since it was selected is left alone.
+        locked = dict(
+            UserSpecialMembershipRequest.objects.select_for_update()
+            .filter(
+                pk__in=[req.pk for req in requests],
+                status__in=REVOCABLE_STATUSES,
+            )
+            .values_list("pk", "changelog")
+        )
+        skipped = len(requests) - len(locked)
+        if skipped:
+            logger.info(
+                f"Skipped {skipped} special membership request(s) reviewed meanwhile"
+            )
+        requests = [req for req in requests if req.pk in locked]
+        if not requests:
+            return 0
+        now = timezone.now()
+        user_ids_by_dataset: dict[int, set[int]] = defaultdict(set)
+        for req in requests:
+            req.changelog = locked[req.pk]
+            req.status = UserSpecialMembershipRequest.STATUS_REVOKED
+            # bulk_update does not honour auto_now
+            req.date_last_modified = now
+            req._append_changelog()
+            req.revoke_at = req.compute_revoke_at()
+            if req.subscription_id:
+                user_ids_by_dataset[req.subscription_id].add(req.user_id)
+        UserSpecialMembershipRequest.objects.bulk_update(
+            requests,
+            ["status", "changelog", "date_last_modified", "revoke_at"],
+            batch_size=batch_size,
+        )
+        if user_ids_by_dataset:
+            accesses = Q()
+            for dataset_id, user_ids in user_ids_by_dataset.items():
+                accesses |= Q(
+                    specialmembershipdataset_id=dataset_id,
+                    userbitmap__user_id__in=user_ids,
+                )
+            UserBitmapSubscription.objects.filter(accesses).delete()
+        # the queryset delete above does not send m2m_changed
+        rebuild_user_bitmaps(
+            user_ids={req.user_id for req in requests},
+            create_missing=False,
+            batch_size=batch_size,
+        )
+
+    for req in requests:
+        send_email_after_user_special_membership_request_updated(
+            instance=req,
+            fail_silently=True,
+            is_modality_cc_reviewer_enabled=(
+                req.subscription.is_modality_cc_reviewer_enabled()
+                if req.subscription
+                else False
+            ),
+            logger=logger,
+            dispatcher=dispatcher,
+        )
+    logger.info(f"Revoked {len(requests)} special membership request(s) in batch mode")
+    return len(requests)
+
+
 def send_email_after_user_special_membership_request_created(
     instance: UserSpecialMembershipRequest,
     fail_silently: bool = False,
@@ -14,7 +14,6 @@ from unfold.admin import ModelAdmin  # type: ignore
 from unfold.decorators import action  # type: ignore
 from unfold.views import UnfoldModelAdminViewMixin  # type: ignore
 
-from impresso.tasks import after_user_activation, after_user_activation_plan_rejected
 from impresso.utils.models.user import (
     get_plan_from_user_groups,
     get_plan_from_group_name,
@@ -78,6 +77,12 @@ class ToggleStatus(UnfoldModelAdminViewMixin, TemplateView):
         return render(request, self.template_name, context)
 
     def post(self, request, *args, **kwargs):
+        # imported here: the admin is loaded by every management command
+        from impresso.tasks import (
+            after_user_activation,
+            after_user_activation_plan_rejected,
+        )
+
         user = get_object_or_404(self.model_admin.model, pk=self.user_id)
         user.is_active = not user.is_active
         user.save()
@@ -138,6 +143,15 @@ class UserAdmin(ModelAdmin):
     list_filter = (GroupFilter, "is_staff", "is_active")
     ordering = ("-date_joined",)
 
+    def get_queryset(self, request):
+        # list_display reads profile, bitmap and groups for every row
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("profile", "bitmap")
+            .prefetch_related("groups")
+        )
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -154,11 +168,13 @@ class UserAdmin(ModelAdmin):
         group_name = settings.IMPRESSO_GROUP_USER_PLAN_NO_REDACTION
         try:
             group, created = Group.objects.get_or_create(name=group_name)
-            added_count = 0
-            for user in queryset:
-                if group not in user.groups.all():
-                    user.groups.add(group)
-                    added_count += 1
+            user_ids = set(queryset.values_list("pk", flat=True))
+            user_ids -= set(
+                group.user_set.filter(pk__in=user_ids).values_list("pk", flat=True)
+            )
+            # single bulk insert in the through table, single m2m_changed signal
+            group.user_set.add(*user_ids)
+            added_count = len(user_ids)
             messages.success(request, f"Added {added_count} users to '{group_name}'.")
         except Exception as e:
             messages.error(request, f"Error adding users to '{group_name}': {e}")
@@ -170,11 +186,14 @@ class UserAdmin(ModelAdmin):
         )  # Change this to your actual group name
         try:
             group = Group.objects.get(name=group_name)
-            removed_count = 0
-            for user in queryset:
-                if group in user.groups.all():
-                    user.groups.remove(group)
-                    removed_count += 1
+            user_ids = list(
+                group.user_set.filter(
+                    pk__in=queryset.values_list("pk", flat=True)
+                ).values_list("pk", flat=True)
+            )
+            # single bulk delete in the through table, single m2m_changed signal
+            group.user_set.remove(*user_ids)
+            removed_count = len(user_ids)
             messages.success(
                 request, f"Removed {removed_count} users from '{group_name}'."
             )
@@ -183,10 +202,13 @@ class UserAdmin(ModelAdmin):
 
     @action(description="ACTIVATE selected users")
     def make_active(self, request, queryset):
+        from impresso.tasks import after_user_activation
+
+        user_ids = list(queryset.values_list("pk", flat=True))
         updated = queryset.update(is_active=True)
         # send email!
-        for user in queryset:
-            after_user_activation.delay(user_id=user.pk)
+        for user_id in user_ids:
+            after_user_activation.delay(user_id=user_id)
         self.message_user(
             request,
             ngettext(
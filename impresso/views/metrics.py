@@ -0,0 +1,32 @@
+import hmac
+import logging
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_GET
+
+from impresso.utils.metrics import render_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Metrics of the web process in the Prometheus text format. Not found unless
+    settings.IMPRESSO_METRICS_ENABLED and settings.IMPRESSO_METRICS_TOKEN are
+    set; requires the bearer token.
+    """
+    if not settings.IMPRESSO_METRICS_ENABLED:
+        raise Http404()
+    token = settings.IMPRESSO_METRICS_TOKEN
+    if not token:
+        logger.warning("metrics enabled without IMPRESSO_METRICS_TOKEN, not served")
+        raise Http404()
+    if not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)